@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # gzip, or brotli when installed, for responses of 200 bytes or more
+    'energyplus_api.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -129,7 +132,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # JSONRenderer backed by orjson when it is installed
+        'energyplus_api.renderers.ORJSONRenderer',
     ],
 }
 
@@ -145,3 +149,126 @@ CORS_ALLOW_CREDENTIALS = True
 # TODO: maybe make these configurable via env vars
 ENERGYPLUS_IDF_DIR = BASE_DIR / 'simulations' / 'inputs'
 ENERGYPLUS_OUTPUT_DIR = BASE_DIR / 'simulations' / 'outputs'
+ENERGYPLUS_PROFILE_DIR = BASE_DIR / 'simulations' / 'profiles'
+ENERGYPLUS_WEATHER_DIR = BASE_DIR / 'simulations' / 'weather'
+
+# Installed EnergyPlus versions are discovered once and shared through this
+# file; run `python manage.py energyplus_installs --refresh` after installing
+# or removing a version.
+ENERGYPLUS_REGISTRY_FILE = BASE_DIR / 'simulations' / 'energyplus_registry.json'
+ENERGYPLUS_INSTALL_ROOTS = ['C:/', '/usr/local', '/opt', '/Applications']
+
+# Simulation job queue
+# Runs are executed by a pool of worker threads; each one mostly waits on an
+# EnergyPlus subprocess, so size the pool to the cores available.
+ENERGYPLUS_MAX_WORKERS = int(os.environ.get('ENERGYPLUS_MAX_WORKERS', os.cpu_count() or 1))
+ENERGYPLUS_SIMULATION_TIMEOUT = int(os.environ.get('ENERGYPLUS_SIMULATION_TIMEOUT', 300))
+ENERGYPLUS_BATCH_MAX_VARIANTS = int(os.environ.get('ENERGYPLUS_BATCH_MAX_VARIANTS', 500))
+
+# Result cache: identical IDF/weather/version inputs reuse a completed run
+ENERGYPLUS_RESULT_CACHE_ENABLED = os.environ.get('ENERGYPLUS_RESULT_CACHE_ENABLED', '1') == '1'
+ENERGYPLUS_RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('ENERGYPLUS_RESULT_CACHE_MAX_ENTRIES', 1000))
+ENERGYPLUS_RESULT_CACHE_MAX_AGE_DAYS = int(os.environ.get('ENERGYPLUS_RESULT_CACHE_MAX_AGE_DAYS', 30))
+
+# Retention of simulation outputs (see energyplus_api/retention.py and
+# `python manage.py prune_simulations`). A limit of 0 disables it.
+ENERGYPLUS_RETENTION_ARCHIVE_AFTER_MINUTES = int(os.environ.get('ENERGYPLUS_RETENTION_ARCHIVE_AFTER_MINUTES', 60))
+ENERGYPLUS_RETENTION_MAX_AGE_DAYS = int(os.environ.get('ENERGYPLUS_RETENTION_MAX_AGE_DAYS', 90))
+ENERGYPLUS_RETENTION_MAX_BYTES = int(os.environ.get('ENERGYPLUS_RETENTION_MAX_BYTES', 10 * 1024 ** 3))
+# Also remove output directories that have no SimulationRun row
+ENERGYPLUS_RETENTION_REMOVE_ORPHANS = os.environ.get('ENERGYPLUS_RETENTION_REMOVE_ORPHANS', '0') == '1'
+# Sweep periodically from the server process as well; 0 leaves it to the command
+ENERGYPLUS_RETENTION_INTERVAL_SECONDS = int(os.environ.get('ENERGYPLUS_RETENTION_INTERVAL_SECONDS', 0))
+
+# Interval series kept per run in simulations/outputs/<id>/timeseries.f32
+ENERGYPLUS_TIMESERIES_MAX_SERIES = int(os.environ.get('ENERGYPLUS_TIMESERIES_MAX_SERIES', 256))
+# Longest series the timeseries endpoint returns; longer ones are downsampled
+ENERGYPLUS_TIMESERIES_MAX_POINTS = int(os.environ.get('ENERGYPLUS_TIMESERIES_MAX_POINTS', 2000))
+ENERGYPLUS_TIMESERIES_CACHE_SECONDS = int(os.environ.get('ENERGYPLUS_TIMESERIES_CACHE_SECONDS', 3600))
+
+# How often (seconds) the IDF catalog checks the inputs directory for changes
+ENERGYPLUS_CATALOG_REFRESH_SECONDS = float(os.environ.get('ENERGYPLUS_CATALOG_REFRESH_SECONDS', 5))
+
+# Admission control: jobs whose estimated runtime exceeds this budget
+# (seconds, 0 disables) are rejected at submission. Each job's timeout is
+# its estimate times ENERGYPLUS_TIMEOUT_FACTOR, at least
+# ENERGYPLUS_SIMULATION_TIMEOUT.
+ENERGYPLUS_MAX_JOB_SECONDS = int(os.environ.get('ENERGYPLUS_MAX_JOB_SECONDS', 3600))
+ENERGYPLUS_TIMEOUT_FACTOR = float(os.environ.get('ENERGYPLUS_TIMEOUT_FACTOR', 3))
+
+# Scratch space: each EnergyPlus run works in its own directory under
+# ENERGYPLUS_SCRATCH_DIR (e.g. /dev/shm; defaults to the system temp dir).
+# Only files matching ENERGYPLUS_PERSIST_ARTIFACTS are moved to the outputs
+# directory, gzip-compressed if they also match ENERGYPLUS_COMPRESS_ARTIFACTS.
+ENERGYPLUS_SCRATCH_DIR = os.environ.get('ENERGYPLUS_SCRATCH_DIR', '')
+ENERGYPLUS_PERSIST_ARTIFACTS = [
+    pattern.strip() for pattern in os.environ.get(
+        'ENERGYPLUS_PERSIST_ARTIFACTS', 'eplusout.sql,eplustbl.htm,eplusout.err,timeseries.*'
+    ).split(',') if pattern.strip()
+]
+ENERGYPLUS_COMPRESS_ARTIFACTS = [
+    pattern.strip() for pattern in os.environ.get('ENERGYPLUS_COMPRESS_ARTIFACTS', '*.sql').split(',')
+    if pattern.strip()
+]
+
+# mode=preview: run ENERGYPLUS_PREVIEW_WINDOWS windows of ENERGYPLUS_PREVIEW_DAYS
+# days per RunPeriod (see energyplus_api/preview.py), within this timeout
+ENERGYPLUS_PREVIEW_WINDOWS = int(os.environ.get('ENERGYPLUS_PREVIEW_WINDOWS', 4))
+ENERGYPLUS_PREVIEW_DAYS = int(os.environ.get('ENERGYPLUS_PREVIEW_DAYS', 7))
+ENERGYPLUS_PREVIEW_TIMEOUT = int(os.environ.get('ENERGYPLUS_PREVIEW_TIMEOUT', 60))
+
+# Logging: energyplus_api records carry the simulation they belong to (see
+# energyplus_api/logs.py). ENERGYPLUS_LOG_FORMAT=json writes one JSON object
+# per line for log shippers.
+ENERGYPLUS_LOG_FORMAT = os.environ.get('ENERGYPLUS_LOG_FORMAT', 'text')
+ENERGYPLUS_LOG_LEVEL = os.environ.get('ENERGYPLUS_LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'simulation': {'()': 'energyplus_api.logs.SimulationContextFilter'},
+    },
+    'formatters': {
+        'text': {
+            '()': 'energyplus_api.logs.TextFormatter',
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+        'json': {'()': 'energyplus_api.logs.JsonFormatter'},
+    },
+    'handlers': {
+        'energyplus': {
+            'class': 'logging.StreamHandler',
+            'filters': ['simulation'],
+            'formatter': 'json' if ENERGYPLUS_LOG_FORMAT == 'json' else 'text',
+        },
+    },
+    'loggers': {
+        'energyplus_api': {
+            'handlers': ['energyplus'],
+            'level': ENERGYPLUS_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
+# Staff can profile a run request with `X-Profile: 1` (see
+# energyplus_api/profiling.py); at most this many captures per hour per
+# process, 0 disables it.
+ENERGYPLUS_PROFILE_MAX_PER_HOUR = int(os.environ.get('ENERGYPLUS_PROFILE_MAX_PER_HOUR', 10))
+
+# Where queued simulations run: 'local' worker threads in the server
+# process, or 'distributed' worker processes started with
+# `python manage.py simulation_worker` on any host sharing the database
+# (see energyplus_api/distributed.py). Workers hold a job under a lease
+# renewed by heartbeats; a job whose lease expires is requeued, up to
+# ENERGYPLUS_WORKER_MAX_ATTEMPTS times. Remote workers upload outputs with
+# ENERGYPLUS_WORKER_TOKEN.
+ENERGYPLUS_EXECUTION = os.environ.get('ENERGYPLUS_EXECUTION', 'local')
+ENERGYPLUS_WORKER_LEASE_SECONDS = int(os.environ.get('ENERGYPLUS_WORKER_LEASE_SECONDS', 60))
+ENERGYPLUS_WORKER_MAX_ATTEMPTS = int(os.environ.get('ENERGYPLUS_WORKER_MAX_ATTEMPTS', 3))
+ENERGYPLUS_WORKER_TOKEN = os.environ.get('ENERGYPLUS_WORKER_TOKEN', '')
+
+# Weather registry (see energyplus_api/weather.py): uploaded EPW files are
+# kept in the database and parsed into a per-machine cache under
+# ENERGYPLUS_WEATHER_DIR; uploads are limited to this many bytes.
+ENERGYPLUS_WEATHER_MAX_BYTES = int(os.environ.get('ENERGYPLUS_WEATHER_MAX_BYTES', 10 * 1024 * 1024))
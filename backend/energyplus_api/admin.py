@@ -1,6 +1,13 @@
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
 
-from .models import SimulationRun
+from .models import (
+    SimulationBatch, SimulationCacheEntry, SimulationRun, SimulationSummary, SimulationWorker, WeatherFile,
+)
+from .profiling import profile_dir
 
 
 @admin.register(SimulationRun)
@@ -8,10 +15,90 @@ class SimulationRunAdmin(admin.ModelAdmin):
     list_display = (
         'simulation_id',
         'message',
+        'status',
         'total_energy',
         'used_mock_data',
+        'artifacts',
         'created_at',
     )
-    list_filter = ('used_mock_data', 'created_at')
-    search_fields = ('simulation_id', 'message', 'idf_file')
+    list_filter = ('status', 'used_mock_data', 'building_type', 'artifacts', 'created_at')
+    search_fields = ('simulation_id', 'message', 'idf_file', 'variant_name', 'worker_id')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'profile')
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/profile/<str:name>',
+                self.admin_site.admin_view(self.profile_file),
+                name='energyplus_api_simulationrun_profile',
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description='Profile')
+    def profile(self, run):
+        """Links to the profile captured with ``X-Profile`` (see profiling.py)."""
+        directory = profile_dir(run.simulation_id)
+        names = sorted(p.name for p in directory.iterdir()) if directory.is_dir() else []
+        if not names:
+            return '-'
+        return format_html_join(
+            mark_safe('<br>'), '<a href="{}">{}</a>',
+            ((reverse('admin:energyplus_api_simulationrun_profile', args=[run.pk, name]), name) for name in names),
+        )
+
+    def profile_file(self, request, object_id, name):
+        run = self.get_object(request, object_id)
+        if run is None or not self.has_view_permission(request, run):
+            raise Http404
+        file = profile_dir(run.simulation_id) / name
+        if '/' in name or '\\' in name or name.startswith('.') or not file.is_file():
+            raise Http404
+        if file.suffix == '.txt':
+            return FileResponse(open(file, 'rb'), content_type='text/plain; charset=utf-8')
+        return FileResponse(open(file, 'rb'), as_attachment=True, filename=f"{run.simulation_id}-{name}")
+
+
+@admin.register(SimulationCacheEntry)
+class SimulationCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('cache_key', 'simulation_id', 'hits', 'created_at', 'last_hit_at')
+    search_fields = ('cache_key', 'simulation_id')
     readonly_fields = ('created_at',)
+
+
+@admin.register(SimulationBatch)
+class SimulationBatchAdmin(admin.ModelAdmin):
+    list_display = ('batch_id', 'base_idf', 'total_variants', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('batch_id', 'message', 'base_idf')
+    readonly_fields = ('created_at', 'finished_at')
+
+
+@admin.register(SimulationSummary)
+class SimulationSummaryAdmin(admin.ModelAdmin):
+    list_display = ('dimension', 'key', 'used_mock_data', 'runs', 'total_energy_sum', 'updated_at')
+    list_filter = ('dimension', 'used_mock_data')
+    search_fields = ('key',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(SimulationWorker)
+class SimulationWorkerAdmin(admin.ModelAdmin):
+    list_display = ('worker_id', 'hostname', 'slots', 'started_at', 'last_seen_at')
+    search_fields = ('worker_id', 'hostname')
+    readonly_fields = ('started_at',)
+
+
+@admin.register(WeatherFile)
+class WeatherFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city', 'state', 'country', 'wmo', 'hours', 'created_at')
+    list_filter = ('country',)
+    search_fields = ('name', 'city', 'state', 'country', 'wmo', 'sha256')
+    # Entries are added through POST /api/weather, which parses the EPW
+    exclude = ('content',)
+    readonly_fields = ('sha256', 'size', 'hours', 'summary', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('content')
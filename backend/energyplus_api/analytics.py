@@ -0,0 +1,328 @@
+"""
+Aggregate analytics over completed simulation runs.
+
+Every completed run is added once to the running totals of its groups:
+one ``SimulationSummary`` row per IDF file, building type and day (split
+by ``used_mock_data``) holding the run count, the sum, minimum and maximum
+of ``total_energy`` and the sum of each end use, plus a
+``SimulationSummaryBucket`` row counting it in a histogram of
+``total_energy``. Each update is a single ``UPDATE ... SET x = x + ...``,
+so concurrent workers never overwrite each other's totals.
+
+Reading analytics touches the summary rows of one dimension only, however
+many runs the history holds. Percentiles come from the histogram, whose
+buckets are ``BUCKET_RATIO`` wide on a log scale, so they are within
+about 2.5% of the exact value. ``rebuild()`` recomputes everything from
+``SimulationRun`` with database aggregation.
+"""
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Max, Min, Sum, Value, When
+from django.db.models.functions import Floor, Greatest, Least, Ln, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .end_uses import END_USE_CATEGORIES
+from .models import SimulationRun, SimulationSummary, SimulationSummaryBucket
+
+BUCKET_RATIO = 1.05
+LOG_RATIO = math.log(BUCKET_RATIO)
+# Bucket of zero or negative totals, which have no logarithm
+NONPOSITIVE_BUCKET = -(2 ** 31)
+
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+GROUP_BY = ('idf_file', 'building_type', 'day', 'week', 'month')
+TIME_GROUPS = ('day', 'week', 'month')
+UNKNOWN_BUILDING_TYPE = 'unknown'
+MAX_GROUPS = 1000
+
+TRUE_VALUES = {'1', 'true', 'yes'}
+FALSE_VALUES = {'0', 'false', 'no'}
+
+
+def bucket_of(value: float) -> int:
+    if value <= 0:
+        return NONPOSITIVE_BUCKET
+    return math.floor(math.log(value) / LOG_RATIO)
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative value of a bucket: its geometric midpoint."""
+    if bucket == NONPOSITIVE_BUCKET:
+        return 0.0
+    return BUCKET_RATIO ** (bucket + 0.5)
+
+
+def _groups(run: SimulationRun) -> List[Tuple[str, str]]:
+    return [
+        (SimulationSummary.Dimension.IDF_FILE, run.idf_file),
+        (SimulationSummary.Dimension.BUILDING_TYPE, run.building_type or UNKNOWN_BUILDING_TYPE),
+        (SimulationSummary.Dimension.DAY, timezone.localdate(run.created_at).isoformat()),
+    ]
+
+
+def record(run: SimulationRun) -> bool:
+    """Add a completed run to its summaries; False if it isn't completed or is already counted."""
+    if run.status != SimulationRun.Status.COMPLETED or run.total_energy is None:
+        return False
+    value = run.total_energy
+    with transaction.atomic():
+        if not SimulationRun.objects.filter(pk=run.pk, in_summary=False).update(in_summary=True):
+            return False
+        for dimension, key in _groups(run):
+            summary, _ = SimulationSummary.objects.get_or_create(
+                dimension=dimension, key=key, used_mock_data=run.used_mock_data
+            )
+            # Every expression sees the row as it was, so runs=0 means "first run"
+            SimulationSummary.objects.filter(pk=summary.pk).update(
+                runs=F('runs') + 1,
+                total_energy_sum=F('total_energy_sum') + value,
+                total_energy_min=Case(
+                    When(runs=0, then=Value(value)),
+                    default=Least('total_energy_min', Value(value)),
+                    output_field=FloatField(),
+                ),
+                total_energy_max=Case(
+                    When(runs=0, then=Value(value)),
+                    default=Greatest('total_energy_max', Value(value)),
+                    output_field=FloatField(),
+                ),
+                updated_at=timezone.now(),
+                **{
+                    f"{category}_energy_sum": F(f"{category}_energy_sum") + (getattr(run, f"{category}_energy") or 0)
+                    for category in END_USE_CATEGORIES
+                },
+            )
+            bucket, _ = SimulationSummaryBucket.objects.get_or_create(summary=summary, bucket=bucket_of(value))
+            SimulationSummaryBucket.objects.filter(pk=bucket.pk).update(runs=F('runs') + 1)
+    run.in_summary = True
+    return True
+
+
+def rebuild(apps=None) -> int:
+    """Recompute every summary from the completed runs; returns how many were counted.
+
+    ``apps`` is the app registry of a data migration; the current models
+    are used without it.
+    """
+    get_model = (apps or django_apps).get_model
+    Run = get_model('energyplus_api', 'SimulationRun')
+    Summary = get_model('energyplus_api', 'SimulationSummary')
+    Bucket = get_model('energyplus_api', 'SimulationSummaryBucket')
+
+    completed = Run.objects.filter(status='completed', total_energy__isnull=False)
+    positive = completed.filter(total_energy__gt=0).annotate(
+        bucket=Floor(Ln('total_energy') / Value(LOG_RATIO), output_field=FloatField())
+    )
+    nonpositive = completed.filter(total_energy__lte=0).annotate(
+        bucket=Value(NONPOSITIVE_BUCKET, output_field=FloatField())
+    )
+    totals = dict(
+        runs=Count('pk'),
+        total_energy_sum=Sum('total_energy'),
+        total_energy_min=Min('total_energy'),
+        total_energy_max=Max('total_energy'),
+        **{f"{c}_energy_sum": Sum(f"{c}_energy") for c in END_USE_CATEGORIES},
+    )
+    now = timezone.now()
+
+    with transaction.atomic():
+        Summary.objects.all().delete()
+        Run.objects.filter(in_summary=True).update(in_summary=False)
+        for dimension, expression in (
+            ('idf_file', F('idf_file')),
+            ('building_type', F('building_type')),
+            ('day', TruncDate('created_at')),
+        ):
+            summaries = {}
+            for row in completed.annotate(group=expression).values('group', 'used_mock_data').annotate(**totals):
+                key = _group_key(dimension, row.pop('group'))
+                sums = {name: row[name] or 0 for name in row if name.endswith('_sum')}
+                summaries[(key, row['used_mock_data'])] = Summary.objects.create(
+                    dimension=dimension,
+                    key=key,
+                    used_mock_data=row['used_mock_data'],
+                    runs=row['runs'],
+                    total_energy_min=row['total_energy_min'],
+                    total_energy_max=row['total_energy_max'],
+                    updated_at=now,
+                    **sums,
+                )
+            buckets = []
+            for runs in (positive, nonpositive):
+                for row in runs.annotate(group=expression).values('group', 'used_mock_data', 'bucket').annotate(
+                    count=Count('pk')
+                ):
+                    summary = summaries[(_group_key(dimension, row['group']), row['used_mock_data'])]
+                    buckets.append(Bucket(summary=summary, bucket=int(row['bucket']), runs=row['count']))
+            Bucket.objects.bulk_create(buckets)
+        return completed.update(in_summary=True)
+
+
+def _group_key(dimension: str, value) -> str:
+    if dimension == 'day':
+        return value.isoformat()
+    if dimension == 'building_type':
+        return value or UNKNOWN_BUILDING_TYPE
+    return value
+
+
+def _time_label(day: str, group_by: str) -> str:
+    if group_by == 'month':
+        return day[:7]
+    if group_by == 'week':
+        moment = date.fromisoformat(day)
+        return (moment - timedelta(days=moment.weekday())).isoformat()
+    return day
+
+
+def percentile(buckets: Dict[int, int], runs: int, q: float,
+               minimum: Optional[float], maximum: Optional[float]) -> Optional[float]:
+    """Estimate the q-th percentile of a histogram, clamped to the exact extremes."""
+    if not runs:
+        return None
+    rank = q / 100 * runs
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= rank:
+            value = bucket_value(bucket)
+            if minimum is not None:
+                value = max(value, minimum)
+            if maximum is not None:
+                value = min(value, maximum)
+            return round(value, 2)
+    return maximum
+
+
+class _Group:
+    def __init__(self, key: str):
+        self.key = key
+        self.runs = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.end_uses = dict.fromkeys(END_USE_CATEGORIES, 0.0)
+        self.buckets: Dict[int, int] = defaultdict(int)
+
+    def add(self, row: dict, buckets: Dict[int, int]) -> None:
+        self.runs += row['runs']
+        self.total += row['total_energy_sum']
+        if row['total_energy_min'] is not None:
+            self.minimum = row['total_energy_min'] if self.minimum is None else min(self.minimum, row['total_energy_min'])
+        if row['total_energy_max'] is not None:
+            self.maximum = row['total_energy_max'] if self.maximum is None else max(self.maximum, row['total_energy_max'])
+        for category in END_USE_CATEGORIES:
+            self.end_uses[category] += row[f"{category}_energy_sum"]
+        for bucket, runs in buckets.items():
+            self.buckets[bucket] += runs
+
+    def as_dict(self, percentiles) -> dict:
+        runs = self.runs or 1
+        total_energy = {
+            "mean": round(self.total / runs, 2),
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+        for q in percentiles:
+            total_energy[f"p{q:g}"] = percentile(self.buckets, self.runs, q, self.minimum, self.maximum)
+        end_use_total = sum(self.end_uses.values())
+        return {
+            "key": self.key,
+            "runs": self.runs,
+            "total_energy": total_energy,
+            "end_uses": {
+                category: {
+                    "mean": round(value / runs, 2),
+                    "share": round(value / end_use_total, 4) if end_use_total else None,
+                }
+                for category, value in self.end_uses.items()
+            },
+        }
+
+
+def _parse_bool(name: str, value: str) -> bool:
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"'{name}' must be true or false")
+
+
+def _parse_day(name: str, value: str) -> str:
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f"'{name}' must be an ISO date")
+    return day.isoformat()
+
+
+def _parse_percentiles(value: Optional[str]) -> Tuple[float, ...]:
+    if not value:
+        return DEFAULT_PERCENTILES
+    try:
+        percentiles = tuple(float(q) for q in value.split(',') if q.strip())
+    except ValueError:
+        percentiles = ()
+    if not percentiles or any(not 0 <= q <= 100 for q in percentiles):
+        raise ValueError("'percentiles' must be numbers between 0 and 100")
+    return percentiles
+
+
+def analytics_page(params) -> dict:
+    """Aggregates of completed runs grouped as the query parameters ask.
+
+    Supported parameters: ``group_by`` (``idf_file``, ``building_type``,
+    ``day``, ``week`` or ``month``), ``used_mock_data``, ``percentiles``
+    (e.g. ``50,90,99``) and, for time groupings, ``created_after`` and
+    ``created_before`` (ISO dates). Raises ValueError for invalid values.
+    """
+    group_by = params.get('group_by', 'idf_file')
+    if group_by not in GROUP_BY:
+        raise ValueError(f"'group_by' must be one of {', '.join(GROUP_BY)}")
+    percentiles = _parse_percentiles(params.get('percentiles'))
+    dimension = 'day' if group_by in TIME_GROUPS else group_by
+
+    summaries = SimulationSummary.objects.filter(dimension=dimension)
+    if params.get('used_mock_data') not in (None, ''):
+        summaries = summaries.filter(used_mock_data=_parse_bool('used_mock_data', params['used_mock_data']))
+    if group_by in TIME_GROUPS:
+        if params.get('created_after'):
+            summaries = summaries.filter(key__gte=_parse_day('created_after', params['created_after']))
+        if params.get('created_before'):
+            summaries = summaries.filter(key__lte=_parse_day('created_before', params['created_before']))
+
+    rows = list(summaries.values(
+        'pk', 'key', 'runs', 'total_energy_sum', 'total_energy_min', 'total_energy_max',
+        *(f"{c}_energy_sum" for c in END_USE_CATEGORIES),
+    ))
+    buckets: Dict[int, Dict[int, int]] = defaultdict(dict)
+    for summary_id, bucket, runs in SimulationSummaryBucket.objects.filter(
+        summary__in=[row['pk'] for row in rows]
+    ).values_list('summary_id', 'bucket', 'runs'):
+        buckets[summary_id][bucket] = runs
+
+    groups: Dict[str, _Group] = {}
+    overall = _Group('all')
+    for row in rows:
+        label = _time_label(row['key'], group_by) if group_by in TIME_GROUPS else row['key']
+        groups.setdefault(label, _Group(label)).add(row, buckets[row['pk']])
+        overall.add(row, buckets[row['pk']])
+
+    if group_by in TIME_GROUPS:
+        ordered = sorted(groups.values(), key=lambda g: g.key)
+    else:
+        ordered = sorted(groups.values(), key=lambda g: (-g.runs, g.key))
+    return {
+        "group_by": group_by,
+        "overall": overall.as_dict(percentiles),
+        "groups": [group.as_dict(percentiles) for group in ordered[:MAX_GROUPS]],
+    }
@@ -0,0 +1,180 @@
+"""
+Micro-benchmarks of the simulation pipeline's hot paths.
+
+Each benchmark times one operation on synthetic data (see ``synthetic``):
+picking an IDF from a large inputs directory, extracting results from
+EnergyPlus-shaped CSV / HTML / SQL output, inserting and paging through the
+run history at increasing table sizes, EnergyPlus discovery and JSON
+serialization. ``python manage.py benchmark`` runs them offline and compares
+the best time of each against a stored baseline.
+"""
+import gc
+import json
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.test.utils import override_settings
+
+from . import csv_output, html_output, sql_output, synthetic, timeseries
+from .catalog import IDFCatalog
+from .discovery import discover_installations
+from .history import encode_cursor, history_page
+from .models import SimulationRun
+from .services import EnergyPlusService
+
+# Slowdowns smaller than this (seconds) are noise, whatever the ratio.
+MIN_REGRESSION_SECONDS = 0.001
+INSERT_BATCH = 10000
+
+
+@dataclass
+class Benchmark:
+    """One timed operation; ``setup`` runs untimed before the first repetition."""
+
+    name: str
+    func: Callable[[], object]
+    repeat: int = 5
+    setup: Optional[Callable[[], object]] = None
+
+
+@dataclass
+class Measurement:
+    name: str
+    best: float
+    median: float
+    repeat: int
+
+
+def measure(benchmark: Benchmark) -> Measurement:
+    """Run a benchmark ``repeat`` times; GC is paused while timing."""
+    if benchmark.setup is not None:
+        benchmark.setup()
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(benchmark.repeat):
+            start = time.perf_counter()
+            benchmark.func()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return Measurement(benchmark.name, min(times), statistics.median(times), benchmark.repeat)
+
+
+def selection_benchmarks(work_dir: Path, idf_count: int) -> List[Benchmark]:
+    """Choosing a model for a chat message over a large inputs directory."""
+    idf_dir = work_dir / 'inputs'
+    synthetic.write_idf_library(idf_dir, idf_count)
+
+    def select_idf():
+        with override_settings(ENERGYPLUS_IDF_DIR=idf_dir):
+            return EnergyPlusService()._select_idf_by_message("simulate a small hospital with two floors")
+
+    return [
+        Benchmark(f"catalog.scan[{idf_count}]",
+                  lambda: IDFCatalog(idf_dir, refresh_seconds=3600).refresh(force=True), repeat=3),
+        Benchmark(f"services.select_idf_by_message[{idf_count}]", select_idf, repeat=20, setup=select_idf),
+    ]
+
+
+def extraction_benchmarks(work_dir: Path, rows: int, columns: int) -> List[Benchmark]:
+    """Result extraction from EnergyPlus-shaped output files."""
+    csv_dir, sql_dir = work_dir / 'csv', work_dir / 'sql'
+    csv_dir.mkdir(exist_ok=True)
+    sql_dir.mkdir(exist_ok=True)
+    csv_file = synthetic.write_csv(csv_dir / 'eplusout.csv', rows, columns)
+    sql_file = synthetic.write_sql(sql_dir / 'eplusout.sql', rows, columns)
+    html_file = synthetic.write_html(work_dir / 'eplustbl.htm')
+    size = f"{rows}x{columns}"
+    return [
+        Benchmark(f"csv.summarize_end_uses[{size}]", lambda: csv_output.summarize_end_uses([csv_file]), repeat=3),
+        Benchmark(f"sql.summarize_end_uses[{size}]", lambda: sql_output.summarize_end_uses(sql_file)),
+        Benchmark("html.read_summary", lambda: html_output.read_summary(html_file)),
+        Benchmark(f"timeseries.write_store.csv[{size}]", lambda: timeseries.write_store(csv_dir), repeat=3),
+        Benchmark(f"timeseries.write_store.sql[{size}]", lambda: timeseries.write_store(sql_dir), repeat=3),
+    ]
+
+
+def discovery_benchmarks() -> List[Benchmark]:
+    """Finding the EnergyPlus executable: a full scan and a registry lookup."""
+    return [
+        Benchmark("discovery.scan", discover_installations, repeat=3),
+        Benchmark("services.init", EnergyPlusService, repeat=100, setup=EnergyPlusService),
+    ]
+
+
+def serialization_benchmarks() -> List[Benchmark]:
+    payloads = [synthetic.results_payload(seed) for seed in range(100)]
+    return [
+        Benchmark("json.results[100]", lambda: [json.dumps(p, indent=2) for p in payloads], repeat=20),
+    ]
+
+
+def database_benchmarks(sizes: Iterable[int]) -> Iterator[Benchmark]:
+    """History inserts and queries at increasing table sizes.
+
+    Must run against a throwaway database: rows are added up to each size
+    in turn and never removed.
+    """
+    from rest_framework.renderers import JSONRenderer
+
+    inserted = 0
+    batch: List[SimulationRun] = []
+    for size in sorted(sizes):
+        def fill(target=size - INSERT_BATCH):
+            # Grow the table to just below the size, then build the timed batch.
+            nonlocal inserted, batch
+            while inserted < target:
+                count = min(INSERT_BATCH, target - inserted)
+                SimulationRun.objects.bulk_create(synthetic.make_runs(count, seed=inserted), batch_size=2000)
+                inserted += count
+            batch = synthetic.make_runs(INSERT_BATCH, seed=inserted)
+
+        def insert():
+            nonlocal inserted
+            SimulationRun.objects.bulk_create(batch, batch_size=2000)
+            inserted += INSERT_BATCH
+
+        yield Benchmark(f"db.insert_{INSERT_BATCH}[{size}]", insert, repeat=1, setup=fill)
+
+        middle = SimulationRun.objects.order_by('-created_at', '-id').values_list(
+            'created_at', 'pk')[size // 2:size // 2 + 1]
+        cursor = encode_cursor(*middle[0]) if middle else None
+        yield Benchmark(f"db.history_first_page[{size}]", lambda: history_page({'limit': 20}), repeat=10)
+        yield Benchmark(f"db.history_deep_page[{size}]",
+                        lambda c=cursor: history_page({'limit': 20, 'cursor': c}), repeat=10)
+        yield Benchmark(f"db.history_filtered[{size}]",
+                        lambda: history_page({'limit': 20, 'status': 'failed', 'idf_file': 'model_07.idf'}), repeat=10)
+        yield Benchmark(f"db.history_render_100[{size}]",
+                        lambda: JSONRenderer().render(history_page({'limit': 100})), repeat=10)
+
+
+def load_baseline(path: Path) -> Dict[str, float]:
+    try:
+        with open(path) as f:
+            return json.load(f)["benchmarks"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path: Path, measurements: Iterable[Measurement]) -> None:
+    """Merge best times into the baseline file (other benchmarks are kept)."""
+    baseline = load_baseline(path)
+    baseline.update({m.name: round(m.best, 6) for m in measurements})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({"benchmarks": dict(sorted(baseline.items()))}, f, indent=2)
+        f.write('\n')
+
+
+def regressed(measurement: Measurement, baseline: Dict[str, float], tolerance: float) -> bool:
+    """Slower than the baseline by more than ``tolerance`` (a fraction) and the noise floor."""
+    reference = baseline.get(measurement.name)
+    if reference is None:
+        return False
+    return (measurement.best > reference * (1 + tolerance)
+            and measurement.best - reference > MIN_REGRESSION_SECONDS)
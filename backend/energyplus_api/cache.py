@@ -0,0 +1,181 @@
+"""
+Content-addressed cache of EnergyPlus simulation results.
+
+Results are keyed by a SHA-256 of the normalized IDF text, the weather file
+and the EnergyPlus version, so resubmitting an identical model is served from
+the ``SimulationCacheEntry`` index instead of starting a new run. Identical
+submissions that arrive while the first one is still running wait for it
+rather than starting duplicates.
+"""
+import copy
+import hashlib
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import SimulationCacheEntry
+
+
+def normalize_idf(idf_text: str) -> str:
+    """Return a canonical form of an IDF so formatting changes don't miss the cache.
+
+    Comments, blank lines and whitespace around fields are dropped and every
+    object is written on a single line.
+    """
+    lines = []
+    for line in idf_text.splitlines():
+        line = line.split('!', 1)[0].strip()
+        if line:
+            lines.append(line)
+
+    objects = []
+    for obj in ''.join(lines).split(';'):
+        fields = [field.strip() for field in obj.split(',')]
+        if any(fields):
+            objects.append(','.join(fields))
+    return ';\n'.join(objects)
+
+
+def compute_cache_key(idf_text: str, weather_hash: Optional[str] = None,
+                      energyplus_version: Optional[str] = None) -> str:
+    """Hash everything that determines the output of a simulation.
+
+    ``weather_hash`` is the SHA-256 of the EPW (see ``weather``), so the
+    weather file isn't read again for every lookup.
+    """
+    digest = hashlib.sha256()
+    digest.update(normalize_idf(idf_text).encode('utf-8'))
+    digest.update(b'\0weather:')
+    digest.update((weather_hash or '').encode('utf-8'))
+    digest.update(b'\0version:')
+    digest.update((energyplus_version or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _InFlight:
+    """A simulation currently being computed for a cache key."""
+
+    def __init__(self, simulation_id: str):
+        self.simulation_id = simulation_id
+        self.done = threading.Event()
+        self.results: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """Lookup, storage and eviction for cached simulation results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _InFlight] = {}
+
+    @property
+    def max_age(self) -> timedelta:
+        return timedelta(days=settings.ENERGYPLUS_RESULT_CACHE_MAX_AGE_DAYS)
+
+    def lookup(self, cache_key: str) -> Optional[SimulationCacheEntry]:
+        """Return the live cache entry for a key and record the hit."""
+        entry = SimulationCacheEntry.objects.filter(
+            cache_key=cache_key,
+            created_at__gte=timezone.now() - self.max_age,
+        ).first()
+        if entry is not None:
+            SimulationCacheEntry.objects.filter(pk=entry.pk).update(
+                hits=F('hits') + 1, last_hit_at=timezone.now()
+            )
+        return entry
+
+    def get(self, cache_key: str, simulation_id: str, idf_name: str) -> Optional[dict]:
+        """Return cached results relabelled for a new simulation, if any."""
+        entry = self.lookup(cache_key)
+        metrics.CACHE_LOOKUPS.inc(result='miss' if entry is None else 'hit')
+        if entry is None:
+            return None
+        return _relabel(entry.results, simulation_id, idf_name, entry.simulation_id)
+
+    def store(self, cache_key: str, simulation_id: str, results: dict) -> None:
+        """Index the results of a completed run and enforce the cache limits."""
+        try:
+            SimulationCacheEntry.objects.update_or_create(
+                cache_key=cache_key,
+                defaults={
+                    "simulation_id": simulation_id,
+                    "results": results,
+                    "created_at": timezone.now(),
+                    "last_hit_at": timezone.now(),
+                },
+            )
+        except IntegrityError:
+            # Another process stored the same key first.
+            pass
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently hit ones over the size cap."""
+        deleted, _ = SimulationCacheEntry.objects.filter(
+            created_at__lt=timezone.now() - self.max_age
+        ).delete()
+
+        max_entries = settings.ENERGYPLUS_RESULT_CACHE_MAX_ENTRIES
+        overflow = SimulationCacheEntry.objects.count() - max_entries
+        if overflow > 0:
+            stale = SimulationCacheEntry.objects.order_by('last_hit_at').values_list('pk', flat=True)[:overflow]
+            extra, _ = SimulationCacheEntry.objects.filter(pk__in=list(stale)).delete()
+            deleted += extra
+        return deleted
+
+    def get_or_run(self, cache_key: str, simulation_id: str, idf_name: str,
+                   run: Callable[[], dict]) -> dict:
+        """Serve cached results for a key, or run the simulation exactly once.
+
+        Concurrent callers with the same key wait on the in-flight run and
+        receive a copy of its results relabelled with their own simulation ID.
+        """
+        cached = self.get(cache_key, simulation_id, idf_name)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[cache_key] = _InFlight(simulation_id)
+
+        if not leader:
+            metrics.CACHE_LOOKUPS.inc(result='coalesced')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _relabel(flight.results, simulation_id, idf_name, flight.simulation_id)
+
+        try:
+            results = run()
+            flight.results = results
+            # Mock fallbacks are random and cheap, so they are never cached.
+            if not results.get("used_mock_data"):
+                self.store(cache_key, simulation_id, results)
+            return results
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            flight.done.set()
+
+
+def _relabel(results: dict, simulation_id: str, idf_name: str, source_id: str) -> dict:
+    results = copy.deepcopy(results)
+    results.update({"simulation_id": simulation_id, "idf_file": idf_name})
+    results["additional_info"] = dict(results.get("additional_info") or {})
+    results["additional_info"]["cached_from"] = source_id
+    return results
+
+
+result_cache = ResultCache()
@@ -0,0 +1,288 @@
+"""
+In-memory catalog of the IDF models in the inputs directory.
+
+Choosing a model for a chat message used to glob the inputs directory on
+every request. The catalog scans it once, keeps each model's metadata
+(building type, zones, floor area) and indexes the words describing it
+(file name, ``Building`` object name, header comments, building-type
+synonyms) in an inverted index. Selecting a model tokenizes the message and
+looks the tokens up in memory, so its cost depends on the message, not on
+the number of files.
+
+The directory is re-checked at most every ``ENERGYPLUS_CATALOG_REFRESH_SECONDS``,
+on the request thread of the first lookup after that interval: it stats the
+directory and every catalogued file (one ``stat`` per model, no reads). A
+changed directory mtime (files added, removed or renamed) or a changed mtime
+of a catalogued file (edited in place) triggers a rescan, which only
+re-parses files whose own mtime changed.
+"""
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .idf import IDFModel
+
+# Building types and the words or phrases that mean them.
+BUILDING_TYPES = {
+    'office': ['office', 'offices', 'commercial office', 'office building', 'workplace'],
+    'residential': ['residential', 'house', 'home', 'apartment', 'apartments', 'dwelling', 'multifamily'],
+    'retail': ['retail', 'store', 'shop', 'mall', 'supermarket'],
+    'school': ['school', 'education', 'university', 'college', 'classroom'],
+    'hospital': ['hospital', 'healthcare', 'medical', 'clinic'],
+    'hotel': ['hotel', 'hospitality', 'motel'],
+    'warehouse': ['warehouse', 'storage', 'logistics'],
+    'restaurant': ['restaurant', 'dining', 'cafe'],
+}
+
+# Phrase (tuple of tokens) -> building type
+SYNONYMS: Dict[Tuple[str, ...], str] = {
+    tuple(phrase.split()): building_type
+    for building_type, phrases in BUILDING_TYPES.items()
+    for phrase in phrases
+}
+MAX_PHRASE = max(len(phrase) for phrase in SYNONYMS)
+
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'for', 'of', 'with', 'in', 'on', 'to', 'my', 'me',
+    'run', 'simulate', 'simulation', 'model', 'idf', 'energy', 'please', 'building',
+}
+
+# Weight of a token by where it was found in a model's description.
+WEIGHTS = {'type': 4.0, 'name': 2.0, 'building': 1.0, 'header': 0.5}
+
+HEADER_BYTES = 8192
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens, splitting ``SmallOffice`` style names too."""
+    return TOKEN_RE.findall(CAMEL_RE.sub(' ', text).lower())
+
+
+def building_types_in(tokens: List[str]) -> List[str]:
+    """Building types mentioned by a token sequence, in order of appearance."""
+    found = []
+    for i in range(len(tokens)):
+        for size in range(MAX_PHRASE, 0, -1):
+            building_type = SYNONYMS.get(tuple(tokens[i:i + size]))
+            if building_type and building_type not in found:
+                found.append(building_type)
+                break
+    return found
+
+
+@dataclass
+class CatalogEntry:
+    """Metadata of one IDF in the inputs directory."""
+
+    name: str
+    mtime_ns: int
+    building_type: Optional[str] = None
+    building_name: Optional[str] = None
+    zones: int = 0
+    floor_area: Optional[float] = None
+    keywords: Dict[str, float] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "building_type": self.building_type,
+            "building_name": self.building_name,
+            "zones": self.zones,
+            "floor_area": self.floor_area,
+        }
+
+
+def describe(path: Path, mtime_ns: int) -> CatalogEntry:
+    """Read an IDF and build its catalog entry."""
+    with open(path, 'r', errors='replace') as f:
+        text = f.read()
+    model = IDFModel.parse(text)
+    building = model.first('Building')
+    entry = CatalogEntry(
+        name=path.name,
+        mtime_ns=mtime_ns,
+        building_name=building.name if building else None,
+        zones=len(model.get('Zone')),
+        floor_area=model.floor_area,
+    )
+
+    # Leading comment lines usually describe the model.
+    header = []
+    for line in text[:HEADER_BYTES].splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith('!'):
+            break
+        header.append(stripped.lstrip('!'))
+
+    sources = [
+        ('name', tokenize(path.stem)),
+        ('building', tokenize(entry.building_name or '')),
+        ('header', tokenize(' '.join(header))),
+    ]
+    for source, tokens in sources:
+        if entry.building_type is None:
+            types = building_types_in(tokens)
+            entry.building_type = types[0] if types else None
+        for token in tokens:
+            if token not in STOPWORDS:
+                entry.keywords[token] = max(entry.keywords.get(token, 0.0), WEIGHTS[source])
+    if entry.building_type:
+        entry.keywords['type:' + entry.building_type] = WEIGHTS['type']
+    return entry
+
+
+class IDFCatalog:
+    """Metadata and keyword index of the IDFs in one directory."""
+
+    def __init__(self, idf_dir: Path, refresh_seconds: float):
+        self.idf_dir = Path(idf_dir)
+        self.refresh_seconds = refresh_seconds
+        # (entries by file name, token -> {file name: weight}), replaced as a whole
+        self._snapshot: Tuple[Dict[str, CatalogEntry], Dict[str, Dict[str, float]]] = ({}, {})
+        self._dir_mtime: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self) -> Dict[str, CatalogEntry]:
+        self.refresh()
+        return self._snapshot[0]
+
+    def refresh(self, force: bool = False) -> None:
+        """Rescan the directory if it changed (checked at most every refresh_seconds)."""
+        now = time.monotonic()
+        if not force and self._fresh(now):
+            return
+        with self._lock:
+            if not force and self._fresh(now):
+                return
+            self._checked_at = now
+            try:
+                dir_mtime = os.stat(self.idf_dir).st_mtime_ns
+            except FileNotFoundError:
+                dir_mtime = None
+            if not force and dir_mtime == self._dir_mtime and not self._files_changed():
+                return
+            self._rescan()
+            self._dir_mtime = dir_mtime
+
+    def _files_changed(self) -> bool:
+        """Whether a catalogued file was edited in place (which leaves the directory mtime alone)."""
+        for name, entry in self._snapshot[0].items():
+            try:
+                if os.stat(self.idf_dir / name).st_mtime_ns != entry.mtime_ns:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def _fresh(self, now: float) -> bool:
+        return self._checked_at is not None and now - self._checked_at < self.refresh_seconds
+
+    def _rescan(self) -> None:
+        previous = self._snapshot[0]
+        entries = {}
+        try:
+            scanned = list(os.scandir(self.idf_dir))
+        except FileNotFoundError:
+            scanned = []
+        for item in scanned:
+            # Per-run uploads aren't models to choose from.
+            if not item.name.lower().endswith('.idf') or item.name.startswith('custom_') or not item.is_file():
+                continue
+            mtime_ns = item.stat().st_mtime_ns
+            entry = previous.get(item.name)
+            if entry is None or entry.mtime_ns != mtime_ns:
+                try:
+                    entry = describe(Path(item.path), mtime_ns)
+                except OSError:
+                    continue
+            entries[item.name] = entry
+
+        index: Dict[str, Dict[str, float]] = {}
+        for entry in entries.values():
+            for token, weight in entry.keywords.items():
+                index.setdefault(token, {})[entry.name] = weight
+        # Swap in one complete snapshot so readers never see a partial index.
+        self._snapshot = (entries, index)
+
+    @staticmethod
+    def _postings(index: Dict[str, Dict[str, float]], token: str) -> Dict[str, float]:
+        postings = index.get(token)
+        if postings is None and token.endswith('s'):
+            postings = index.get(token[:-1])
+        return postings or {}
+
+    def search(self, message: str) -> List[Tuple[str, float]]:
+        """Rank catalog entries for a message, best first."""
+        self.refresh()
+        entries, index = self._snapshot
+        tokens = tokenize(message)
+        scores: Dict[str, float] = {}
+        for building_type in building_types_in(tokens):
+            for name, weight in self._postings(index, 'type:' + building_type).items():
+                scores[name] = scores.get(name, 0.0) + weight
+        for token in set(tokens) - STOPWORDS:
+            for name, weight in self._postings(index, token).items():
+                scores[name] = scores.get(name, 0.0) + weight
+
+        # Ties go to the model named after the type (office.idf), then the shortest name.
+        def rank(item: Tuple[str, float]):
+            name, score = item
+            entry = entries[name]
+            exact = entry.building_type is not None and Path(name).stem.lower() == entry.building_type
+            return (-score, not exact, len(name), name)
+
+        return sorted(scores.items(), key=rank)
+
+    def select(self, message: str) -> Optional[str]:
+        """Best model for a message, then ``default.idf``, then any model."""
+        ranked = self.search(message)
+        if ranked:
+            return ranked[0][0]
+        entries = self._snapshot[0]
+        if 'default.idf' in entries:
+            return 'default.idf'
+        return min(entries) if entries else None
+
+
+def building_type_of(idf_file: Path, message: str = '') -> str:
+    """Building type of the model a run uses, for grouping runs in analytics.
+
+    Models in the catalog use their entry; other files (uploads, batch
+    variants) are read. If the model doesn't say, the request message may.
+    """
+    entry = None
+    if idf_file.parent == Path(settings.ENERGYPLUS_IDF_DIR):
+        entry = get_catalog().entries.get(idf_file.name)
+    if entry is None and idf_file.exists():
+        entry = describe(idf_file, 0)
+    if entry is not None and entry.building_type:
+        return entry.building_type
+    types = building_types_in(tokenize(message))
+    return types[0] if types else ''
+
+
+_catalogs: Dict[str, IDFCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(idf_dir: Optional[Path] = None) -> IDFCatalog:
+    """Return the process-wide catalog of an inputs directory."""
+    idf_dir = Path(idf_dir or settings.ENERGYPLUS_IDF_DIR)
+    key = str(idf_dir)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(key)
+            if catalog is None:
+                catalog = _catalogs[key] = IDFCatalog(idf_dir, settings.ENERGYPLUS_CATALOG_REFRESH_SECONDS)
+    return catalog
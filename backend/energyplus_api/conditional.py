@@ -0,0 +1,74 @@
+"""
+Validators for conditional GETs of the read endpoints.
+
+Pollers send back the ``ETag`` of their previous response as
+``If-None-Match`` and get an empty 304 while nothing changed, which skips
+building and serializing the payload. The ETag comes from
+``SimulationRun.updated_at``: the run's own for the per-simulation
+endpoints, and for the history the newest one in the table together with
+the row count and highest primary key, so deleted runs change it too. It
+also covers the query string, since the same run yields different bodies
+for different parameters.
+
+There is no ``Last-Modified``: HTTP dates have whole seconds, and a run
+can change several times within one.
+
+Use with ``django.views.decorators.http.condition``; the version is looked
+up once per request.
+"""
+import hashlib
+from typing import Optional
+
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from .models import SimulationRun
+
+# Bump when the payload format of the conditional endpoints changes, so
+# clients don't keep bodies cached under the old format.
+PAYLOAD_VERSION = '1'
+
+
+def _memoized(request, key: str, lookup) -> Optional[str]:
+    cache = request.__dict__.setdefault('_versions', {})
+    if key not in cache:
+        cache[key] = lookup()
+    return cache[key]
+
+
+def run_version(request, simulation_id: str, *args, **kwargs) -> Optional[str]:
+    """When a run last changed, or None if there is no such run."""
+    def lookup():
+        updated_at = SimulationRun.objects.filter(
+            simulation_id=simulation_id
+        ).values_list('updated_at', flat=True).first()
+        return updated_at.isoformat() if updated_at else None
+    return _memoized(request, simulation_id, lookup)
+
+
+def history_version(request, *args, **kwargs) -> Optional[str]:
+    """The newest change, row count and highest primary key of the runs table."""
+    def lookup():
+        state = SimulationRun.objects.aggregate(latest=Max('updated_at'), count=Count('pk'), last=Max('pk'))
+        latest = state['latest'].isoformat() if state['latest'] else ''
+        return f"{latest}|{state['count']}|{state['last']}"
+    return _memoized(request, '', lookup)
+
+
+def _etag(request, version: Optional[str]) -> Optional[str]:
+    if version is None:
+        return None
+    raw = f"{PAYLOAD_VERSION}|{version}|{request.get_full_path()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def run_etag(request, simulation_id: str, *args, **kwargs) -> Optional[str]:
+    return _etag(request, run_version(request, simulation_id))
+
+
+def history_etag(request, *args, **kwargs) -> Optional[str]:
+    return _etag(request, history_version(request))
+
+
+run_condition = condition(etag_func=run_etag)
+history_condition = condition(etag_func=history_etag)
@@ -0,0 +1,292 @@
+"""
+Columnar reader for EnergyPlus time-series CSV output (eplusout.csv, eplusmtr.csv).
+
+The header is parsed once and mapped to end-use categories; data rows are
+then read in fixed-size chunks, keeping only the needed columns, and reduced
+with NumPy. Memory use depends on the chunk size and the number of selected
+columns, never on the length of the run.
+"""
+import csv
+import re
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .end_uses import END_USE_CATEGORIES, ENERGY_UNITS_TO_KWH, FREQUENCY_RANK, meter_category
+
+CHUNK_ROWS = 8192
+
+# Report variables used when a model has no meter for a category. For each
+# category the first pattern that matches any column wins, so zone-level and
+# object-level variants of the same quantity are never added together.
+# Older EnergyPlus versions say "Electric" where newer ones say "Electricity".
+VARIABLE_END_USES = {
+    'lighting': [
+        r'Zone Lights Electric(ity)? Energy',
+        r'Lights Electric(ity)? Energy',
+    ],
+    'equipment': [
+        r'Zone Electric Equipment Electric(ity)? Energy',
+        r'Electric Equipment Electric(ity)? Energy',
+    ],
+    'heating': [
+        r'Heating Coil (Electric(ity)?|NaturalGas|Gas|Propane) Energy',
+        r'Zone Ideal Loads Supply Air Total Heating Energy',
+    ],
+    'cooling': [
+        r'Cooling Coil Electric(ity)? Energy',
+        r'Zone Ideal Loads Supply Air Total Cooling Energy',
+    ],
+    'ventilation': [
+        r'Fan Electric(ity)? Energy',
+    ],
+}
+
+COLUMN_RE = re.compile(r'^\s*(?P<name>.*?)\s*\[(?P<units>[^\]]*)\]\s*(?:\((?P<frequency>[^)]*)\))?\s*$')
+TIME_SERIES_FILE_RE = re.compile(r'(out|mtr|meter)\.csv$', re.IGNORECASE)
+TIMESTAMP_RE = re.compile(
+    r'^\s*(?P<month>\d{1,2})/(?P<day>\d{1,2})(?:\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::\d{2})?)?\s*$'
+)
+
+# Day of the year (0-based) on which each month starts; EnergyPlus output
+# carries no year, so a non-leap year is assumed.
+MONTH_START_DAY = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+
+@dataclass(frozen=True)
+class CSVColumn:
+    """One data column from an EnergyPlus CSV header."""
+
+    index: int
+    header: str
+    key: str
+    variable: str
+    units: str
+    frequency: str
+
+    @property
+    def is_meter(self) -> bool:
+        return not self.key
+
+    @property
+    def to_kwh(self) -> Optional[float]:
+        return ENERGY_UNITS_TO_KWH.get(self.units)
+
+
+def parse_header(header: Sequence[str]) -> List[CSVColumn]:
+    """Split EnergyPlus column headers into key, variable, units and frequency.
+
+    Meter headers look like ``Cooling:Electricity [J](Hourly)``; variable
+    headers like ``CORE_ZN LIGHTS 1:Lights Electricity Energy [J](Hourly)``.
+    """
+    columns = []
+    for index, text in enumerate(header):
+        match = COLUMN_RE.match(text)
+        if not match:
+            # Date/Time and any free-form columns
+            continue
+        name = match.group('name')
+        key, _, variable = name.rpartition(':')
+        # Meter names are made of colon-separated parts without spaces.
+        if key and ' ' not in variable and ' ' not in key:
+            key, variable = '', name
+        columns.append(CSVColumn(
+            index=index,
+            header=text,
+            key=key.strip(),
+            variable=variable.strip(),
+            units=match.group('units').strip(),
+            frequency=(match.group('frequency') or '').strip(),
+        ))
+    return columns
+
+
+def read_header(csv_file: Path) -> List[CSVColumn]:
+    """Read and parse just the header line of an EnergyPlus CSV file."""
+    with open(csv_file, 'r', newline='') as f:
+        header = next(csv.reader(f), [])
+    return parse_header(header)
+
+
+def parse_timestamps(values: Sequence[str]) -> np.ndarray:
+    """Convert EnergyPlus ``Date/Time`` cells to minutes since Jan 1 00:00.
+
+    ``" 01/01  01:00:00"`` marks the end of an interval, so it maps to 60.
+    Daily rows (``"01/01"``) map to the end of the day; cells that aren't a
+    date (monthly and run-period rows) become NaN.
+    """
+    minutes = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        match = TIMESTAMP_RE.match(value)
+        if not match:
+            continue
+        month, day = int(match.group('month')), int(match.group('day'))
+        if not 1 <= month <= 12:
+            continue
+        hour = int(match.group('hour')) if match.group('hour') else 24
+        minute = int(match.group('minute') or 0)
+        minutes[i] = (MONTH_START_DAY[month - 1] + day - 1) * 1440 + hour * 60 + minute
+    return minutes
+
+
+def iter_timestamped_chunks(csv_file: Path, indices: Sequence[int],
+                            chunk_rows: int = CHUNK_ROWS) -> Iterator[tuple]:
+    """Like ``iter_column_chunks`` but yields ``(minutes, block)`` pairs.
+
+    ``minutes`` is parsed from the first (``Date/Time``) column with
+    ``parse_timestamps``.
+    """
+    for times, block in _iter_chunks(csv_file, indices, chunk_rows, with_time=True):
+        yield parse_timestamps(times), block
+
+
+def iter_column_chunks(csv_file: Path, indices: Sequence[int],
+                       chunk_rows: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """Yield ``(rows, len(indices))`` float arrays for the selected columns.
+
+    Blank cells (rows reported at a different frequency) become NaN. Only
+    ``chunk_rows`` lines are held in memory at a time.
+    """
+    for _times, block in _iter_chunks(csv_file, indices, chunk_rows, with_time=False):
+        yield block
+
+
+def _iter_chunks(csv_file: Path, indices: Sequence[int], chunk_rows: int,
+                 with_time: bool) -> Iterator[tuple]:
+    if not indices:
+        return
+    getter = itemgetter(*indices)
+    width = max(indices) + 1
+    single = len(indices) == 1
+
+    with open(csv_file, 'r', newline='') as f:
+        f.readline()  # header
+        while True:
+            lines = list(islice(f, chunk_rows))
+            if not lines:
+                break
+            rows = []
+            times = []
+            for line in lines:
+                # Stop splitting after the last column we need.
+                fields = line.rstrip('\r\n').split(',', width)
+                if len(fields) < width:
+                    fields.extend([''] * (width - len(fields)))
+                rows.append((getter(fields),) if single else getter(fields))
+                if with_time:
+                    times.append(fields[0])
+            block = np.char.strip(np.array(rows, dtype=str))
+            block[block == ''] = 'nan'
+            yield times, block.astype(np.float64)
+
+
+def column_totals(csv_file: Path, indices: Sequence[int],
+                  chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """Sum the selected columns over the whole file, ignoring blank cells."""
+    totals = np.zeros(len(indices))
+    for block in iter_column_chunks(csv_file, indices, chunk_rows):
+        totals += np.nansum(block, axis=0)
+    return totals
+
+
+def last_environment_totals(csv_file: Path, indices: Sequence[int],
+                            chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """Sum the selected columns over the last environment (the run period).
+
+    Sizing periods are reported first and restart the clock, so the sums
+    start over wherever a timestamp goes backwards, the same cut as
+    ``timeseries._last_environment``. Rows without a timestamp (monthly
+    and run-period rows) count towards the environment they follow.
+    """
+    totals = np.zeros(len(indices))
+    previous = -np.inf
+    for minutes, block in iter_timestamped_chunks(csv_file, indices, chunk_rows):
+        dated = np.flatnonzero(~np.isnan(minutes))
+        if len(dated):
+            restarts = np.flatnonzero(np.diff(np.concatenate(([previous], minutes[dated]))) < 0)
+            if len(restarts):
+                totals = np.zeros(len(indices))
+                block = block[dated[restarts[-1]]:]
+            previous = minutes[dated[-1]]
+        totals += np.nansum(block, axis=0)
+    return totals
+
+
+def _select_series(columns_by_file: Dict[Path, List[CSVColumn]]) -> Dict[str, Dict[tuple, tuple]]:
+    """Choose one (file, column) per series for every end-use category."""
+    meters: Dict[str, Dict[tuple, tuple]] = {c: {} for c in END_USE_CATEGORIES}
+    variables: Dict[str, Dict[tuple, tuple]] = {c: {} for c in END_USE_CATEGORIES}
+    patterns = {
+        category: [re.compile(rf'^{p}$', re.IGNORECASE) for p in alternatives]
+        for category, alternatives in VARIABLE_END_USES.items()
+    }
+    variable_rank: Dict[str, int] = {}
+
+    def keep(series: Dict[tuple, tuple], ident: tuple, csv_file: Path, column: CSVColumn) -> None:
+        current = series.get(ident)
+        rank = FREQUENCY_RANK.get(column.frequency.lower(), 9)
+        if current is None or rank < FREQUENCY_RANK.get(current[1].frequency.lower(), 9):
+            series[ident] = (csv_file, column)
+
+    for csv_file, columns in columns_by_file.items():
+        for column in columns:
+            if column.to_kwh is None:
+                continue
+            if column.is_meter:
+                category = meter_category(column.variable)
+                if category:
+                    keep(meters[category], (column.variable.lower(),), csv_file, column)
+                continue
+            for category, alternatives in patterns.items():
+                for rank, pattern in enumerate(alternatives):
+                    if not pattern.match(column.variable):
+                        continue
+                    best = variable_rank.get(category, len(alternatives))
+                    if rank < best:
+                        variable_rank[category] = rank
+                        variables[category] = {}
+                    if rank <= variable_rank[category]:
+                        keep(variables[category], (column.key.lower(), column.variable.lower()), csv_file, column)
+                    break
+
+    return {
+        category: meters[category] or variables[category]
+        for category in END_USE_CATEGORIES
+    }
+
+
+def summarize_end_uses(csv_files: Iterable[Path],
+                       chunk_rows: int = CHUNK_ROWS) -> Optional[Dict[str, float]]:
+    """Return annual kWh per end-use category from EnergyPlus CSV output.
+
+    Meters are used where present, report variables otherwise. Only the
+    last environment is summed, so sizing periods don't count. Returns None
+    when no recognised energy column exists.
+    """
+    columns_by_file = {}
+    for csv_file in csv_files:
+        csv_file = Path(csv_file)
+        if TIME_SERIES_FILE_RE.search(csv_file.name):
+            columns_by_file[csv_file] = read_header(csv_file)
+
+    selected = _select_series(columns_by_file)
+    if not any(selected.values()):
+        return None
+
+    # Group the selected columns by file so each file is read exactly once.
+    wanted: Dict[Path, List[tuple]] = {}
+    for category, series in selected.items():
+        for csv_file, column in series.values():
+            wanted.setdefault(csv_file, []).append((category, column))
+
+    energy_by_type = {category: 0.0 for category in END_USE_CATEGORIES}
+    for csv_file, items in wanted.items():
+        totals = last_environment_totals(csv_file, [column.index for _, column in items], chunk_rows)
+        for (category, column), total in zip(items, totals):
+            energy_by_type[category] += float(total) * column.to_kwh
+
+    return {category: round(value, 2) for category, value in energy_by_type.items()}
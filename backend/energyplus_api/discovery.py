@@ -0,0 +1,201 @@
+"""
+Discovery and registry of installed EnergyPlus versions.
+
+Scanning for EnergyPlus (PATH lookups, install directories, ``--version``
+probes) is far too slow to repeat for every request, so it happens once and
+the result is kept in a process-wide registry. The registry is also written
+to ``ENERGYPLUS_REGISTRY_FILE`` so other processes (web and simulation
+workers) reuse the same scan; ``manage.py energyplus_installs --refresh``
+rescans and every process picks up the new file on its next lookup.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+VERSION_RE = re.compile(r'(\d+)[.-](\d+)(?:[.-](\d+))?')
+
+
+@dataclass(frozen=True)
+class EnergyPlusInstallation:
+    """A single EnergyPlus executable and the version it reports."""
+
+    version: str
+    executable: str
+
+    @property
+    def tag(self) -> str:
+        """Version in EnergyPlus install-directory form, e.g. ``V24-1-0``."""
+        return 'V' + self.version.replace('.', '-')
+
+    @property
+    def sort_key(self) -> tuple:
+        parts = normalize_version(self.version)
+        return tuple(int(p) for p in parts.split('.')) if parts else ()
+
+
+def normalize_version(version: str) -> Optional[str]:
+    """Turn ``24.1``, ``24-1-0`` or ``V24-1-0`` into ``24.1.0``."""
+    match = VERSION_RE.search(version or '')
+    if not match:
+        return None
+    major, minor, patch = match.groups()
+    return f"{int(major)}.{int(minor)}.{int(patch or 0)}"
+
+
+def _candidate_executables() -> List[Path]:
+    """Return every EnergyPlus executable we can find without running anything."""
+    exe_names = ['energyplus.exe', 'EnergyPlus.exe'] if sys.platform == 'win32' else ['energyplus', 'EnergyPlus']
+    candidates = []
+
+    # Check if in PATH
+    for exe in exe_names:
+        found = shutil.which(exe)
+        if found:
+            candidates.append(Path(found))
+
+    # Check environment variable
+    energyplus_home = os.environ.get('ENERGYPLUS_HOME')
+    if energyplus_home:
+        candidates.extend(Path(energyplus_home) / exe for exe in exe_names)
+
+    # Check common installation directories (EnergyPlusV24-1-0, ...)
+    for root in settings.ENERGYPLUS_INSTALL_ROOTS:
+        root = Path(root)
+        if not root.is_dir():
+            continue
+        for install_dir in sorted(root.glob('EnergyPlusV*')):
+            candidates.extend(install_dir / exe for exe in exe_names)
+
+    return [path for path in candidates if path.is_file()]
+
+
+def _probe_version(executable: Path) -> Optional[str]:
+    """Ask an executable for its version, falling back to its install dir name."""
+    try:
+        result = subprocess.run(
+            [str(executable), '--version'],
+            capture_output=True,
+            text=True,
+            timeout=15,
+        )
+        version = normalize_version(result.stdout + result.stderr)
+        if version:
+            return version
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning("Could not probe EnergyPlus version of %s: %s", executable, e)
+    return normalize_version(executable.parent.name)
+
+
+def discover_installations() -> List[EnergyPlusInstallation]:
+    """Scan the system for EnergyPlus, newest version first."""
+    installations: Dict[str, EnergyPlusInstallation] = {}
+    seen = set()
+    for path in _candidate_executables():
+        real_path = os.path.realpath(path)
+        if real_path in seen:
+            continue
+        seen.add(real_path)
+        version = _probe_version(path)
+        if version and version not in installations:
+            installations[version] = EnergyPlusInstallation(version=version, executable=str(path))
+    return sorted(installations.values(), key=lambda i: i.sort_key, reverse=True)
+
+
+class EnergyPlusRegistry:
+    """Memoized view of the installed EnergyPlus versions."""
+
+    def __init__(self, registry_file: Optional[Path]):
+        self.registry_file = Path(registry_file) if registry_file else None
+        self._lock = threading.Lock()
+        self._installations: Optional[List[EnergyPlusInstallation]] = None
+        self._loaded_mtime: Optional[float] = None
+
+    def installations(self) -> List[EnergyPlusInstallation]:
+        """Return known installations, scanning only if nothing is recorded yet."""
+        mtime = self._file_mtime()
+        if self._installations is not None and mtime == self._loaded_mtime:
+            return self._installations
+
+        with self._lock:
+            mtime = self._file_mtime()
+            if self._installations is None or mtime != self._loaded_mtime:
+                if mtime is not None:
+                    self._load()
+                else:
+                    self._scan()
+            return self._installations
+
+    def refresh(self) -> List[EnergyPlusInstallation]:
+        """Rescan the system and publish the result to other processes."""
+        with self._lock:
+            self._scan()
+            return self._installations
+
+    def get(self, version: Optional[str] = None) -> Optional[EnergyPlusInstallation]:
+        """Return the installation for a pinned version, or the newest one."""
+        installations = self.installations()
+        if not version:
+            return installations[0] if installations else None
+        wanted = normalize_version(version)
+        for installation in installations:
+            if installation.version == wanted:
+                return installation
+        return None
+
+    def _file_mtime(self) -> Optional[float]:
+        if self.registry_file is None:
+            return self._loaded_mtime
+        try:
+            return self.registry_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def _load(self) -> None:
+        try:
+            with open(self.registry_file, 'r') as f:
+                data = json.load(f)
+            self._installations = [EnergyPlusInstallation(**item) for item in data["installations"]]
+            self._loaded_mtime = self._file_mtime()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable EnergyPlus registry %s: %s", self.registry_file, e)
+            self._scan()
+
+    def _scan(self) -> None:
+        self._installations = discover_installations()
+        if self.registry_file is None:
+            return
+        try:
+            self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.registry_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({"installations": [asdict(i) for i in self._installations]}, f, indent=2)
+            os.replace(tmp_file, self.registry_file)
+            self._loaded_mtime = self._file_mtime()
+        except OSError as e:
+            logger.warning("Could not write EnergyPlus registry %s: %s", self.registry_file, e)
+
+
+_registry: Optional[EnergyPlusRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> EnergyPlusRegistry:
+    """Return the process-wide EnergyPlus registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = EnergyPlusRegistry(settings.ENERGYPLUS_REGISTRY_FILE)
+    return _registry
@@ -0,0 +1,267 @@
+"""
+Simulation workers that run on other machines.
+
+With ``ENERGYPLUS_EXECUTION = 'distributed'`` the web process only records
+queued runs; ``python manage.py simulation_worker`` processes on any number
+of hosts execute them. A worker needs the shared database and, when it
+doesn't share the simulations directory, the API URL:
+
+- Claiming: a worker takes the queued run with the lowest priority value
+  and holds it under a lease of ``ENERGYPLUS_WORKER_LEASE_SECONDS``. On
+  PostgreSQL (and other backends with ``SKIP LOCKED``) the candidate row is
+  locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers
+  never wait on each other; on SQLite a conditional ``UPDATE`` of a
+  candidate either wins or moves on to the next one.
+- Heartbeats: a thread per worker extends the leases of its running jobs
+  and its ``SimulationWorker`` row every third of the lease.
+- Recovery: a run whose lease has expired belongs to a dead worker and is
+  put back in the queue by the next worker heartbeat, up to
+  ``ENERGYPLUS_WORKER_MAX_ATTEMPTS`` times before it is marked failed.
+- Inputs are fetched from the database by content hash (see ``inputs``),
+  and the run's output files are uploaded to
+  ``PUT /api/worker/runs/<simulation_id>/artifacts/<name>`` before the run
+  is marked finished.
+
+Each claim touches one indexed row and workers share nothing else, so
+throughput grows with the number of worker slots until the database or
+the artifact uploads become the bottleneck.
+"""
+import logging
+import os
+import shutil
+import socket
+import threading
+import urllib.request
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional, Set
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import inputs, scratch
+from .jobs import run_claimed_job
+from .models import SimulationRun, SimulationWorker
+
+logger = logging.getLogger(__name__)
+
+# Queued runs looked at per claim attempt on backends without SKIP LOCKED.
+CLAIM_CANDIDATES = 10
+UPLOAD_TIMEOUT = 300
+
+
+def lease_deadline(lease_seconds: Optional[float] = None):
+    return timezone.now() + timedelta(seconds=lease_seconds or settings.ENERGYPLUS_WORKER_LEASE_SECONDS)
+
+
+def claim(worker_id: str, lease_seconds: Optional[float] = None) -> Optional[SimulationRun]:
+    """Claim the next queued run for ``worker_id``, or None if there is none."""
+    now = timezone.now()
+    claimed = dict(
+        status=SimulationRun.Status.RUNNING,
+        worker_id=worker_id,
+        lease_expires_at=lease_deadline(lease_seconds),
+        started_at=now,
+        updated_at=now,
+        attempts=F('attempts') + 1,
+    )
+    queued = SimulationRun.objects.filter(status=SimulationRun.Status.QUEUED).order_by('priority', 'pk')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pk = queued.select_for_update(skip_locked=True).values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            SimulationRun.objects.filter(pk=pk).update(**claimed)
+        return SimulationRun.objects.get(pk=pk)
+
+    for pk in list(queued.values_list('pk', flat=True)[:CLAIM_CANDIDATES]):
+        if SimulationRun.objects.filter(pk=pk, status=SimulationRun.Status.QUEUED).update(**claimed):
+            return SimulationRun.objects.get(pk=pk)
+    return None
+
+
+def requeue_expired() -> int:
+    """Put runs whose worker stopped renewing its lease back in the queue.
+
+    Runs that already used up ``ENERGYPLUS_WORKER_MAX_ATTEMPTS`` are failed
+    instead, so a model that kills its worker can't take down every node.
+    """
+    now = timezone.now()
+    expired = SimulationRun.objects.filter(status=SimulationRun.Status.RUNNING, lease_expires_at__lt=now)
+    max_attempts = settings.ENERGYPLUS_WORKER_MAX_ATTEMPTS
+    failed = expired.filter(attempts__gte=max_attempts).update(
+        status=SimulationRun.Status.FAILED,
+        error=f"Worker lost {max_attempts} times while running this simulation",
+        lease_expires_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    requeued = expired.update(
+        status=SimulationRun.Status.QUEUED, worker_id='', lease_expires_at=None, started_at=None, updated_at=now
+    )
+    if failed or requeued:
+        logger.warning("Requeued %d and failed %d runs of lost workers", requeued, failed)
+    return requeued
+
+
+class ArtifactClient:
+    """Uploads a run's output files to the API that owns the outputs directory."""
+
+    def __init__(self, api_url: str, token: str, worker_id: str):
+        self.api_url = api_url.rstrip('/')
+        self.token = token
+        self.worker_id = worker_id
+
+    def upload(self, simulation_id: str, path: Path) -> None:
+        with open(path, 'rb') as f:
+            request = urllib.request.Request(
+                f"{self.api_url}/api/worker/runs/{simulation_id}/artifacts/{path.name}",
+                data=f,
+                method='PUT',
+                headers={
+                    'Authorization': f"Bearer {self.token}",
+                    'X-Worker-Id': self.worker_id,
+                    'Content-Type': 'application/octet-stream',
+                    'Content-Length': str(path.stat().st_size),
+                },
+            )
+            with urllib.request.urlopen(request, timeout=UPLOAD_TIMEOUT):
+                pass
+
+    def upload_run(self, run: SimulationRun) -> None:
+        """Upload everything the run left in the local outputs directory, then drop it."""
+        output_path = Path(settings.ENERGYPLUS_OUTPUT_DIR) / run.simulation_id
+        if not output_path.is_dir():
+            return
+        for path in sorted(output_path.iterdir()):
+            if path.is_file():
+                self.upload(run.simulation_id, path)
+        shutil.rmtree(output_path, ignore_errors=True)
+
+
+class Worker:
+    """One worker process: ``slots`` threads claiming and running jobs."""
+
+    def __init__(self, slots: int, api_url: Optional[str] = None, token: str = '',
+                 lease_seconds: Optional[float] = None, poll_seconds: float = 2.0, burst: bool = False):
+        self.slots = max(1, slots)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or settings.ENERGYPLUS_WORKER_LEASE_SECONDS
+        self.poll_seconds = poll_seconds
+        self.burst = burst
+        self.client = ArtifactClient(api_url, token, self.worker_id) if api_url else None
+        self.input_cache = scratch.scratch_root() / 'inputs'
+        self._running: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.processed = 0
+
+    def run(self) -> None:
+        """Work until ``stop()`` is called (or, in burst mode, the queue is empty)."""
+        SimulationWorker.objects.update_or_create(
+            worker_id=self.worker_id,
+            defaults={"hostname": socket.gethostname(), "slots": self.slots, "last_seen_at": timezone.now()},
+        )
+        # Later ones come with the heartbeats.
+        requeue_expired()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._slot_loop, name=f"worker-slot-{i}", daemon=True)
+            for i in range(self.slots)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1.0)
+        finally:
+            self._stop.set()
+            SimulationWorker.objects.filter(worker_id=self.worker_id).delete()
+
+    def stop(self) -> None:
+        """Stop claiming; running jobs finish first."""
+        self._stop.set()
+
+    def _slot_loop(self) -> None:
+        try:
+            while not self._stop.is_set():
+                try:
+                    run = claim(self.worker_id, self.lease_seconds)
+                    if run is None and self.burst and not self._busy():
+                        return
+                except Exception:
+                    # e.g. "database is locked" on SQLite; try again after a pause
+                    logger.exception("Claiming a run failed")
+                    close_old_connections()
+                    run = None
+                if run is None:
+                    self._stop.wait(self.poll_seconds)
+                    continue
+                with self._lock:
+                    self._running.add(run.pk)
+                try:
+                    self._execute(run)
+                except Exception:
+                    logger.exception("Worker crashed running %s", run.simulation_id)
+                finally:
+                    with self._lock:
+                        self._running.discard(run.pk)
+                        self.processed += 1
+                    close_old_connections()
+        finally:
+            close_old_connections()
+
+    def _busy(self) -> bool:
+        with self._lock:
+            mine = bool(self._running)
+        return mine or SimulationRun.objects.filter(
+            status__in=[SimulationRun.Status.QUEUED, SimulationRun.Status.RUNNING]
+        ).exists()
+
+    def _execute(self, run: SimulationRun) -> None:
+        idf_file = inputs.fetch(run, self.input_cache) if run.input_hash else None
+        run_claimed_job(
+            run,
+            idf_file=idf_file,
+            publish=self.client.upload_run if self.client else None,
+            owned=lambda: SimulationRun.objects.filter(
+                pk=run.pk, worker_id=self.worker_id, status=SimulationRun.Status.RUNNING
+            ).exists(),
+        )
+
+    def _heartbeat_loop(self) -> None:
+        interval = self.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                self.heartbeat()
+            except Exception:
+                logger.exception("Heartbeat failed")
+            finally:
+                close_old_connections()
+
+    def heartbeat(self) -> None:
+        """Extend this worker's leases, mark it alive and requeue lost workers' runs."""
+        with self._lock:
+            running = list(self._running)
+        if running:
+            SimulationRun.objects.filter(
+                pk__in=running, worker_id=self.worker_id, status=SimulationRun.Status.RUNNING
+            ).update(lease_expires_at=lease_deadline(self.lease_seconds))
+        SimulationWorker.objects.filter(worker_id=self.worker_id).update(last_seen_at=timezone.now())
+        requeue_expired()
+
+
+def is_artifact_name(name: str) -> bool:
+    """Whether a worker may upload a file of this name into a run's outputs."""
+    if not name or name.startswith('.') or '/' in name or '\\' in name:
+        return False
+    if name == 'results.json':
+        return True
+    base = name[:-3] if name.endswith('.gz') else name
+    return scratch.is_persisted(base)
@@ -0,0 +1,103 @@
+"""
+Downsampling of stored time series for charts.
+
+A year of timestep data is 35,040 points per series, far more than a chart
+can draw. Two reductions are offered, both working on whole NumPy arrays:
+
+- ``aggregate``: calendar buckets (hourly, daily, monthly) reduced by sum,
+  mean or peak.
+- ``lttb``: Largest-Triangle-Three-Buckets, which keeps the points that
+  preserve the visual shape of the line (peaks and dips survive).
+"""
+from typing import Tuple
+
+import numpy as np
+
+from .csv_output import MONTH_START_DAY
+
+RESOLUTIONS = ('hourly', 'daily', 'monthly')
+AGGREGATIONS = ('sum', 'mean', 'peak')
+
+_MONTH_START = np.array(MONTH_START_DAY + (365,))
+
+
+def aggregate(minutes: np.ndarray, values: np.ndarray, resolution: str,
+              how: str = 'sum') -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce a series to one point per hour, day or month.
+
+    Timestamps mark the end of each interval, so 01-01 01:00 belongs to the
+    first hour. Each bucket is labelled with the minute it ends on.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}: use {', '.join(RESOLUTIONS)}")
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation {how!r}: use {', '.join(AGGREGATIONS)}")
+    minutes = np.asarray(minutes, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(minutes):
+        return minutes, values
+
+    # Bucket of each point, from the start of its interval.
+    if resolution == 'hourly':
+        buckets = np.ceil(minutes / 60) - 1
+        ends = lambda b: (b + 1) * 60
+    elif resolution == 'daily':
+        buckets = np.ceil(minutes / 1440) - 1
+        ends = lambda b: (b + 1) * 1440
+    else:
+        day = np.ceil(minutes / 1440) - 1
+        buckets = np.searchsorted(_MONTH_START, day, side='right') - 1
+        ends = lambda b: _MONTH_START[np.minimum(b + 1, 12).astype(int)] * 1440.0
+
+    # The series is sorted in time, so each bucket is one contiguous run.
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if how == 'peak':
+        reduced = np.fmax.reduceat(values, starts)
+    else:
+        valid = ~np.isnan(values)
+        reduced = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        if how == 'mean':
+            counts = np.add.reduceat(valid.astype(np.int64), starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                reduced = reduced / counts
+    return ends(buckets[starts]).astype(np.float64), reduced
+
+
+def lttb(minutes: np.ndarray, values: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets downsampling to at most ``points`` points.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the point kept
+    from the previous bucket and the average of the next one.
+    """
+    minutes = np.asarray(minutes, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(minutes)
+    if points >= n or points < 3:
+        return (minutes, values) if points >= n else (minutes[[0, -1]], values[[0, -1]])
+
+    # Bucket boundaries for the n - 2 interior points.
+    edges = (np.arange(points - 1) * (n - 2) / (points - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    y = np.nan_to_num(values)
+
+    # Averages of every bucket (the "third" point for the previous bucket).
+    sums_x = np.add.reduceat(minutes[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, minutes[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = minutes[a], y[a]
+        # Twice the triangle area; the constant factor doesn't change the argmax.
+        area = np.abs(
+            (ax - avg_x[i + 1]) * (y[lo:hi] - ay) - (ax - minutes[lo:hi]) * (avg_y[i + 1] - ay)
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return minutes[selected], values[selected]
@@ -0,0 +1,86 @@
+"""
+End-use categories and unit conversions shared by the output parsers.
+
+Every extractor (CSV, SQLite, HTML) reduces EnergyPlus output to the same
+five categories in kWh so results look the same whichever file they came
+from.
+"""
+from typing import Optional
+
+END_USE_CATEGORIES = ('cooling', 'heating', 'lighting', 'equipment', 'ventilation')
+
+# Conversion factors from EnergyPlus energy units to kWh. Values in other
+# units (W, C, kg/s, m3, ...) are rates, states or water and are never summed.
+ENERGY_UNITS_TO_KWH = {
+    'J': 1 / 3.6e6,
+    'kJ': 1 / 3.6e3,
+    'MJ': 1 / 3.6,
+    'GJ': 1e3 / 3.6,
+    'Wh': 1e-3,
+    'kWh': 1.0,
+    'MWh': 1e3,
+    'kBtu': 0.29307107,
+    'MBtu': 293.07107,
+    'therm': 29.307107,
+}
+
+# Coarser frequencies have fewer rows, so they are preferred when the same
+# series was reported more than once.
+FREQUENCY_RANK = {
+    'runperiod': 0, 'annual': 1, 'monthly': 2, 'daily': 3,
+    'hourly': 4, 'timestep': 5, 'each call': 6, 'detailed': 6,
+}
+
+# End-use meters (`<EndUse>:<Fuel>`) and the category each one rolls up to.
+METER_END_USES = {
+    'heating': 'heating',
+    'heatingcoils': 'heating',
+    'cooling': 'cooling',
+    'coolingcoils': 'cooling',
+    'heatrejection': 'cooling',
+    'interiorlights': 'lighting',
+    'exteriorlights': 'lighting',
+    'interiorequipment': 'equipment',
+    'exteriorequipment': 'equipment',
+    'refrigeration': 'equipment',
+    'fans': 'ventilation',
+    'heatrecovery': 'ventilation',
+    'humidifier': 'ventilation',
+}
+
+METER_FUELS = {
+    'electricity', 'naturalgas', 'gas', 'propane', 'fueloilno1', 'fueloilno2',
+    'fueloil#1', 'fueloil#2', 'diesel', 'gasoline', 'coal', 'otherfuel1',
+    'otherfuel2', 'districtcooling', 'districtheating', 'districtheatingwater',
+    'districtheatingsteam', 'steam',
+}
+
+# Row names of the "End Uses" table in the tabular reports.
+TABULAR_END_USES = {
+    'heating': 'heating',
+    'cooling': 'cooling',
+    'heat rejection': 'cooling',
+    'interior lighting': 'lighting',
+    'exterior lighting': 'lighting',
+    'interior equipment': 'equipment',
+    'exterior equipment': 'equipment',
+    'refrigeration': 'equipment',
+    'fans': 'ventilation',
+    'heat recovery': 'ventilation',
+    'humidification': 'ventilation',
+}
+
+
+def meter_category(meter_name: str) -> Optional[str]:
+    """Category of an end-use meter such as ``InteriorLights:Electricity``."""
+    parts = meter_name.lower().split(':')
+    # Only `<EndUse>:<Fuel>`; sub-meters would double count their parent.
+    if len(parts) != 2 or parts[1] not in METER_FUELS:
+        return None
+    return METER_END_USES.get(parts[0])
+
+
+def to_kwh(value: float, units: str) -> Optional[float]:
+    """Convert an energy value to kWh, or None if ``units`` isn't energy."""
+    factor = ENERGY_UNITS_TO_KWH.get((units or '').strip())
+    return None if factor is None else value * factor
@@ -0,0 +1,108 @@
+"""
+Stand-in for the EnergyPlus executable, for load tests.
+
+It accepts the command line the service builds (``-d <dir>``,
+``--output-directory``, ``--readvars``, ``--version``), prints the console
+progress lines EnergyPlus prints, waits for a configurable time and writes
+EnergyPlus-shaped ``eplusout.sql`` / ``eplusout.csv`` / ``eplustbl.htm``
+files (see ``synthetic``), so the whole pipeline runs without EnergyPlus.
+
+``python manage.py fake_energyplus --install DIR`` writes a launcher named
+``energyplus`` into DIR; point ``ENERGYPLUS_HOME`` at DIR (or put it on
+``PATH``) and refresh the registry. Behaviour is set through environment
+variables inherited from the server process:
+
+- ``FAKE_ENERGYPLUS_SECONDS``: runtime (default 2)
+- ``FAKE_ENERGYPLUS_JITTER``: +/- fraction of random runtime variation (default 0.2)
+- ``FAKE_ENERGYPLUS_ROWS`` / ``FAKE_ENERGYPLUS_COLUMNS``: output size (default 8760 x 50)
+- ``FAKE_ENERGYPLUS_FAILURE_RATE``: fraction of runs that end in a fatal error (default 0)
+- ``FAKE_ENERGYPLUS_VERSION``: version reported by ``--version`` (default 24.1.0)
+"""
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+MONTHS = ('01/01', '02/01', '03/01', '04/01', '05/01', '06/01',
+          '07/01', '08/01', '09/01', '10/01', '11/01', '12/01')
+
+
+def _env(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _say(line: str) -> None:
+    print(line, flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if '--version' in argv or '-v' in argv:
+        _say(f"EnergyPlus, Version {os.environ.get('FAKE_ENERGYPLUS_VERSION', '24.1.0')}-fake")
+        return 0
+
+    output_dir = Path('.')
+    for flag in ('-d', '--output-directory'):
+        if flag in argv and argv.index(flag) + 1 < len(argv):
+            output_dir = Path(argv[argv.index(flag) + 1])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for flag in ('-w', '--weather'):
+        if flag in argv and argv.index(flag) + 1 < len(argv) and not Path(argv[argv.index(flag) + 1]).is_file():
+            _say(f"ERROR: Could not find weather file: {argv[argv.index(flag) + 1]}")
+            return 1
+
+    seconds = _env('FAKE_ENERGYPLUS_SECONDS', 2.0)
+    jitter = _env('FAKE_ENERGYPLUS_JITTER', 0.2)
+    seconds = max(seconds * (1 + random.uniform(-jitter, jitter)), 0.0)
+    deadline = time.monotonic() + seconds
+    fail = random.random() < _env('FAKE_ENERGYPLUS_FAILURE_RATE', 0.0)
+
+    _say("EnergyPlus Starting")
+    _say("Initializing Simulation")
+    _say("Warming up {1}")
+    # Spread the month-by-month progress over the runtime, failing part way
+    # through when this run is one of the failures.
+    months = MONTHS[:random.randint(1, 11)] if fail else MONTHS
+    for i, month in enumerate(months):
+        verb = "Starting" if i == 0 else "Continuing"
+        _say(f"{verb} Simulation at {month}/2021 for RUN PERIOD 1")
+        time.sleep(max(deadline - time.monotonic(), 0.0) / (len(MONTHS) - i + 1))
+
+    if fail:
+        (output_dir / 'eplusout.err').write_text(
+            "   ** Severe  ** Fake EnergyPlus failure\n   **  Fatal  ** Program terminates\n")
+        _say("EnergyPlus Terminated--Fatal Error Detected. 0 Warning; 1 Severe Errors")
+        return 1
+
+    # Only needed for the output writers, which share code with the benchmarks.
+    backend_dir = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(backend_dir))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    from energyplus_api import synthetic
+
+    rows = int(_env('FAKE_ENERGYPLUS_ROWS', 8760))
+    columns = int(_env('FAKE_ENERGYPLUS_COLUMNS', 50))
+    seed = random.randrange(1 << 30)
+    _say("Writing tabular output file results using HTML format.")
+    synthetic.write_html(output_dir / 'eplustbl.htm', seed=seed)
+    _say("Writing final SQL reports")
+    synthetic.write_sql(output_dir / 'eplusout.sql', rows, columns, seed=seed)
+    if '--readvars' in argv or '-r' in argv:
+        synthetic.write_csv(output_dir / 'eplusout.csv', rows, columns, seed=seed)
+    (output_dir / 'eplusout.err').write_text("Program Version,EnergyPlus (fake)\n   ************* EnergyPlus Completed Successfully.\n")
+    (output_dir / 'eplusout.eso').write_bytes(os.urandom(64 * 1024))
+
+    time.sleep(max(deadline - time.monotonic(), 0.0))
+    _say("EnergyPlus Completed Successfully.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Streaming extractor for the EnergyPlus tabular report (eplustbl.htm).
+
+The report can run to tens of MB, but the results only need the "Site and
+Source Energy" and "End Uses" tables near the top. The file is read in
+chunks, scanned as raw text until the first wanted table title, and only
+from there fed to an event-driven ``HTMLParser``; reading stops as soon as
+every wanted table has been captured.
+"""
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .end_uses import END_USE_CATEGORIES, TABULAR_END_USES, to_kwh
+
+CHUNK_SIZE = 256 * 1024
+
+SITE_AND_SOURCE_ENERGY = 'Site and Source Energy'
+END_USES = 'End Uses'
+
+UNITS_RE = re.compile(r'\[([^\]]*)\]')
+
+# Energy per area to kWh/m2
+EUI_UNITS_TO_KWH_M2 = {
+    'MJ/m2': 1 / 3.6,
+    'kWh/m2': 1.0,
+    'kBtu/ft2': 3.15459,
+}
+
+
+class _Done(Exception):
+    """Raised from the parser callbacks once every wanted table is captured."""
+
+
+class _TableExtractor(HTMLParser):
+    """Collects the cell text of tables that follow a wanted ``<b>`` title."""
+
+    def __init__(self, wanted: Iterable[str]):
+        super().__init__(convert_charrefs=True)
+        self.wanted = {name.lower() for name in wanted}
+        self.tables: Dict[str, List[List[str]]] = {}
+        self._title = None
+        self._bold: Optional[List[str]] = None
+        self._capture: Optional[str] = None
+        self._rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'b':
+            self._bold = []
+        elif tag == 'table':
+            if self._title in self.wanted and self._title not in self.tables:
+                self._capture = self._title
+                self._rows = []
+        elif self._capture is not None:
+            if tag == 'tr':
+                self._row = []
+            elif tag in ('td', 'th'):
+                self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == 'b' and self._bold is not None:
+            self._title = ' '.join(''.join(self._bold).split()).lower()
+            self._bold = None
+        elif self._capture is None:
+            return
+        elif tag in ('td', 'th') and self._cell is not None and self._row is not None:
+            self._row.append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            self._rows.append(self._row)
+            self._row = None
+        elif tag == 'table':
+            self.tables[self._capture] = self._rows
+            self._capture = None
+            self._title = None
+            if self.wanted <= set(self.tables):
+                raise _Done
+
+    def handle_data(self, data):
+        if self._bold is not None:
+            self._bold.append(data)
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def extract_tables(html_file: Path, table_names: Iterable[str],
+                   chunk_size: int = CHUNK_SIZE) -> Dict[str, List[List[str]]]:
+    """Return the rows of the first table following each named title.
+
+    Keys are the lower-cased table names; tables that aren't in the report
+    are missing from the result.
+    """
+    table_names = list(table_names)
+    parser = _TableExtractor(table_names)
+    markers = [f'<b>{name}</b>'.lower() for name in table_names]
+    overlap = max(len(marker) for marker in markers)
+    pending = ''
+    started = False
+
+    try:
+        with open(html_file, 'r', errors='replace') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                if not started:
+                    # Cheap text scan until the first wanted table title.
+                    pending += chunk
+                    lowered = pending.lower()
+                    hits = [i for i in (lowered.find(m) for m in markers) if i >= 0]
+                    if not hits:
+                        pending = pending[-overlap:]
+                        continue
+                    started = True
+                    chunk = pending[min(hits):]
+                    pending = ''
+                parser.feed(chunk)
+            parser.close()
+    except _Done:
+        pass
+    return parser.tables
+
+
+def _units(header: str) -> str:
+    match = UNITS_RE.search(header)
+    return match.group(1).strip() if match else ''
+
+
+def _number(text: str) -> Optional[float]:
+    try:
+        return float(text.replace(',', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+def read_summary(html_file: Path, chunk_size: int = CHUNK_SIZE) -> Optional[dict]:
+    """Return end uses (kWh per category) and site energy from eplustbl.htm.
+
+    The result has ``energy_by_type`` and, when the Site and Source Energy
+    table is present, ``total_site_energy`` (kWh) and ``eui`` (kWh/m2).
+    Returns None when the report has no End Uses table.
+    """
+    tables = extract_tables(html_file, [SITE_AND_SOURCE_ENERGY, END_USES], chunk_size)
+    end_uses = tables.get(END_USES.lower())
+    if not end_uses:
+        return None
+
+    header = end_uses[0]
+    units = [_units(cell) for cell in header]
+    energy_by_type = {category: 0.0 for category in END_USE_CATEGORIES}
+    for row in end_uses[1:]:
+        category = TABULAR_END_USES.get(row[0].lower()) if row else None
+        if category is None:
+            continue
+        for cell, cell_units in zip(row[1:], units[1:]):
+            value = _number(cell)
+            kwh = to_kwh(value, cell_units) if value is not None else None
+            if kwh is not None:
+                energy_by_type[category] += kwh
+
+    summary = {"energy_by_type": {c: round(v, 2) for c, v in energy_by_type.items()}}
+
+    site = tables.get(SITE_AND_SOURCE_ENERGY.lower())
+    if site:
+        site_units = [_units(cell) for cell in site[0]]
+        for row in site[1:]:
+            if not row or row[0].lower() != 'total site energy':
+                continue
+            for cell, cell_units in zip(row[1:], site_units[1:]):
+                value = _number(cell)
+                if value is None:
+                    continue
+                kwh = to_kwh(value, cell_units)
+                if kwh is not None:
+                    summary["total_site_energy"] = round(kwh, 2)
+                elif cell_units in EUI_UNITS_TO_KWH_M2:
+                    summary.setdefault("eui", round(value * EUI_UNITS_TO_KWH_M2[cell_units], 2))
+    return summary
+
+
+def summarize_end_uses(html_file: Path, chunk_size: int = CHUNK_SIZE) -> Optional[Dict[str, float]]:
+    """Return annual kWh per end-use category from eplustbl.htm."""
+    summary = read_summary(html_file, chunk_size)
+    return summary["energy_by_type"] if summary else None
@@ -0,0 +1,282 @@
+"""
+Minimal reader and writer for EnergyPlus IDF text.
+
+An IDF is a sequence of ``Class, field, field, ...;`` objects with ``!``
+comments. This is enough structure to patch individual fields of a model,
+e.g. to generate the variants of a parametric study, and to summarize it
+(zones, run periods, timestep, output requests) without running it.
+
+Parsed models are kept in an LRU cache keyed by content hash, or by path
+and mtime for files, so the same IDF is only tokenized once.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+COMMENT_RE = re.compile(r'!.*')
+
+
+@dataclass
+class IDFObject:
+    """A single IDF object: its class name and the fields that follow it."""
+
+    class_name: str
+    fields: List[str] = field(default_factory=list)
+
+    @property
+    def name(self) -> Optional[str]:
+        """The first field, which names the object for most classes."""
+        return self.fields[0] if self.fields else None
+
+
+def iter_objects(idf_text: str) -> Iterator[IDFObject]:
+    """Tokenize IDF text into objects, dropping comments and whitespace.
+
+    Objects may span any number of lines; comments run from ``!`` to the
+    end of the line. Comments are stripped with one regex pass and the rest
+    is split in C, so even multi-megabyte models take milliseconds.
+    """
+    for chunk in COMMENT_RE.sub('', idf_text).split(';'):
+        fields = [value.strip() for value in chunk.split(',')]
+        if fields[0]:
+            yield IDFObject(fields[0], fields[1:])
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _field(obj: IDFObject, position: int) -> str:
+    """1-based field of an object, '' when it was left off."""
+    return obj.fields[position - 1] if len(obj.fields) >= position else ''
+
+
+class IDFModel:
+    """A parsed IDF with its objects indexed by (lower-case) class name."""
+
+    def __init__(self, objects: List[IDFObject]):
+        self.objects = objects
+        self.classes: Dict[str, List[IDFObject]] = {}
+        for obj in objects:
+            self.classes.setdefault(obj.class_name.lower(), []).append(obj)
+
+    @classmethod
+    def parse(cls, idf_text: str) -> 'IDFModel':
+        return cls(list(iter_objects(idf_text)))
+
+    def get(self, class_name: str) -> List[IDFObject]:
+        """All objects of a class (case-insensitive)."""
+        return self.classes.get(class_name.lower(), [])
+
+    def first(self, class_name: str) -> Optional[IDFObject]:
+        objects = self.get(class_name)
+        return objects[0] if objects else None
+
+    def has(self, class_name: str) -> bool:
+        return class_name.lower() in self.classes
+
+    @property
+    def version(self) -> Optional[str]:
+        obj = self.first('Version')
+        return obj.name if obj else None
+
+    @property
+    def zones(self) -> List[str]:
+        return [obj.name or '' for obj in self.get('Zone')]
+
+    @property
+    def timesteps_per_hour(self) -> int:
+        """``Timestep`` object value; EnergyPlus defaults to 6 without one."""
+        obj = self.first('Timestep')
+        value = _number(obj.name) if obj else None
+        return int(value) if value else 6
+
+    @property
+    def run_periods(self) -> List[dict]:
+        # EnergyPlus 9.0 added begin/end year fields after each date.
+        major = _number((self.version or '').split('.')[0])
+        end_fields = (4, 5) if major is not None and major < 9 else (5, 6)
+        periods = []
+        for obj in self.get('RunPeriod'):
+            periods.append({
+                "name": obj.name or '',
+                "begin_month": int(_number(_field(obj, 2)) or 1),
+                "begin_day": int(_number(_field(obj, 3)) or 1),
+                "end_month": int(_number(_field(obj, end_fields[0])) or 12),
+                "end_day": int(_number(_field(obj, end_fields[1])) or 31),
+            })
+        return periods
+
+    @property
+    def floor_area(self) -> Optional[float]:
+        """Sum of the zone floor areas given in the IDF (m2), if any are."""
+        areas = [
+            _number(_field(obj, 10)) * (_number(_field(obj, 7)) or 1)
+            for obj in self.get('Zone') if _number(_field(obj, 10))
+        ]
+        return round(sum(areas), 2) if areas else None
+
+    def output_requests(self) -> dict:
+        return {
+            "variables": [
+                {"key": obj.name or '*', "name": _field(obj, 2), "frequency": _field(obj, 3)}
+                for obj in self.get('Output:Variable')
+            ],
+            "meters": [
+                {"name": obj.name or '', "frequency": _field(obj, 2), "class": obj.class_name}
+                for class_name in ('Output:Meter', 'Output:Meter:MeterFileOnly',
+                                   'Output:Meter:Cumulative', 'Output:Meter:Cumulative:MeterFileOnly')
+                for obj in self.get(class_name)
+            ],
+            "sqlite": self.has('Output:SQLite'),
+            "tables": [obj.class_name for obj in self.objects
+                       if obj.class_name.lower().startswith('output:table:')],
+        }
+
+    def summary(self) -> dict:
+        """Structural overview used for validation, cost estimates and display."""
+        counts: Dict[str, int] = {}
+        for obj in self.objects:
+            counts[obj.class_name] = counts.get(obj.class_name, 0) + 1
+        building = self.first('Building')
+        return {
+            "version": self.version,
+            "building": building.name if building else None,
+            "objects": len(self.objects),
+            "zones": len(self.get('Zone')),
+            "zone_names": self.zones,
+            "surfaces": len(self.get('BuildingSurface:Detailed')) + len(self.get('FenestrationSurface:Detailed')),
+            "floor_area": self.floor_area,
+            "timesteps_per_hour": self.timesteps_per_hour,
+            "run_periods": self.run_periods,
+            "outputs": self.output_requests(),
+            "class_counts": counts,
+        }
+
+
+def validate(idf_text: str) -> IDFModel:
+    """Parse user-supplied IDF text, raising ValueError if it isn't an IDF."""
+    body = COMMENT_RE.sub('', idf_text)
+    if body.rstrip().rsplit(';', 1)[-1].strip():
+        raise ValueError("Invalid IDF: the last object is not terminated with ';'")
+    model = parse_text(idf_text)
+    if not model.objects:
+        raise ValueError("Invalid IDF: no objects found")
+    return model
+
+
+class _ModelCache:
+    """LRU cache of parsed models."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._models: "OrderedDict[tuple, IDFModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_parse(self, key: tuple, load) -> IDFModel:
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+        model = IDFModel.parse(load())
+        with self._lock:
+            self._models[key] = model
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+MAX_CACHED_MODELS = 64
+_models = _ModelCache(MAX_CACHED_MODELS)
+
+
+def parse_text(idf_text: str) -> IDFModel:
+    """Parse IDF text, reusing the cached model for identical content.
+
+    Cached models are shared; copy objects before changing them.
+    """
+    digest = hashlib.sha256(idf_text.encode('utf-8', 'surrogatepass')).hexdigest()
+    return _models.get_or_parse(('sha256', digest), lambda: idf_text)
+
+
+def load_model(idf_file: Path) -> IDFModel:
+    """Parse an IDF file, reusing the cached model until the file changes."""
+    stat = os.stat(idf_file)
+    key = ('file', str(idf_file), stat.st_mtime_ns, stat.st_size)
+
+    def read() -> str:
+        with open(idf_file, 'r', errors='replace') as f:
+            return f.read()
+
+    return _models.get_or_parse(key, read)
+
+
+def serialize(objects: Iterable[IDFObject]) -> str:
+    """Write objects back out as IDF text, one field per line."""
+    parts = []
+    for obj in objects:
+        values = [obj.class_name] + obj.fields
+        lines = [f"{values[0]},"] + [f"    {value}," for value in values[1:]]
+        lines[-1] = lines[-1][:-1] + ';'
+        parts.append('\n'.join(lines))
+    return '\n\n'.join(parts) + '\n'
+
+
+def apply_overrides(idf_text: str, overrides: List[dict]) -> str:
+    """Return a copy of an IDF with individual fields replaced.
+
+    Each override is ``{"object": <class>, "field": <n>, "value": <value>}``
+    with an optional ``"name"`` to patch one named object instead of every
+    object of the class. ``field`` is the 1-based position after the class
+    name, as in the IDD (field 1 is usually the object's name).
+
+    The base text is parsed once (see ``parse_text``) however many variants
+    are generated from it; only the objects an override touches are copied.
+    """
+    model = parse_text(idf_text)
+    objects = list(model.objects)
+    positions = {id(obj): i for i, obj in enumerate(objects)}
+    copies: Dict[int, IDFObject] = {}
+
+    for override in overrides:
+        try:
+            class_name = str(override["object"]).lower()
+            position = int(override["field"])
+            value = str(override["value"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid override {override!r}: expected object, field and value")
+        if position < 1:
+            raise ValueError(f"Invalid override {override!r}: field numbers start at 1")
+        name = override.get("name")
+
+        matched = False
+        for original in model.get(class_name):
+            if name is not None and (original.name or '').lower() != str(name).lower():
+                continue
+            obj = copies.get(id(original))
+            if obj is None:
+                obj = copies[id(original)] = IDFObject(original.class_name, list(original.fields))
+                objects[positions[id(original)]] = obj
+            if len(obj.fields) < position:
+                obj.fields.extend([''] * (position - len(obj.fields)))
+            obj.fields[position - 1] = value
+            matched = True
+
+        if not matched:
+            target = f"{override['object']} '{name}'" if name is not None else str(override['object'])
+            raise ValueError(f"Override target not found in IDF: {target}")
+
+    return serialize(objects)
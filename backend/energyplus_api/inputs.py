@@ -0,0 +1,68 @@
+"""
+Content-addressed input IDFs for workers on other machines.
+
+With ``ENERGYPLUS_EXECUTION = 'distributed'`` every queued run records the
+SHA-256 of its IDF in ``SimulationRun.input_hash`` and the text is stored
+once per hash as a ``SimulationInput``. A worker that doesn't share
+``ENERGYPLUS_IDF_DIR`` fetches the text by hash and keeps it in a local
+cache, so the hundreds of runs of a batch that share a variant, or repeated
+submissions of one model, are downloaded once per machine.
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable
+
+from django.db import IntegrityError
+
+from .models import SimulationInput, SimulationRun
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _read(path: Path) -> str:
+    with open(path, 'r', errors='replace') as f:
+        return f.read()
+
+
+def store(path: Path) -> str:
+    """Store an IDF file by content hash and return the hash."""
+    return store_many([path])[path]
+
+
+def store_many(paths: Iterable[Path]) -> Dict[Path, str]:
+    """Store several IDFs with one query for the known hashes and one bulk insert."""
+    texts = {path: _read(path) for path in paths}
+    hashes = {path: content_hash(text) for path, text in texts.items()}
+    known = set(SimulationInput.objects.filter(sha256__in=set(hashes.values())).values_list('sha256', flat=True))
+    new = {}
+    for path, sha256 in hashes.items():
+        if sha256 not in known and sha256 not in new:
+            new[sha256] = SimulationInput(sha256=sha256, content=texts[path], size=len(texts[path]))
+    try:
+        SimulationInput.objects.bulk_create(new.values(), ignore_conflicts=True)
+    except IntegrityError:
+        # Backends without ON CONFLICT support: another process won the race.
+        pass
+    return hashes
+
+
+def fetch(run: SimulationRun, cache_dir: Path) -> Path:
+    """Return a local path to a run's IDF, downloading it on first use.
+
+    The file keeps the run's IDF name (it ends up in the results) inside a
+    directory named after the hash.
+    """
+    target = cache_dir / run.input_hash / Path(run.idf_file).name
+    if target.exists():
+        return target
+    content = SimulationInput.objects.values_list('content', flat=True).get(sha256=run.input_hash)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(content)
+    os.replace(tmp, target)
+    return target
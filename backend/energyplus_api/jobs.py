@@ -0,0 +1,590 @@
+"""
+Background job queue for EnergyPlus simulation runs.
+
+``POST /api/simulation/run`` only records a queued ``SimulationRun`` and hands
+its primary key to the queue; a bounded pool of worker threads executes the
+runs. Workers spend nearly all their time waiting on the EnergyPlus
+subprocess, so threads are enough to keep every core busy.
+
+Jobs are estimated and admitted when they are submitted (see
+``scheduling``) and the queue hands out the job with the lowest priority
+value first, so short jobs don't wait behind long ones.
+
+With ``ENERGYPLUS_EXECUTION = 'distributed'`` no worker threads are started
+here: queued runs stay in the database with their priority and worker
+processes on any machine claim them (see ``distributed``).
+"""
+import itertools
+import logging
+import queue
+import re
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import analytics, inputs, logs, metrics, preview, profiling, scheduling
+from .catalog import building_type_of
+from .idf import apply_overrides, parse_text
+from .models import SimulationBatch, SimulationRun, SimulationWorker
+from .retention import start_periodic_sweep
+from .services import EnergyPlusService
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationQueue:
+    """Bounded pool of worker threads that execute queued simulation runs."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        # (priority, sequence, run pk): the sequence keeps equal priorities FIFO
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._active = 0
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"simulation-worker-{len(self._workers)}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def enqueue(self, run_pk: int, priority: float = 0.0) -> None:
+        """Schedule a queued SimulationRun; lower priorities run first."""
+        self._queue.put((priority, next(self._sequence), run_pk))
+
+    def stats(self) -> dict:
+        """Return queue depth and worker utilisation."""
+        with self._lock:
+            active = self._active
+        return {
+            "workers": self.max_workers,
+            "active": active,
+            "queued": self._queue.qsize(),
+        }
+
+    def _worker_loop(self) -> None:
+        while True:
+            _, _, run_pk = self._queue.get()
+            with self._lock:
+                self._active += 1
+            try:
+                execute_job(run_pk)
+            except Exception:
+                logger.exception("Simulation job %s crashed", run_pk)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                self._queue.task_done()
+                close_old_connections()
+
+
+class DatabaseQueue:
+    """The queue in distributed mode: the ``queued`` rows themselves.
+
+    Enqueueing only records the priority that workers claim by; the stats
+    cover every live worker process.
+    """
+
+    def enqueue(self, run_pk: int, priority: float = 0.0) -> None:
+        SimulationRun.objects.filter(pk=run_pk).update(priority=priority)
+
+    def stats(self) -> dict:
+        live = SimulationWorker.objects.filter(
+            last_seen_at__gte=timezone.now() - timedelta(seconds=settings.ENERGYPLUS_WORKER_LEASE_SECONDS)
+        )
+        summary = live.aggregate(nodes=Count('id'), slots=Sum('slots'))
+        runs = SimulationRun.objects.filter(status__in=[SimulationRun.Status.QUEUED, SimulationRun.Status.RUNNING])
+        counts = dict(runs.values_list('status').annotate(n=Count('id')))
+        return {
+            "workers": summary["slots"] or 0,
+            "nodes": summary["nodes"],
+            "active": counts.get(SimulationRun.Status.RUNNING, 0),
+            "queued": counts.get(SimulationRun.Status.QUEUED, 0),
+        }
+
+
+def is_distributed() -> bool:
+    return settings.ENERGYPLUS_EXECUTION == 'distributed'
+
+
+JobQueue = Union[SimulationQueue, DatabaseQueue]
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Return the process-wide simulation queue, starting it on first use.
+
+    A ``SimulationQueue`` of local worker threads, or a ``DatabaseQueue``
+    in distributed mode.
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if is_distributed():
+                    job_queue = DatabaseQueue()
+                    _recover_batches(job_queue)
+                else:
+                    job_queue = SimulationQueue(settings.ENERGYPLUS_MAX_WORKERS)
+                    job_queue.start()
+                    _recover_jobs(job_queue)
+                _queue = job_queue
+    return _queue
+
+
+def _start_retention() -> None:
+    """Start the periodic retention sweep in the process that accepts jobs.
+
+    That is the API server, which owns ``ENERGYPLUS_OUTPUT_DIR``. Remote
+    workers also reach ``get_queue()`` (to queue a full run after a preview
+    or the next batch variants) but never sweep: their output directory
+    doesn't hold the server's runs, so a sweep there would mark every run
+    removed and drop its cache entries.
+    """
+    start_periodic_sweep()
+
+
+metrics.QUEUE_DEPTH.set_function(
+    lambda: _queue.stats()["queued"] if isinstance(_queue, SimulationQueue) else 0)
+
+
+def queue_stats() -> dict:
+    """Worker pool stats of this process plus job counts from the database.
+
+    The pool only exists once this process has queued or run a job; the
+    database counts cover every process.
+    """
+    counts = {choice: 0 for choice in (SimulationRun.Status.PENDING, SimulationRun.Status.QUEUED,
+                                       SimulationRun.Status.RUNNING)}
+    for row in SimulationRun.objects.filter(status__in=list(counts)).values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+    stats = {"jobs": counts, "pool": None}
+    if _queue is not None:
+        pool = _queue.stats()
+        pool["saturation"] = round(pool["active"] / pool["workers"], 2) if pool["workers"] else None
+        stats["pool"] = pool
+    return stats
+
+
+def _recover_jobs(job_queue: SimulationQueue) -> None:
+    """Re-enqueue jobs left unfinished by a previous process.
+
+    Queued jobs are simply picked up again. Jobs stuck in ``running`` for
+    longer than twice their timeout can only belong to a process that
+    died, so they are put back in the queue as well.
+    """
+    now = timezone.now()
+    running = SimulationRun.objects.filter(
+        status=SimulationRun.Status.RUNNING, started_at__isnull=False
+    ).only('pk', 'started_at', 'timeout_seconds')
+    stale = [
+        run.pk for run in running
+        if run.started_at < now - timedelta(
+            seconds=(run.timeout_seconds or settings.ENERGYPLUS_SIMULATION_TIMEOUT) * 2)
+    ]
+    SimulationRun.objects.filter(pk__in=stale, status=SimulationRun.Status.RUNNING).update(
+        status=SimulationRun.Status.QUEUED, started_at=None, updated_at=now
+    )
+
+    pending = SimulationRun.objects.filter(
+        status=SimulationRun.Status.QUEUED
+    ).order_by('created_at').only('pk', 'estimated_seconds')
+    for run in pending:
+        job_queue.enqueue(run.pk, scheduling.priority(run))
+    _recover_batches(job_queue)
+
+
+def _recover_batches(job_queue: JobQueue) -> None:
+    # Batches whose active variants all finished before the restart would
+    # otherwise never dispatch their remaining ones.
+    for batch in SimulationBatch.objects.filter(status=SimulationBatch.Status.RUNNING):
+        _dispatch_batch(batch, job_queue)
+
+
+def submit_simulation(message: str, idf_content: Optional[str] = None,
+                      options: Optional[dict] = None) -> SimulationRun:
+    """Record a queued simulation and schedule it on the worker pool.
+
+    The IDF is resolved (and custom content written to disk) up front so that
+    an unknown model fails the request immediately and a queued job can be
+    resumed after a restart. ``options`` are stored on the run and applied
+    when it executes (e.g. ``{"bypass_cache": True}``).
+
+    With ``{"mode": "preview"}`` the job first runs a shortened copy of the
+    model (see ``preview``) and stores its extrapolated results on the run
+    before the full run is queued; ``{"full_run": False}`` stops there.
+
+    Raises ValueError if the job's estimated runtime is over budget.
+    """
+    _start_retention()
+    options = options or {}
+    # Raises ValueError up front if a pinned EnergyPlus version isn't installed
+    # or the weather file isn't in the registry
+    service = EnergyPlusService(
+        energyplus_version=options.get("energyplus_version"), weather=options.get("weather")
+    )
+    simulation_id = service.new_simulation_id()
+    idf_file = service.resolve_idf(message, idf_content, simulation_id)
+    if not idf_file.exists():
+        raise FileNotFoundError(f"IDF file not found: {idf_file}")
+    job = _admit(idf_file, uploaded=idf_content is not None)
+
+    run = SimulationRun(
+        simulation_id=simulation_id,
+        message=message,
+        idf_file=idf_file.name,
+        building_type=building_type_of(idf_file, message),
+        status=SimulationRun.Status.QUEUED,
+        options=options,
+    )
+    scheduling.apply_estimate(run, job)
+    # Without a weather file there is nothing to preview (see preview.make_preview).
+    preview_first = options.get("mode") == "preview" and service.weather_file is not None
+    # Saved with the row too: distributed workers may claim it before on_commit runs.
+    run.priority = scheduling.priority(run, preview=preview_first)
+    if is_distributed():
+        run.input_hash = inputs.store(idf_file)
+    with metrics.phase('run_insert'):
+        run.save()
+    transaction.on_commit(lambda: get_queue().enqueue(run.pk, run.priority))
+    return run
+
+
+def _wants_preview(run: SimulationRun) -> bool:
+    return run.options.get("mode") == "preview" and run.preview_results is None
+
+
+def _run_preview(run: SimulationRun, idf_file: Optional[Path],
+                 owned: Optional[Callable[[], bool]]) -> bool:
+    """Run the preview phase of a claimed run; True if that ends this job.
+
+    The extrapolated results are stored on the run, which then goes back
+    to ``queued`` for the full run, or is completed with them when
+    ``full_run`` is False. When the model has nothing to shorten or the
+    preview fails, this returns False and the full run goes ahead in the
+    same job.
+    """
+    started_at = timezone.now()
+    try:
+        service = EnergyPlusService(
+            energyplus_version=run.options.get("energyplus_version"), weather=run.options.get("weather")
+        )
+        with open(idf_file or service.idf_dir / run.idf_file, 'r', errors='replace') as f:
+            shortened = preview.make_preview(f.read(), has_weather_file=service.weather_file is not None)
+        if shortened is None:
+            return False
+        results, used_mock_data = service.run_preview(shortened.idf_text, run.simulation_id)
+    except Exception as e:
+        logger.warning("Preview failed, running the full simulation: %s", e)
+        return False
+    if used_mock_data:
+        # Mock values already stand for a whole year.
+        results["preview"] = {"extrapolated": False}
+    else:
+        results = preview.extrapolate(results, shortened)
+    finished_at = timezone.now()
+    results.update(simulation_id=run.simulation_id, idf_file=run.idf_file, used_mock_data=used_mock_data)
+    results["preview"]["runtime_seconds"] = round((finished_at - started_at).total_seconds(), 2)
+    run.preview_results = results
+    run.lease_expires_at = None
+    if owned is not None and not owned():
+        logger.warning("Lease lost while running the preview; dropping it")
+        return True
+
+    if run.options.get("full_run", True):
+        run.status = SimulationRun.Status.QUEUED
+        run.started_at, run.worker_id = None, ''
+        # Finishing the preview doesn't count as an attempt lost to a dead worker.
+        run.attempts = max(run.attempts - 1, 0)
+        run.priority = scheduling.priority(run)
+        run.save()
+        get_queue().enqueue(run.pk, run.priority)
+        return True
+    run.apply_results(results)
+    run.status = SimulationRun.Status.COMPLETED
+    run.finished_at = finished_at
+    run.save()
+    metrics.SIMULATIONS.inc(status=run.status)
+    analytics.record(run)
+    return True
+
+
+def _admit(idf_file: Path, uploaded: bool) -> scheduling.JobEstimate:
+    """Estimate a job, dropping its uploaded IDF if it is rejected."""
+    try:
+        job = scheduling.estimate_file(idf_file)
+        scheduling.admit(job)
+    except ValueError:
+        if uploaded:
+            idf_file.unlink(missing_ok=True)
+        raise
+    return job
+
+
+def execute_job(run_pk: int) -> None:
+    """Run a queued simulation and store its outcome on the SimulationRun."""
+    # Claim the job atomically so a job enqueued twice only runs once.
+    now = timezone.now()
+    claimed = SimulationRun.objects.filter(
+        pk=run_pk, status=SimulationRun.Status.QUEUED
+    ).update(status=SimulationRun.Status.RUNNING, started_at=now, updated_at=now)
+    if not claimed:
+        return
+
+    run_claimed_job(SimulationRun.objects.get(pk=run_pk))
+
+
+def run_claimed_job(run: SimulationRun, idf_file: Optional[Path] = None,
+                    publish: Optional[Callable[[SimulationRun], None]] = None,
+                    owned: Optional[Callable[[], bool]] = None) -> None:
+    """Execute a job this process has claimed and record its outcome.
+
+    Remote workers (see ``distributed``) pass the IDF they fetched,
+    ``publish`` to upload the outputs before the run is marked finished,
+    and ``owned``, which turns False once their lease was lost: the job
+    then belongs to another worker and this outcome is dropped.
+    """
+    metrics.PHASE_SECONDS.observe((run.started_at - run.created_at).total_seconds(), phase='queue_wait')
+    with logs.bind(run.simulation_id), metrics.ACTIVE_RUNS.track():
+        if _wants_preview(run) and _run_preview(run, idf_file, owned):
+            return
+        if run.options.get("profile"):
+            with profiling.Capture(wait=profiling.TRACEMALLOC_WAIT_SECONDS) as capture:
+                recorded = _execute_claimed(run, idf_file, publish, owned)
+            capture.save(profiling.profile_dir(run.simulation_id), 'job')
+        else:
+            recorded = _execute_claimed(run, idf_file, publish, owned)
+
+    if recorded and run.batch_id is not None:
+        _dispatch_batch(run.batch, get_queue())
+
+
+def _execute_claimed(run: SimulationRun, idf_file: Optional[Path],
+                     publish: Optional[Callable[[SimulationRun], None]],
+                     owned: Optional[Callable[[], bool]]) -> bool:
+    try:
+        service = EnergyPlusService(
+            energyplus_version=run.options.get("energyplus_version"), weather=run.options.get("weather")
+        )
+        results = service.run_simulation(
+            run.message,
+            simulation_id=run.simulation_id,
+            idf_file=idf_file or service.idf_dir / run.idf_file,
+            use_cache=not run.options.get("bypass_cache", False),
+            timeout=run.timeout_seconds,
+        )
+        if publish is not None:
+            publish(run)
+    except Exception as e:
+        logger.warning("Simulation failed: %s", e)
+        run.status = SimulationRun.Status.FAILED
+        run.error = str(e)
+    else:
+        run.apply_results(results)
+        run.status = SimulationRun.Status.COMPLETED
+        if run.preview_results and not (run.used_mock_data or run.preview_results.get("used_mock_data")):
+            run.preview_error = preview.relative_error(run.preview_results.get("total_energy"), run.total_energy)
+    run.finished_at = timezone.now()
+    if run.status == SimulationRun.Status.COMPLETED:
+        scheduling.record_runtime(run, results)
+    run.lease_expires_at = None
+    if owned is not None and not owned():
+        logger.warning("Lease lost while running; dropping the outcome")
+        return False
+    with metrics.phase('run_update'):
+        run.save()
+    metrics.SIMULATIONS.inc(status=run.status)
+    analytics.record(run)
+    logger.info("Simulation %s", run.status, extra={
+        "status": run.status,
+        "runtime_seconds": run.runtime_seconds,
+        "used_mock_data": run.used_mock_data,
+    })
+    return True
+
+
+_batch_lock = threading.Lock()
+
+
+def submit_batch(message: str, variants: List[dict], idf_content: Optional[str] = None,
+                 max_concurrency: Optional[int] = None,
+                 options: Optional[dict] = None) -> SimulationBatch:
+    """Generate one IDF per variant and fan the runs out over the worker pool.
+
+    Each variant is ``{"name": ..., "overrides": [...]}`` (see
+    ``idf.apply_overrides``). All runs are inserted up front in one bulk
+    insert; at most ``max_concurrency`` of them are queued at a time so a
+    large study can't starve single simulations of workers. The base model
+    is estimated once; only variants overriding the run period, timestep or
+    simulation control are estimated on their own, and any variant over
+    budget rejects the batch.
+    """
+    _start_retention()
+    if not variants:
+        raise ValueError("A batch needs at least one variant")
+    if len(variants) > settings.ENERGYPLUS_BATCH_MAX_VARIANTS:
+        raise ValueError(
+            f"A batch can have at most {settings.ENERGYPLUS_BATCH_MAX_VARIANTS} variants"
+        )
+    # Local workers are this host's cores; remote workers throttle themselves.
+    limit = len(variants) if is_distributed() else settings.ENERGYPLUS_MAX_WORKERS
+    max_concurrency = max(1, min(int(max_concurrency or limit), limit))
+    options = options or {}
+
+    service = EnergyPlusService(
+        energyplus_version=options.get("energyplus_version"), weather=options.get("weather")
+    )
+    batch_id = f"batch_{uuid.uuid4().hex[:8]}"
+    base_idf = service.resolve_idf(message, idf_content, batch_id)
+    if not base_idf.exists():
+        raise FileNotFoundError(f"IDF file not found: {base_idf}")
+    variant_dir = service.idf_dir / "batches" / batch_id
+    try:
+        with open(base_idf, 'r', errors='replace') as f:
+            base_text = f.read()
+        base_job = scheduling.estimate_file(base_idf)
+        scheduling.admit(base_job)
+        building_type = building_type_of(base_idf, message)
+        rate = scheduling.seconds_per_unit()
+
+        # Generate every variant before touching the database so a bad override
+        # rejects the whole batch.
+        variant_texts = []
+        for index, variant in enumerate(variants, start=1):
+            if not isinstance(variant, dict):
+                raise ValueError(f"Variant {index} must be an object")
+            name = str(variant.get("name") or f"variant_{index}")
+            overrides = variant.get("overrides") or []
+            text = apply_overrides(base_text, overrides)
+            job = base_job
+            if scheduling.touches_timing(overrides):
+                job = scheduling.estimate(parse_text(text), rate=rate)
+                try:
+                    scheduling.admit(job)
+                except ValueError as e:
+                    raise ValueError(f"Variant {name!r}: {e}")
+            variant_texts.append((name, text, job))
+
+        variant_dir.mkdir(parents=True, exist_ok=True)
+        runs = []
+        idf_paths = []
+        for index, (name, text, job) in enumerate(variant_texts, start=1):
+            slug = re.sub(r'[^A-Za-z0-9_-]+', '_', name)[:40]
+            idf_path = variant_dir / f"{index:03d}_{slug}.idf"
+            with open(idf_path, 'w') as f:
+                f.write(text)
+            idf_paths.append(idf_path)
+            run = SimulationRun(
+                simulation_id=service.new_simulation_id(),
+                message=message,
+                idf_file=str(idf_path.relative_to(service.idf_dir)),
+                variant_name=name,
+                building_type=building_type,
+                status=SimulationRun.Status.PENDING,
+                options=dict(options, overrides=variants[index - 1].get("overrides") or []),
+            )
+            scheduling.apply_estimate(run, job)
+            runs.append(run)
+        if is_distributed():
+            hashes = inputs.store_many(idf_paths)
+            for run, idf_path in zip(runs, idf_paths):
+                run.input_hash = hashes[idf_path]
+
+        with transaction.atomic():
+            batch = SimulationBatch.objects.create(
+                batch_id=batch_id,
+                message=message,
+                base_idf=base_idf.name,
+                max_concurrency=max_concurrency,
+                total_variants=len(runs),
+            )
+            for run in runs:
+                run.batch = batch
+            SimulationRun.objects.bulk_create(runs)
+    except Exception:
+        # A rejected batch leaves no files behind.
+        if idf_content is not None:
+            base_idf.unlink(missing_ok=True)
+        shutil.rmtree(variant_dir, ignore_errors=True)
+        raise
+    transaction.on_commit(lambda: _dispatch_batch(batch, get_queue()))
+    return batch
+
+
+def _dispatch_batch(batch: SimulationBatch, job_queue: JobQueue) -> None:
+    """Queue pending variants up to the batch's concurrency cap, or close it."""
+    with _batch_lock:
+        runs = SimulationRun.objects.filter(batch=batch)
+        active = runs.filter(
+            status__in=[SimulationRun.Status.QUEUED, SimulationRun.Status.RUNNING]
+        ).count()
+        slots = batch.max_concurrency - active
+        to_queue = []
+        if slots > 0:
+            pending = list(runs.filter(
+                status=SimulationRun.Status.PENDING
+            ).order_by('pk').only('pk', 'estimated_seconds')[:slots])
+            now = timezone.now()
+            for run in pending:
+                # The priority goes in with the status so a worker never claims it without one.
+                run.priority = scheduling.priority(run)
+                if runs.filter(pk=run.pk, status=SimulationRun.Status.PENDING).update(
+                    status=SimulationRun.Status.QUEUED, priority=run.priority, updated_at=now
+                ):
+                    to_queue.append(run)
+
+        if not to_queue and active == 0 and not runs.filter(status=SimulationRun.Status.PENDING).exists():
+            SimulationBatch.objects.filter(
+                pk=batch.pk, status=SimulationBatch.Status.RUNNING
+            ).update(status=SimulationBatch.Status.COMPLETED, finished_at=timezone.now())
+
+    for run in to_queue:
+        job_queue.enqueue(run.pk, run.priority)
+
+
+def batch_summary(batch: SimulationBatch) -> dict:
+    """Progress counts and per-variant results for a batch."""
+    counts = {choice: 0 for choice in SimulationRun.Status.values}
+    for row in batch.runs.values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+
+    variants = list(batch.runs.order_by('pk').values(
+        'simulation_id', 'variant_name', 'status', 'used_mock_data', 'total_energy', 'energy_by_type', 'error'
+    ))
+    finished = [v for v in variants if v['status'] == SimulationRun.Status.COMPLETED]
+    best = min(finished, key=lambda v: v['total_energy'], default=None)
+    worst = max(finished, key=lambda v: v['total_energy'], default=None)
+
+    return {
+        "batch_id": batch.batch_id,
+        "status": batch.status,
+        "base_idf": batch.base_idf,
+        "total_variants": batch.total_variants,
+        "max_concurrency": batch.max_concurrency,
+        "progress": counts,
+        "created_at": batch.created_at.isoformat(),
+        "finished_at": batch.finished_at.isoformat() if batch.finished_at else None,
+        "best": {"simulation_id": best["simulation_id"], "variant_name": best["variant_name"],
+                 "total_energy": best["total_energy"]} if best else None,
+        "worst": {"simulation_id": worst["simulation_id"], "variant_name": worst["variant_name"],
+                  "total_energy": worst["total_energy"]} if worst else None,
+        "variants": variants,
+    }
@@ -0,0 +1,216 @@
+"""
+HTTP load generator for a running backend.
+
+Concurrent clients call ``POST /api/simulation/run`` and
+``GET /api/simulation/history`` in a configurable mix while the number of
+clients ramps through a list of stages. Alongside them a poller follows
+every submitted simulation to completion and a monitor samples
+``/api/health`` for queue depth and worker saturation, so one report shows
+request latency, error rates, end-to-end simulation turnaround and how
+busy the worker pool was at each concurrency level.
+
+Meant to be run against a server using the fake EnergyPlus (see
+``fake_energyplus``) to size a deployment without a real installation.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Sample:
+    """One HTTP request made by a client."""
+
+    kind: str
+    stage: int
+    latency: float
+    ok: bool
+    status: Optional[int] = None
+
+
+@dataclass
+class Submission:
+    """A simulation submitted during the test, followed until it finishes."""
+
+    simulation_id: str
+    stage: int
+    submitted: float
+    finished: Optional[float] = None
+    status: Optional[str] = None
+
+
+@dataclass
+class Stage:
+    clients: int
+    seconds: float
+    samples: List[Sample] = field(default_factory=list)
+    queue_depth: List[int] = field(default_factory=list)
+    saturation: List[float] = field(default_factory=list)
+
+
+def parse_stages(value: str) -> List[Stage]:
+    """``"2:30,5:30,10:60"`` -> stages of (clients, seconds)."""
+    stages = []
+    for part in value.split(','):
+        try:
+            clients, seconds = part.split(':')
+            stages.append(Stage(int(clients), float(seconds)))
+        except ValueError:
+            raise ValueError(f"Invalid stage {part!r}: expected <clients>:<seconds>")
+    if not stages or any(stage.clients < 1 or stage.seconds <= 0 for stage in stages):
+        raise ValueError("Stages need at least one client and a positive duration")
+    return stages
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    result = np.percentile(np.asarray(values), PERCENTILES)
+    return {f"p{p}": round(float(v) * 1000, 1) for p, v in zip(PERCENTILES, result)}
+
+
+class LoadTest:
+    """Ramp concurrent API clients through ``stages`` against ``base_url``."""
+
+    def __init__(self, base_url: str, stages: List[Stage], run_ratio: float = 0.2,
+                 message: str = "Run simulation for office building", request_timeout: float = 30.0,
+                 poll_interval: float = 1.0, drain_seconds: float = 0.0):
+        self.base_url = base_url.rstrip('/')
+        self.stages = stages
+        self.run_ratio = run_ratio
+        self.message = message
+        self.request_timeout = request_timeout
+        self.poll_interval = poll_interval
+        self.drain_seconds = drain_seconds
+        self.submissions: List[Submission] = []
+        self._stage = 0
+        self._lock = threading.Lock()
+        self._stop_clients: List[threading.Event] = []
+        self._done = threading.Event()
+
+    def _call(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[Optional[int], Optional[dict]]:
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.request_timeout) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            try:
+                return e.code, json.loads(e.read() or b'null')
+            except ValueError:
+                return e.code, None
+        except (OSError, ValueError):
+            return None, None
+
+    def _client(self, stop: threading.Event) -> None:
+        cursor = None
+        while not stop.is_set():
+            stage = self._stage
+            start = time.perf_counter()
+            if random.random() < self.run_ratio:
+                kind = 'run'
+                status, payload = self._call('POST', '/api/simulation/run', {"message": self.message})
+                ok = status == 202
+                if ok and payload:
+                    with self._lock:
+                        self.submissions.append(Submission(payload["simulation_id"], stage, time.monotonic()))
+            else:
+                kind = 'history'
+                # Alternate between the first page and the next one, like a user scrolling.
+                path = '/api/simulation/history?limit=20' + (f'&cursor={cursor}' if cursor else '')
+                status, payload = self._call('GET', path)
+                ok = status == 200
+                cursor = (payload or {}).get('next_cursor') if ok and not cursor else None
+            latency = time.perf_counter() - start
+            with self._lock:
+                self.stages[stage].samples.append(Sample(kind, stage, latency, ok, status))
+
+    def _poller(self) -> None:
+        while not self._done.is_set():
+            with self._lock:
+                pending = [s for s in self.submissions if s.finished is None]
+            for submission in pending:
+                status, payload = self._call('GET', f'/api/simulation/{submission.simulation_id}/status')
+                if status == 200 and payload and payload.get('status') in ('completed', 'failed'):
+                    submission.status = payload['status']
+                    submission.finished = time.monotonic()
+            self._done.wait(self.poll_interval)
+
+    def _monitor(self) -> None:
+        while not self._done.is_set():
+            status, payload = self._call('GET', '/api/health')
+            if status == 200 and payload and payload.get('queue'):
+                queue = payload['queue']
+                stage = self.stages[self._stage]
+                stage.queue_depth.append(queue['jobs'].get('queued', 0))
+                if queue.get('pool'):
+                    stage.saturation.append(queue['pool']['saturation'])
+            self._done.wait(1.0)
+
+    def run(self) -> dict:
+        """Run every stage, wait up to ``drain_seconds`` for simulations, return the report."""
+        background = [threading.Thread(target=self._poller, daemon=True),
+                      threading.Thread(target=self._monitor, daemon=True)]
+        for thread in background:
+            thread.start()
+        started = time.monotonic()
+        try:
+            for index, stage in enumerate(self.stages):
+                self._stage = index
+                while len(self._stop_clients) < stage.clients:
+                    stop = threading.Event()
+                    self._stop_clients.append(stop)
+                    threading.Thread(target=self._client, args=(stop,), daemon=True).start()
+                while len(self._stop_clients) > stage.clients:
+                    self._stop_clients.pop().set()
+                time.sleep(stage.seconds)
+        finally:
+            for stop in self._stop_clients:
+                stop.set()
+        drain_until = time.monotonic() + self.drain_seconds
+        while time.monotonic() < drain_until and any(s.finished is None for s in self.submissions):
+            time.sleep(self.poll_interval)
+        self._done.set()
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> dict:
+        stages = []
+        for index, stage in enumerate(self.stages):
+            kinds = {}
+            for kind in ('run', 'history'):
+                samples = [s for s in stage.samples if s.kind == kind]
+                errors = sum(1 for s in samples if not s.ok)
+                kinds[kind] = {
+                    "requests": len(samples),
+                    "throughput_rps": round(len(samples) / stage.seconds, 2),
+                    "error_rate": round(errors / len(samples), 4) if samples else None,
+                    "latency_ms": percentiles([s.latency for s in samples if s.ok]),
+                }
+            submitted = [s for s in self.submissions if s.stage == index]
+            finished = [s for s in submitted if s.finished is not None]
+            stages.append({
+                "clients": stage.clients,
+                "seconds": stage.seconds,
+                "requests": kinds,
+                "simulations": {
+                    "submitted": len(submitted),
+                    "completed": sum(1 for s in finished if s.status == 'completed'),
+                    "failed": sum(1 for s in finished if s.status == 'failed'),
+                    "unfinished": len(submitted) - len(finished),
+                    "turnaround_ms": percentiles([s.finished - s.submitted for s in finished]),
+                },
+                "queue_depth_max": max(stage.queue_depth, default=None),
+                "saturation_mean": round(float(np.mean(stage.saturation)), 2) if stage.saturation else None,
+            })
+        return {"base_url": self.base_url, "elapsed_seconds": round(elapsed, 1), "stages": stages}
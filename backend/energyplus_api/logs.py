@@ -0,0 +1,62 @@
+"""
+Log records that carry the simulation they belong to.
+
+``bind(simulation_id)`` sets the current simulation for everything logged
+in its body, including from the services and output parsers it calls;
+``SimulationContextFilter`` copies it onto each record as
+``record.simulation_id``. ``JsonFormatter`` writes one JSON object per
+record (with any ``extra=`` fields) for log shippers, ``TextFormatter``
+prefixes the message with the simulation ID. Both are wired up in
+``LOGGING`` in the settings, chosen by ``ENERGYPLUS_LOG_FORMAT``.
+"""
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+_simulation_id: ContextVar[Optional[str]] = ContextVar('simulation_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'simulation_id'}
+
+
+@contextmanager
+def bind(simulation_id: Optional[str]) -> Iterator[None]:
+    """Attach ``simulation_id`` to the records logged in the body."""
+    token = _simulation_id.set(simulation_id)
+    try:
+        yield
+    finally:
+        _simulation_id.reset(token)
+
+
+class SimulationContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'simulation_id', None) is None:
+            record.simulation_id = _simulation_id.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        simulation_id = getattr(record, 'simulation_id', None)
+        if simulation_id:
+            record.message = f"[{simulation_id}] {record.message}"
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "simulation_id": getattr(record, 'simulation_id', None),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
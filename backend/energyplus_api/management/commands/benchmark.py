@@ -0,0 +1,127 @@
+"""
+Run the pipeline micro-benchmarks and compare them with a stored baseline.
+"""
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from energyplus_api import benchmarks
+
+GROUPS = ('selection', 'extraction', 'discovery', 'serialization', 'database')
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the simulation pipeline's hot paths on synthetic data and fail if any "
+        "is slower than the stored baseline by more than the tolerance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline',
+            default=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'),
+            help="Baseline file to compare against (and to write with --save-baseline).",
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help="Record this run's times as the new baseline instead of comparing.",
+        )
+        parser.add_argument(
+            '--require-baseline',
+            action='store_true',
+            help="Fail when the baseline is missing or has no entry for a benchmark that ran (for CI).",
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help="Allowed slowdown as a fraction of the baseline time (default 0.25).",
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            choices=GROUPS,
+            help="Run only these groups (repeatable).",
+        )
+        parser.add_argument(
+            '--rows',
+            default='10000,100000',
+            help="Comma-separated history table sizes, e.g. 10000,100000,1000000.",
+        )
+        parser.add_argument('--idf-count', type=int, default=2000, help="IDFs in the synthetic inputs directory.")
+        parser.add_argument('--output-rows', type=int, default=8760, help="Rows of the synthetic output files.")
+        parser.add_argument('--output-columns', type=int, default=500, help="Series in the synthetic output files.")
+
+    def handle(self, *args, **options):
+        groups = options['only'] or GROUPS
+        try:
+            sizes = sorted({int(size) for size in options['rows'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError("--rows must be a comma-separated list of integers")
+        if any(size < benchmarks.INSERT_BATCH for size in sizes):
+            raise CommandError(f"History table sizes must be at least {benchmarks.INSERT_BATCH}")
+
+        baseline_path = Path(options['baseline'])
+        baseline = {} if options['save_baseline'] else benchmarks.load_baseline(baseline_path)
+        measurements = []
+        failures = []
+
+        def run(benchmark):
+            measurement = benchmarks.measure(benchmark)
+            measurements.append(measurement)
+            reference = baseline.get(measurement.name)
+            line = f"{measurement.name:<48} best {measurement.best * 1000:10.2f} ms  median {measurement.median * 1000:10.2f} ms"
+            if reference is not None:
+                line += f"  baseline {reference * 1000:10.2f} ms ({(measurement.best / reference - 1) * 100:+.0f}%)"
+            if benchmarks.regressed(measurement, baseline, options['tolerance']):
+                failures.append(measurement.name)
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        with tempfile.TemporaryDirectory(prefix='energyplus-bench-') as tmp:
+            work_dir = Path(tmp)
+            self.stdout.write("Generating synthetic data...")
+            suites = []
+            if 'selection' in groups:
+                suites += benchmarks.selection_benchmarks(work_dir, options['idf_count'])
+            if 'extraction' in groups:
+                suites += benchmarks.extraction_benchmarks(
+                    work_dir, options['output_rows'], options['output_columns'])
+            if 'discovery' in groups:
+                suites += benchmarks.discovery_benchmarks()
+            if 'serialization' in groups:
+                suites += benchmarks.serialization_benchmarks()
+            for benchmark in suites:
+                run(benchmark)
+
+        if 'database' in groups:
+            # A throwaway test database, so the real history is never touched.
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+            try:
+                for benchmark in benchmarks.database_benchmarks(sizes):
+                    run(benchmark)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        if options['save_baseline']:
+            benchmarks.save_baseline(baseline_path, measurements)
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(measurements)} results to {baseline_path}"))
+        elif failures:
+            raise CommandError(
+                f"{len(failures)} benchmark(s) regressed by more than "
+                f"{options['tolerance']:.0%}: {', '.join(failures)}"
+            )
+        elif options['require_baseline']:
+            missing = [m.name for m in measurements if m.name not in baseline]
+            if missing:
+                raise CommandError(
+                    f"No baseline in {baseline_path} for {len(missing)} benchmark(s): {', '.join(missing)}; "
+                    f"run with --save-baseline to record them."
+                )
+        elif not baseline:
+            self.stdout.write(f"No baseline at {baseline_path}; run with --save-baseline to record one.")
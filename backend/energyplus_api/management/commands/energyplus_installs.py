@@ -0,0 +1,28 @@
+"""
+List the EnergyPlus installations known to the registry.
+"""
+from django.core.management.base import BaseCommand
+
+from energyplus_api.discovery import get_registry
+
+
+class Command(BaseCommand):
+    help = "List installed EnergyPlus versions; --refresh rescans the system."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help="Rescan for EnergyPlus installations and update the shared registry file.",
+        )
+
+    def handle(self, *args, **options):
+        registry = get_registry()
+        installations = registry.refresh() if options['refresh'] else registry.installations()
+
+        if not installations:
+            self.stdout.write("No EnergyPlus installation found; simulations will use mock data.")
+            return
+
+        for installation in installations:
+            self.stdout.write(f"{installation.tag:<12} {installation.executable}")
@@ -0,0 +1,48 @@
+"""
+Install a fake ``energyplus`` executable for load tests.
+"""
+import os
+import shlex
+import stat
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+LAUNCHER = """#!/bin/sh
+# Fake EnergyPlus for load tests (see energyplus_api/fake_energyplus.py)
+PYTHONPATH={backend}${{PYTHONPATH:+:$PYTHONPATH}} exec {python} -m energyplus_api.fake_energyplus "$@"
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a fake `energyplus` launcher into a directory. Set ENERGYPLUS_HOME to that "
+        "directory and run `energyplus_installs --refresh` to use it; FAKE_ENERGYPLUS_* "
+        "variables control its runtime, output size and failure rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--install', required=True, metavar='DIR', help="Directory to write the launcher to.")
+
+    def handle(self, *args, **options):
+        if sys.platform == 'win32':
+            raise CommandError("The fake EnergyPlus launcher is a POSIX shell script")
+        directory = Path(options['install']).resolve()
+        directory.mkdir(parents=True, exist_ok=True)
+        launcher = directory / 'energyplus'
+        launcher.write_text(LAUNCHER.format(
+            backend=shlex.quote(str(settings.BASE_DIR)),
+            python=shlex.quote(sys.executable),
+        ))
+        launcher.chmod(launcher.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        self.stdout.write(f"Wrote {launcher}")
+        self.stdout.write(
+            f"Use it with: export ENERGYPLUS_HOME={shlex.quote(str(directory))} && "
+            f"python manage.py energyplus_installs --refresh"
+        )
+        if os.environ.get('ENERGYPLUS_HOME') not in (None, str(directory)):
+            self.stdout.write(self.style.WARNING(
+                f"ENERGYPLUS_HOME is currently {os.environ['ENERGYPLUS_HOME']}"
+            ))
@@ -0,0 +1,81 @@
+"""
+Drive a running backend with ramping concurrent clients and report latency.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from energyplus_api.loadtest import LoadTest, parse_stages
+
+
+def _ms(latency: dict) -> str:
+    return ' / '.join('-' if value is None else f"{value:.0f}" for value in latency.values())
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server: clients submit simulations and page through the "
+        "history while their number ramps through --stages; reports throughput, "
+        "p50/p95/p99 latency, error rates, simulation turnaround and worker saturation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server.")
+        parser.add_argument(
+            '--stages',
+            default='1:30,4:30,8:30,16:30',
+            help="Comma-separated <clients>:<seconds> stages (default 1:30,4:30,8:30,16:30).",
+        )
+        parser.add_argument(
+            '--run-ratio',
+            type=float,
+            default=0.2,
+            help="Fraction of requests that submit a simulation; the rest read the history.",
+        )
+        parser.add_argument('--message', default="Run simulation for office building")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument(
+            '--drain',
+            type=float,
+            default=60.0,
+            help="Seconds to wait after the last stage for submitted simulations to finish.",
+        )
+        parser.add_argument('--json', metavar='FILE', help="Also write the full report to FILE.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['run_ratio'] <= 1:
+            raise CommandError("--run-ratio must be between 0 and 1")
+        try:
+            stages = parse_stages(options['stages'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        test = LoadTest(
+            options['url'], stages,
+            run_ratio=options['run_ratio'],
+            message=options['message'],
+            request_timeout=options['timeout'],
+            drain_seconds=options['drain'],
+        )
+        report = test.run()
+
+        self.stdout.write(f"{'clients':>7} {'kind':>8} {'req':>6} {'req/s':>7} {'err%':>6} "
+                          f"{'p50/p95/p99 ms':>20} {'sims ok/fail/open':>18} {'turnaround p50/p95/p99 ms':>26} "
+                          f"{'queue max':>9} {'busy':>5}")
+        for stage in report['stages']:
+            sims = stage['simulations']
+            for kind, stats in stage['requests'].items():
+                error_rate = '-' if stats['error_rate'] is None else f"{stats['error_rate'] * 100:.1f}"
+                line = (f"{stage['clients']:>7} {kind:>8} {stats['requests']:>6} {stats['throughput_rps']:>7.2f} "
+                        f"{error_rate:>6} {_ms(stats['latency_ms']):>20}")
+                if kind == 'run':
+                    line += (f" {sims['completed']:>6}/{sims['failed']}/{sims['unfinished']:<6}"
+                             f" {_ms(sims['turnaround_ms']):>26}"
+                             f" {'-' if stage['queue_depth_max'] is None else stage['queue_depth_max']:>9}"
+                             f" {'-' if stage['saturation_mean'] is None else stage['saturation_mean']:>5}")
+                self.stdout.write(line)
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['json']}")
@@ -0,0 +1,49 @@
+"""
+Archive finished simulation outputs and enforce the retention limits.
+"""
+from django.core.management.base import BaseCommand
+
+from energyplus_api.retention import sweep
+
+
+class Command(BaseCommand):
+    help = (
+        "Compress finished simulation output directories and remove the oldest "
+        "or least recently used ones beyond the ENERGYPLUS_RETENTION_* limits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            help="Remove runs that finished more than this many days ago (0 disables).",
+        )
+        parser.add_argument(
+            '--max-bytes',
+            type=int,
+            help="Evict least recently used runs until the output directory fits (0 disables).",
+        )
+        parser.add_argument(
+            '--archive-after-minutes',
+            type=int,
+            help="Only archive runs that finished at least this many minutes ago.",
+        )
+        parser.add_argument(
+            '--remove-orphans',
+            action='store_true',
+            default=None,
+            help="Also remove output directories that have no simulation run in the database.",
+        )
+
+    def handle(self, *args, **options):
+        stats = sweep(
+            max_age_days=options['max_age_days'],
+            max_bytes=options['max_bytes'],
+            archive_after_minutes=options['archive_after_minutes'],
+            orphans=options['remove_orphans'],
+        )
+        self.stdout.write(
+            f"Archived {stats['archived']}, expired {stats['expired']}, "
+            f"evicted {stats['evicted']}, removed {stats['orphans']} orphaned directories; "
+            f"freed {stats['freed_bytes'] / 1024 ** 2:.1f} MB"
+        )
@@ -0,0 +1,17 @@
+"""
+Recompute the simulation analytics summaries from the run history.
+"""
+from django.core.management.base import BaseCommand
+
+from energyplus_api.analytics import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the SimulationSummary rows behind /api/simulation/analytics from "
+        "the completed runs. They are kept up to date as runs complete; this is only "
+        "needed after editing runs directly in the database."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Summarized {rebuild()} completed runs")
@@ -0,0 +1,61 @@
+"""
+Run queued simulations claimed from the shared database.
+"""
+import os
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from energyplus_api.distributed import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Claim queued simulations from the database and run them here; start one per "
+        "host with ENERGYPLUS_EXECUTION=distributed. Pass --api-url when this host does "
+        "not share the simulations directory: outputs are then uploaded to the API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--slots',
+            type=int,
+            default=settings.ENERGYPLUS_MAX_WORKERS,
+            help="Simulations to run at once (default ENERGYPLUS_MAX_WORKERS).",
+        )
+        parser.add_argument(
+            '--api-url',
+            default=os.environ.get('ENERGYPLUS_API_URL'),
+            help="Base URL of the API to upload outputs to (default $ENERGYPLUS_API_URL).",
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=settings.ENERGYPLUS_WORKER_LEASE_SECONDS,
+            help="Seconds a claimed job is held without a heartbeat.",
+        )
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds between claims when the queue is empty.")
+        parser.add_argument('--burst', action='store_true', help="Exit once no simulation is queued or running.")
+
+    def handle(self, *args, **options):
+        if settings.ENERGYPLUS_EXECUTION != 'distributed':
+            raise CommandError("Set ENERGYPLUS_EXECUTION=distributed for the server and every worker")
+        if options['api_url'] and not settings.ENERGYPLUS_WORKER_TOKEN:
+            raise CommandError("Uploading outputs needs ENERGYPLUS_WORKER_TOKEN")
+        if options['lease'] < 3:
+            raise CommandError("--lease must be at least 3 seconds")
+
+        worker = Worker(
+            options['slots'],
+            api_url=options['api_url'],
+            token=settings.ENERGYPLUS_WORKER_TOKEN,
+            lease_seconds=options['lease'],
+            poll_seconds=options['poll'],
+            burst=options['burst'],
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+        self.stdout.write(f"Worker {worker.worker_id} running {worker.slots} slots")
+        worker.run()
+        self.stdout.write(f"Worker {worker.worker_id} stopped after {worker.processed} simulations")
@@ -0,0 +1,213 @@
+"""
+In-process metrics, exposed at ``/api/metrics`` in the Prometheus text format.
+
+Every phase of a simulation request is timed into one histogram
+(``energyplus_phase_seconds{phase=...}``):
+
+- ``idf_selection``: picking the model for a message or saving an upload
+- ``run_insert`` / ``run_update``: writing the ``SimulationRun`` row
+- ``queue_wait``: from submission until a worker picks the job up
+- ``energyplus``: the EnergyPlus process itself
+- ``output_parsing``: extracting results from its output files
+- ``timeseries``: building the per-run time-series store
+- ``artifacts``: moving the kept outputs out of scratch space
+- ``results_write``: writing ``results.json``
+
+Counters and gauges cover outcomes, mock fallbacks, timeouts, cache
+lookups, bytes written, queue depth and active runs. Recording a sample is
+a lock and a couple of additions, so it is cheap enough for every request.
+Values live in the memory of the process that recorded them: with several
+server processes each one must be scraped on its own.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+PHASE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+_registry: List['_Metric'] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {} if labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from a callback when scraped."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {} if labelnames else {(): 0}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Count the body as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the (unlabelled) value from ``function`` at scrape time."""
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            yield self.name, '', self._function()
+            return
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, plus their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = PHASE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts with a trailing +Inf bucket, sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the body takes, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames + ('le',), key + (_format_value(bound),)), cumulative)
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+
+
+PHASE_SECONDS = Histogram(
+    'energyplus_phase_seconds', "Time spent in each phase of a simulation request.", ['phase'])
+SIMULATIONS = Counter(
+    'energyplus_simulations_total', "Simulation runs finished, by status.", ['status'])
+MOCK_FALLBACKS = Counter(
+    'energyplus_mock_fallbacks_total', "Runs answered with mock data instead of EnergyPlus results, by reason.",
+    ['reason'])
+TIMEOUTS = Counter(
+    'energyplus_timeouts_total', "EnergyPlus processes killed at their timeout.")
+CACHE_LOOKUPS = Counter(
+    'energyplus_cache_lookups_total', "Result cache lookups, by result (hit, miss or coalesced).", ['result'])
+OUTPUT_BYTES = Counter(
+    'energyplus_output_bytes_total', "Bytes written to simulation output directories.")
+QUEUE_DEPTH = Gauge(
+    'energyplus_queue_depth', "Jobs waiting for a worker in this process.")
+ACTIVE_RUNS = Gauge(
+    'energyplus_active_runs', "Simulations executing in this process.")
+
+
+def phase(name: str):
+    """Time one phase of a simulation request (see the module docstring)."""
+    return PHASE_SECONDS.time(phase=name)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return '\n'.join(metric.render() for metric in _registry) + '\n'
@@ -0,0 +1,47 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` is Django's ``GZipMiddleware`` plus brotli:
+clients that accept ``br`` get brotli when the ``brotli`` package is
+installed (it is smaller than gzip for JSON at similar speed), everyone
+else gets gzip. Bodies under 200 bytes and event streams are left alone,
+the latter so progress events aren't held back by the compressor.
+"""
+import re
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+MIN_SIZE = 200
+BROTLI_QUALITY = 5
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+_accepts_br = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith(UNCOMPRESSED_TYPES):
+            return response
+        if brotli is None or response.streaming or not _accepts_br.search(request.headers.get('Accept-Encoding', '')):
+            return super().process_response(request, response)
+        if len(response.content) < MIN_SIZE or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        # The body changed, so a strong validator no longer matches it byte for byte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
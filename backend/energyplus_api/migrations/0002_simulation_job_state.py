@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationrun',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='status',
+            # Runs recorded before the job queue existed all finished inline.
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='completed', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='simulationrun',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='simulationrun',
+            name='energy_breakdown',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AlterField(
+            model_name='simulationrun',
+            name='energy_by_type',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='simulationrun',
+            name='total_energy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
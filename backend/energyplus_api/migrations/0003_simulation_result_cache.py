@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0002_simulation_job_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('simulation_id', models.CharField(max_length=64)),
+                ('results', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('last_hit_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'simulation cache entries',
+            },
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
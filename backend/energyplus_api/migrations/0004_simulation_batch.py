@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0003_simulation_result_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=64, unique=True)),
+                ('message', models.TextField()),
+                ('base_idf', models.CharField(max_length=255)),
+                ('max_concurrency', models.PositiveIntegerField()),
+                ('total_variants', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'simulation batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='variant_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='simulationrun',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='runs', to='energyplus_api.simulationbatch'),
+        ),
+    ]
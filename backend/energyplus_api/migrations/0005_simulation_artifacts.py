@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0004_simulation_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationrun',
+            name='artifacts',
+            field=models.CharField(choices=[('present', 'Present'), ('archived', 'Archived'), ('removed', 'Removed')], db_index=True, default='present', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='artifacts_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
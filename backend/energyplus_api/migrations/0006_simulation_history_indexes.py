@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0005_simulation_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['-created_at', '-id'], name='run_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['used_mock_data', '-created_at', '-id'], name='run_history_mock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['idf_file', '-created_at', '-id'], name='run_history_idf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='run_history_status_idx'),
+        ),
+    ]
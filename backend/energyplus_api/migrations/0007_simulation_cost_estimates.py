@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0006_simulation_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationrun',
+            name='cost_units',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='estimated_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='runtime_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='timeout_seconds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0007_simulation_cost_estimates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationrun',
+            name='preview_error',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='preview_results',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0008_simulation_preview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationInput',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('content', models.TextField()),
+                ('size', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SimulationWorker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_id', models.CharField(max_length=128, unique=True)),
+                ('hostname', models.CharField(max_length=255)),
+                ('slots', models.PositiveIntegerField()),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['hostname', 'worker_id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='input_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='priority',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='worker_id',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['status', 'priority', 'id'], name='run_claim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='run_lease_idx'),
+        ),
+    ]
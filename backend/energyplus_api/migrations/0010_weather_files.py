@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0009_distributed_workers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveBigIntegerField()),
+                ('city', models.CharField(blank=True, max_length=128)),
+                ('state', models.CharField(blank=True, max_length=64)),
+                ('country', models.CharField(blank=True, max_length=64)),
+                ('source', models.CharField(blank=True, max_length=64)),
+                ('wmo', models.CharField(blank=True, max_length=16)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('time_zone', models.FloatField(blank=True, null=True)),
+                ('elevation', models.FloatField(blank=True, null=True)),
+                ('hours', models.PositiveIntegerField()),
+                ('summary', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['country', 'state', 'city', 'name'],
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0010_weather_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('idf_file', 'IDF file'), ('building_type', 'Building type'), ('day', 'Day')], max_length=16)),
+                ('key', models.CharField(max_length=255)),
+                ('used_mock_data', models.BooleanField()),
+                ('runs', models.PositiveIntegerField(default=0)),
+                ('total_energy_sum', models.FloatField(default=0)),
+                ('total_energy_min', models.FloatField(blank=True, null=True)),
+                ('total_energy_max', models.FloatField(blank=True, null=True)),
+                ('cooling_energy_sum', models.FloatField(default=0)),
+                ('heating_energy_sum', models.FloatField(default=0)),
+                ('lighting_energy_sum', models.FloatField(default=0)),
+                ('equipment_energy_sum', models.FloatField(default=0)),
+                ('ventilation_energy_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'simulation summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimulationSummaryBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.IntegerField()),
+                ('runs', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='building_type',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='cooling_energy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='equipment_energy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='heating_energy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='in_summary',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='lighting_energy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationrun',
+            name='ventilation_energy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='simulationsummary',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key', 'used_mock_data'), name='summary_group_uniq'),
+        ),
+        migrations.AddField(
+            model_name='simulationsummarybucket',
+            name='summary',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='energyplus_api.simulationsummary'),
+        ),
+        migrations.AddConstraint(
+            model_name='simulationsummarybucket',
+            constraint=models.UniqueConstraint(fields=('summary', 'bucket'), name='summary_bucket_uniq'),
+        ),
+    ]
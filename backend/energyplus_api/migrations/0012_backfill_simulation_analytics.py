@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:04
+
+from django.db import migrations
+
+from energyplus_api.analytics import rebuild
+from energyplus_api.catalog import building_types_in, tokenize
+from energyplus_api.end_uses import END_USE_CATEGORIES
+
+BATCH_SIZE = 500
+
+
+def backfill(apps, schema_editor):
+    """Copy energy_by_type into the end-use columns, guess building types and build the summaries."""
+    SimulationRun = apps.get_model('energyplus_api', 'SimulationRun')
+    fields = [f"{category}_energy" for category in END_USE_CATEGORIES] + ['building_type']
+    runs = []
+    for run in SimulationRun.objects.only('pk', 'idf_file', 'message', 'energy_by_type').iterator(BATCH_SIZE):
+        energy_by_type = run.energy_by_type or {}
+        for category in END_USE_CATEGORIES:
+            setattr(run, f"{category}_energy", energy_by_type.get(category))
+        # The model files may be gone; their names and the request usually say enough.
+        types = building_types_in(tokenize(run.idf_file)) or building_types_in(tokenize(run.message))
+        run.building_type = types[0] if types else ''
+        runs.append(run)
+        if len(runs) >= BATCH_SIZE:
+            SimulationRun.objects.bulk_update(runs, fields)
+            runs = []
+    SimulationRun.objects.bulk_update(runs, fields)
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0011_simulation_analytics'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:07
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    """Existing runs last changed when they finished (or started, or were created)."""
+    SimulationRun = apps.get_model('energyplus_api', 'SimulationRun')
+    SimulationRun.objects.update(updated_at=Coalesce('finished_at', 'started_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energyplus_api', '0012_backfill_simulation_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationrun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
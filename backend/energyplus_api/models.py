@@ -1,21 +1,256 @@
 from django.db import models
+from django.utils import timezone
+
+from .end_uses import END_USE_CATEGORIES
+
+
+class SimulationBatch(models.Model):
+    """A parametric study: one base IDF run with a list of field overrides."""
+
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+
+    batch_id = models.CharField(max_length=64, unique=True)
+    message = models.TextField()
+    base_idf = models.CharField(max_length=255)
+    max_concurrency = models.PositiveIntegerField()
+    total_variants = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.RUNNING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'simulation batches'
+
+    def __str__(self) -> str:
+        return f"{self.batch_id} - {self.total_variants} variants"
 
 
 class SimulationRun(models.Model):
     """Stores metadata and results for each simulation request."""
 
+    class Status(models.TextChoices):
+        # Batch variants wait in PENDING until the batch has a free slot.
+        PENDING = 'pending', 'Pending'
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    class Artifacts(models.TextChoices):
+        # What is left of the run's output directory on disk (see retention.py).
+        PRESENT = 'present', 'Present'
+        ARCHIVED = 'archived', 'Archived'
+        REMOVED = 'removed', 'Removed'
+
     simulation_id = models.CharField(max_length=64, unique=True)
     message = models.TextField()
     idf_file = models.CharField(max_length=255, blank=True)
+    batch = models.ForeignKey(
+        SimulationBatch, on_delete=models.SET_NULL, related_name='runs', blank=True, null=True
+    )
+    variant_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED, db_index=True
+    )
+    error = models.TextField(blank=True)
     used_mock_data = models.BooleanField(default=False)
-    total_energy = models.FloatField()
-    energy_by_type = models.JSONField()
-    energy_breakdown = models.JSONField()
+    total_energy = models.FloatField(blank=True, null=True)
+    energy_by_type = models.JSONField(default=dict)
+    # energy_by_type as columns (kWh), so analytics aggregate in the database
+    cooling_energy = models.FloatField(blank=True, null=True)
+    heating_energy = models.FloatField(blank=True, null=True)
+    lighting_energy = models.FloatField(blank=True, null=True)
+    equipment_energy = models.FloatField(blank=True, null=True)
+    ventilation_energy = models.FloatField(blank=True, null=True)
+    building_type = models.CharField(max_length=32, blank=True)
+    # Whether the run has been added to the SimulationSummary rows
+    in_summary = models.BooleanField(default=False)
+    energy_breakdown = models.JSONField(default=list)
     additional_info = models.JSONField(blank=True, null=True)
+    options = models.JSONField(default=dict, blank=True)
+    # Cost estimate made at submission (see scheduling.py) and the measured
+    # runtime of real EnergyPlus runs, which calibrates later estimates.
+    cost_units = models.FloatField(blank=True, null=True)
+    estimated_seconds = models.FloatField(blank=True, null=True)
+    timeout_seconds = models.PositiveIntegerField(blank=True, null=True)
+    runtime_seconds = models.FloatField(blank=True, null=True)
+    # mode=preview: the extrapolated results of the shortened run (see
+    # preview.py) and, once the full run finished, its relative error.
+    preview_results = models.JSONField(blank=True, null=True)
+    preview_error = models.FloatField(blank=True, null=True)
+    artifacts = models.CharField(
+        max_length=16, choices=Artifacts.choices, default=Artifacts.PRESENT, db_index=True
+    )
+    artifacts_bytes = models.PositiveBigIntegerField(blank=True, null=True)
+    # Distributed execution (see distributed.py): the IDF as a SimulationInput,
+    # the claim order, and the worker holding the job until its lease expires.
+    input_hash = models.CharField(max_length=64, blank=True)
+    priority = models.FloatField(default=0)
+    worker_id = models.CharField(max_length=128, blank=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Version of the run for HTTP validators (see conditional.py); queryset
+    # .update() calls that change what the API shows must set it too.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Workers claim the queued job with the lowest priority value
+            models.Index(fields=['status', 'priority', 'id'], name='run_claim_idx'),
+            models.Index(fields=['status', 'lease_expires_at'], name='run_lease_idx'),
+            # Keyset pagination of the history, optionally narrowed by a filter
+            models.Index(fields=['-created_at', '-id'], name='run_history_idx'),
+            models.Index(fields=['used_mock_data', '-created_at', '-id'], name='run_history_mock_idx'),
+            models.Index(fields=['idf_file', '-created_at', '-id'], name='run_history_idf_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='run_history_status_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.simulation_id} - {self.total_energy} kWh"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
+
+    def apply_results(self, results: dict) -> None:
+        """Copy a results payload from EnergyPlusService onto this run."""
+        self.used_mock_data = results.get("used_mock_data", False)
+        self.total_energy = results["total_energy"]
+        self.energy_by_type = results.get("energy_by_type", {})
+        for category in END_USE_CATEGORIES:
+            setattr(self, f"{category}_energy", self.energy_by_type.get(category))
+        self.energy_breakdown = results.get("energy_breakdown", [])
+        self.additional_info = results.get("additional_info")
+
+
+class SimulationCacheEntry(models.Model):
+    """Index of completed EnergyPlus results keyed by a hash of their inputs."""
+
+    cache_key = models.CharField(max_length=64, unique=True)
+    simulation_id = models.CharField(max_length=64)
+    results = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_hit_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name_plural = 'simulation cache entries'
+
+    def __str__(self) -> str:
+        return f"{self.cache_key[:12]} -> {self.simulation_id}"
+
+
+class SimulationSummary(models.Model):
+    """Running totals of the completed runs of one group (see analytics.py)."""
+
+    class Dimension(models.TextChoices):
+        IDF_FILE = 'idf_file', 'IDF file'
+        BUILDING_TYPE = 'building_type', 'Building type'
+        DAY = 'day', 'Day'
+
+    dimension = models.CharField(max_length=16, choices=Dimension.choices)
+    key = models.CharField(max_length=255)
+    used_mock_data = models.BooleanField()
+    runs = models.PositiveIntegerField(default=0)
+    total_energy_sum = models.FloatField(default=0)
+    total_energy_min = models.FloatField(blank=True, null=True)
+    total_energy_max = models.FloatField(blank=True, null=True)
+    cooling_energy_sum = models.FloatField(default=0)
+    heating_energy_sum = models.FloatField(default=0)
+    lighting_energy_sum = models.FloatField(default=0)
+    equipment_energy_sum = models.FloatField(default=0)
+    ventilation_energy_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'simulation summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key', 'used_mock_data'], name='summary_group_uniq'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.dimension}={self.key} ({self.runs} runs)"
+
+
+class SimulationSummaryBucket(models.Model):
+    """Runs of a summary group whose total energy falls in one histogram bucket."""
+
+    summary = models.ForeignKey(SimulationSummary, on_delete=models.CASCADE, related_name='buckets')
+    bucket = models.IntegerField()
+    runs = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['summary', 'bucket'], name='summary_bucket_uniq'),
+        ]
+
+
+class SimulationInput(models.Model):
+    """An input IDF stored by content hash, for workers without the inputs directory."""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    content = models.TextField()
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+class WeatherFile(models.Model):
+    """An EPW weather file in the weather registry (see weather.py).
+
+    The EPW itself is kept here so any machine can rebuild its local cache;
+    the location fields and ``summary`` are read from it once, on upload.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    content = models.BinaryField()
+    size = models.PositiveBigIntegerField()
+    city = models.CharField(max_length=128, blank=True)
+    state = models.CharField(max_length=64, blank=True)
+    country = models.CharField(max_length=64, blank=True)
+    source = models.CharField(max_length=64, blank=True)
+    wmo = models.CharField(max_length=16, blank=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    time_zone = models.FloatField(blank=True, null=True)
+    elevation = models.FloatField(blank=True, null=True)
+    hours = models.PositiveIntegerField()
+    # Degree days, design conditions and annual statistics
+    summary = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['country', 'state', 'city', 'name']
+
+    def __str__(self) -> str:
+        return self.location or self.name
+
+    @property
+    def location(self) -> str:
+        return ', '.join(part for part in (self.city, self.state, self.country) if part)
+
+
+class SimulationWorker(models.Model):
+    """A worker process claiming jobs from the database (see distributed.py)."""
+
+    worker_id = models.CharField(max_length=128, unique=True)
+    hostname = models.CharField(max_length=255)
+    slots = models.PositiveIntegerField()
+    started_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['hostname', 'worker_id']
+
+    def __str__(self) -> str:
+        return f"{self.worker_id} ({self.slots} slots)"
@@ -0,0 +1,173 @@
+"""
+Fast previews of annual simulations.
+
+A preview runs a shortened copy of the model: each weather-file
+``RunPeriod`` is replaced by ``ENERGYPLUS_PREVIEW_WINDOWS`` windows of
+``ENERGYPLUS_PREVIEW_DAYS`` days spread evenly over it (so every season is
+sampled) and the sizing-period simulations are switched off in
+``SimulationControl`` (sizing calculations themselves still run). The
+energy totals of the windows are then scaled up by simulated days to an
+estimate for the whole period, flagged as such in the results.
+
+Previews only apply to runs with a weather file: without one EnergyPlus
+simulates nothing but the design days, which is already short.
+
+The preview is the first job of its ``SimulationRun`` on the worker pool;
+the full run is queued afterwards on the same run, and when it finishes
+``preview_error`` records how far off the preview was.
+"""
+import copy
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.conf import settings
+
+from .csv_output import MONTH_START_DAY
+from .idf import IDFObject, parse_text, serialize
+
+# additional_info entries that are energy totals and scale with the period
+ENERGY_INFO_KEYS = ('eui', 'total_site_energy')
+
+
+@dataclass(frozen=True)
+class PreviewModel:
+    """A shortened model and how to scale its results to the full run."""
+
+    idf_text: str
+    simulated_days: int
+    full_days: int
+
+    @property
+    def scale_factor(self) -> float:
+        return self.full_days / self.simulated_days
+
+
+def _day_of_year(month: int, day: int) -> int:
+    return MONTH_START_DAY[min(max(month, 1), 12) - 1] + day
+
+
+def _month_day(day_of_year: int):
+    month = max(i for i, start in enumerate(MONTH_START_DAY) if start < day_of_year) + 1
+    return month, day_of_year - MONTH_START_DAY[month - 1]
+
+
+def _period_days(period: dict) -> List[int]:
+    """Days of the year covered by a run period, in order (wrapping at new year)."""
+    begin = _day_of_year(period["begin_month"], period["begin_day"])
+    end = _day_of_year(period["end_month"], period["end_day"])
+    if end >= begin:
+        return list(range(begin, end + 1))
+    return list(range(begin, 366)) + list(range(1, end + 1))
+
+
+def _windows(days: List[int], count: int, length: int) -> List[List[int]]:
+    """``count`` contiguous windows of ``length`` days spread evenly over ``days``."""
+    windows = []
+    step = len(days) / count
+    for i in range(count):
+        start = min(max(int((i + 0.5) * step - length / 2), 0), len(days) - length)
+        window = days[start:start + length]
+        # A window crossing new year can't be one RunPeriod; keep the December part.
+        if window[-1] < window[0]:
+            window = [day for day in window if day >= window[0]]
+        windows.append(window)
+    return windows
+
+
+def make_preview(idf_text: str, has_weather_file: bool, windows: Optional[int] = None,
+                 window_days: Optional[int] = None) -> Optional[PreviewModel]:
+    """Shorten a model for a preview; None when there is nothing to shorten.
+
+    Without a weather file the RunPeriods aren't simulated at all, so there
+    is never anything to shorten.
+    """
+    if not has_weather_file:
+        return None
+    windows = windows or settings.ENERGYPLUS_PREVIEW_WINDOWS
+    window_days = window_days or settings.ENERGYPLUS_PREVIEW_DAYS
+    model = parse_text(idf_text)
+    control = model.first('SimulationControl')
+    if control is not None and len(control.fields) >= 5 and control.fields[4].lower() == 'no':
+        return None
+
+    # EnergyPlus 9.0 added begin/end year fields after each date.
+    begin_fields, end_fields, year_fields = (2, 3), (5, 6), (4, 7)
+    major = (model.version or '').split('.')[0]
+    if major.isdigit() and int(major) < 9:
+        begin_fields, end_fields, year_fields = (2, 3), (4, 5), None
+
+    periods = model.run_periods
+    full_days = sum(len(_period_days(period)) for period in periods)
+    if not periods or full_days <= windows * window_days:
+        return None
+
+    replacements = {}
+    simulated_days = 0
+    for original, period in zip(model.get('RunPeriod'), periods):
+        days = _period_days(period)
+        if len(days) <= windows * window_days:
+            simulated_days += len(days)
+            continue
+        shortened = []
+        for i, window in enumerate(_windows(days, windows, window_days), start=1):
+            obj = IDFObject(original.class_name, list(original.fields))
+            width = max(end_fields + (year_fields or ()))
+            obj.fields.extend([''] * (width - len(obj.fields)))
+            obj.fields[0] = f"{original.name or 'RunPeriod'} preview {i}"
+            for (month_field, day_field), day_of_year in ((begin_fields, window[0]), (end_fields, window[-1])):
+                month, day = _month_day(day_of_year)
+                obj.fields[month_field - 1], obj.fields[day_field - 1] = str(month), str(day)
+            if year_fields:
+                obj.fields[year_fields[1] - 1] = obj.fields[year_fields[0] - 1]
+            shortened.append(obj)
+            simulated_days += len(window)
+        replacements[id(original)] = shortened
+
+    objects = []
+    for obj in model.objects:
+        if id(obj) in replacements:
+            objects.extend(replacements[id(obj)])
+        elif obj is control:
+            # Skip the design-day simulations; sizing calculations still run.
+            obj = IDFObject(obj.class_name, list(obj.fields) + [''] * (5 - len(obj.fields)))
+            obj.fields[3] = 'No'
+            objects.append(obj)
+        else:
+            objects.append(obj)
+    if control is None:
+        objects.append(IDFObject('SimulationControl', ['', '', '', 'No', 'Yes']))
+    return PreviewModel(serialize(objects), simulated_days, full_days)
+
+
+def extrapolate(results: dict, preview: PreviewModel) -> dict:
+    """Scale a preview's energy results to the full period and flag them."""
+    factor = preview.scale_factor
+    results = copy.deepcopy(results)
+    if results.get("total_energy") is not None:
+        results["total_energy"] = round(results["total_energy"] * factor, 2)
+    results["energy_by_type"] = {
+        category: round(value * factor, 2) for category, value in (results.get("energy_by_type") or {}).items()
+    }
+    for item in results.get("energy_breakdown") or []:
+        item["value"] = round(item["value"] * factor, 2)
+    info = results.setdefault("additional_info", {})
+    for key in ENERGY_INFO_KEYS:
+        if isinstance(info.get(key), (int, float)):
+            info[key] = round(info[key] * factor, 2)
+    if results.get("total_energy") is not None:
+        info["total_consumption"] = f"{results['total_energy']:,.0f} kWh"
+    info["preview"] = True
+    results["preview"] = {
+        "extrapolated": True,
+        "simulated_days": preview.simulated_days,
+        "full_days": preview.full_days,
+        "scale_factor": round(factor, 4),
+    }
+    return results
+
+
+def relative_error(preview_total: Optional[float], full_total: Optional[float]) -> Optional[float]:
+    """(preview - full) / full, or None when it can't be computed."""
+    if preview_total is None or not full_total:
+        return None
+    return (preview_total - full_total) / full_total
@@ -0,0 +1,182 @@
+"""
+Opt-in profiling of a single simulation request.
+
+A staff user can add ``X-Profile: 1`` (or ``?profile=1``) to
+``POST /api/simulation/run``. The view then runs under cProfile and
+tracemalloc, and so does the queued job it starts, so the capture covers
+the view, ``run_simulation`` and the output parsing. The results are saved in
+``<ENERGYPLUS_PROFILE_DIR>/<simulation_id>/``:
+
+- ``request.pstats`` / ``job.pstats``: the raw profiles, for ``pstats`` or snakeviz
+- ``request.txt`` / ``job.txt``: wall time, the slowest functions and the
+  top allocation sites
+
+The run's admin page links to these files. Captures are limited to
+``ENERGYPLUS_PROFILE_MAX_PER_HOUR`` per process, because tracemalloc traces
+every thread while it is on. Requests without the flag only pay for one
+header and one query-string lookup.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from functools import wraps
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+
+HEADER = 'X-Profile'
+QUERY_PARAM = 'profile'
+STATUS_HEADER = 'X-Profile-Status'
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+# How long a job waits for a request capture to release tracemalloc.
+TRACEMALLOC_WAIT_SECONDS = 10
+
+_tracemalloc_lock = threading.Lock()
+
+
+def profile_dir(simulation_id: str) -> Path:
+    return Path(settings.ENERGYPLUS_PROFILE_DIR) / simulation_id
+
+
+def requested(request) -> bool:
+    """Whether the request asks to be profiled (says nothing about permission)."""
+    value = request.headers.get(HEADER) or request.GET.get(QUERY_PARAM)
+    return bool(value) and value.lower() in TRUE_VALUES
+
+
+class RateLimiter:
+    """At most ``limit`` events per sliding ``window`` seconds."""
+
+    def __init__(self, window: float = 3600.0):
+        self.window = window
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def allow(self, limit: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._events and self._events[0] <= now - self.window:
+                self._events.popleft()
+            if len(self._events) >= limit:
+                return False
+            self._events.append(now)
+            return True
+
+
+_limiter = RateLimiter()
+
+
+def admit(request) -> str:
+    """``captured`` if the request may be profiled, else why not."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        return 'forbidden'
+    if settings.ENERGYPLUS_PROFILE_MAX_PER_HOUR <= 0:
+        return 'disabled'
+    if not _limiter.allow(settings.ENERGYPLUS_PROFILE_MAX_PER_HOUR):
+        return 'rate-limited'
+    return 'captured'
+
+
+class Capture:
+    """cProfile (this thread) and tracemalloc (process-wide) around a block.
+
+    Only one capture traces allocations at a time; a capture that can't get
+    tracemalloc within ``wait`` seconds records the CPU profile only.
+    """
+
+    def __init__(self, wait: float = 0):
+        self.wait = wait
+        self.profiler = cProfile.Profile()
+        self.tracing = False
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+        self.seconds = 0.0
+
+    def __enter__(self) -> 'Capture':
+        if _tracemalloc_lock.acquire(timeout=self.wait):
+            if tracemalloc.is_tracing():
+                # Started outside this module (e.g. PYTHONTRACEMALLOC): leave it alone.
+                _tracemalloc_lock.release()
+            else:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self.tracing = True
+        self._start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.disable()
+        self.seconds = time.perf_counter() - self._start
+        if self.tracing:
+            try:
+                self.snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+                ))
+                _, self.peak_bytes = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                _tracemalloc_lock.release()
+
+    def summary(self) -> str:
+        out = io.StringIO()
+        out.write(f"Wall time: {self.seconds:.3f} s\n")
+        if self.snapshot is not None:
+            out.write(f"Peak traced memory: {self.peak_bytes / 1024 ** 2:.1f} MiB\n")
+        else:
+            out.write("Allocations not traced (another capture held tracemalloc)\n")
+        out.write(f"\nTop {TOP_FUNCTIONS} functions by cumulative time\n")
+        pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        if self.snapshot is not None:
+            out.write(f"\nTop {TOP_ALLOCATIONS} allocation sites (memory still held at the end)\n")
+            for stat in self.snapshot.statistics('traceback')[:TOP_ALLOCATIONS]:
+                out.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                out.write('\n'.join(f"  {line}" for line in stat.traceback.format(limit=TRACEMALLOC_FRAMES)))
+                out.write('\n')
+        return out.getvalue()
+
+    def save(self, directory: Path, name: str) -> List[str]:
+        """Write ``<name>.pstats`` and ``<name>.txt``; returns the file names."""
+        directory.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(str(directory / f"{name}.pstats"))
+        (directory / f"{name}.txt").write_text(self.summary())
+        return [f"{name}.pstats", f"{name}.txt"]
+
+
+def profiled(view):
+    """Profile a run-submitting view when a staff user asks for it.
+
+    Sets ``request.profiling`` so the view can flag the run for a job
+    capture too, and reports the outcome in ``X-Profile-Status``.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not requested(request):
+            return view(request, *args, **kwargs)
+        outcome = admit(request)
+        if outcome != 'captured':
+            response = view(request, *args, **kwargs)
+            response[STATUS_HEADER] = outcome
+            return response
+
+        request.profiling = True
+        with Capture() as capture:
+            response = view(request, *args, **kwargs)
+        simulation_id = (getattr(response, 'data', None) or {}).get('simulation_id')
+        if simulation_id:
+            capture.save(profile_dir(simulation_id), 'request')
+        else:
+            outcome = 'discarded'
+        response[STATUS_HEADER] = outcome
+        return response
+    return wrapper
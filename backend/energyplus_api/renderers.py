@@ -0,0 +1,33 @@
+"""
+JSON rendering for the API.
+
+``ORJSONRenderer`` serializes with orjson when it is installed, which is
+several times faster than the standard library encoder on the large
+results and history payloads, and falls back to DRF's ``JSONRenderer``
+otherwise (and for indented output).
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """DRF's JSON renderer, backed by orjson when it is available.
+
+    Types orjson doesn't know (lazy strings, Decimal, querysets, ...) go
+    through DRF's encoder. NaN and infinities are written as null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
@@ -0,0 +1,310 @@
+"""
+Retention of simulation output directories.
+
+Every run leaves ``<ENERGYPLUS_OUTPUT_DIR>/<simulation_id>/`` behind, and
+runs with custom or batch-variant IDFs also leave an input file in
+``ENERGYPLUS_IDF_DIR``. A sweep keeps both bounded:
+
+1. Finished runs are archived: intermediate EnergyPlus files nobody reads
+   are deleted and everything else (including the run's own input IDF) is
+   packed into a single deflate-compressed ``artifacts.zip``. ``results.json``
+   and the time-series store stay next to it uncompressed.
+2. Runs older than ``ENERGYPLUS_RETENTION_MAX_AGE_DAYS`` are removed.
+3. While the output directory is larger than ``ENERGYPLUS_RETENTION_MAX_BYTES``
+   the least recently used runs are removed.
+4. With ``ENERGYPLUS_RETENTION_REMOVE_ORPHANS``, directories without a run
+   row are removed too, unless the result cache still serves them.
+
+Results themselves live in the database, so removing a run's directory never
+breaks the result or history endpoints; ``SimulationRun.artifacts`` records
+what is still on disk.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import SimulationBatch, SimulationCacheEntry, SimulationInput, SimulationRun, SimulationWorker
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_NAME = 'artifacts.zip'
+
+# Files served or read after a run has finished are never archived.
+KEEP_FILES = {'results.json', 'timeseries.f32', 'timeseries.json'}
+
+# Intermediate EnergyPlus outputs that nothing reads back. The .eso/.mtr
+# files are converted to eplusout.csv/eplusmtr.csv by --readvars.
+DISCARD_SUFFIXES = {
+    '.audit', '.bnd', '.eio', '.mtd', '.mdd', '.rdd', '.shd', '.end',
+    '.eso', '.mtr', '.rvaudit', '.sci', '.dxf', '.svg',
+}
+
+FINISHED = [SimulationRun.Status.COMPLETED, SimulationRun.Status.FAILED]
+
+
+def directory_size(path: Path) -> int:
+    """Total size in bytes of the files under a directory."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    return total
+
+
+def _run_inputs(run: SimulationRun, idf_dir: Path) -> Iterable[Path]:
+    """Input files owned by a single run (custom uploads and batch variants)."""
+    if not run.idf_file:
+        return []
+    path = idf_dir / run.idf_file
+    if path.name == f"custom_{run.simulation_id}.idf" or Path(run.idf_file).parts[0] == 'batches':
+        return [path]
+    return []
+
+
+def _remove_inputs(run: SimulationRun, idf_dir: Path) -> None:
+    for path in _run_inputs(run, idf_dir):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        # Drop the batch directory once its last variant is gone.
+        if path.parent != idf_dir:
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+
+
+def _mark(run: SimulationRun, artifacts: str, size: int) -> None:
+    SimulationRun.objects.filter(pk=run.pk).update(
+        artifacts=artifacts, artifacts_bytes=size, updated_at=timezone.now()
+    )
+    run.artifacts, run.artifacts_bytes = artifacts, size
+
+
+def archive_run(run: SimulationRun, output_dir: Optional[Path] = None,
+                idf_dir: Optional[Path] = None) -> int:
+    """Compress a finished run's directory in place; returns the bytes freed."""
+    output_dir = output_dir or settings.ENERGYPLUS_OUTPUT_DIR
+    idf_dir = idf_dir or settings.ENERGYPLUS_IDF_DIR
+    run_dir = output_dir / run.simulation_id
+    if not run_dir.is_dir():
+        _mark(run, SimulationRun.Artifacts.REMOVED, 0)
+        return 0
+
+    before = directory_size(run_dir)
+    archive = run_dir / ARCHIVE_NAME
+    members = []
+    with zipfile.ZipFile(run_dir / (ARCHIVE_NAME + '.tmp'), 'w', zipfile.ZIP_DEFLATED) as zf:
+        # Re-archiving keeps whatever an earlier archive already holds.
+        if archive.exists():
+            with zipfile.ZipFile(archive) as previous:
+                for info in previous.infolist():
+                    zf.writestr(info, previous.read(info))
+        for path in sorted(run_dir.rglob('*')):
+            if not path.is_file() or path.parent == run_dir and (
+                    path.name in KEEP_FILES or path.name.startswith(ARCHIVE_NAME)):
+                continue
+            if path.suffix.lower() not in DISCARD_SUFFIXES:
+                zf.write(path, path.relative_to(run_dir).as_posix())
+            members.append(path)
+        for path in _run_inputs(run, idf_dir):
+            if path.is_file():
+                zf.write(path, f"inputs/{path.name}")
+
+    # Only delete the originals once the archive is complete.
+    os.replace(run_dir / (ARCHIVE_NAME + '.tmp'), archive)
+    for path in members:
+        path.unlink(missing_ok=True)
+    for path in sorted(run_dir.rglob('*'), reverse=True):
+        if path.is_dir():
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+    _remove_inputs(run, idf_dir)
+
+    after = directory_size(run_dir)
+    _mark(run, SimulationRun.Artifacts.ARCHIVED, after)
+    return max(before - after, 0)
+
+
+def remove_run(run: SimulationRun, output_dir: Optional[Path] = None,
+               idf_dir: Optional[Path] = None) -> int:
+    """Delete a run's directory and inputs; returns the bytes freed."""
+    output_dir = output_dir or settings.ENERGYPLUS_OUTPUT_DIR
+    idf_dir = idf_dir or settings.ENERGYPLUS_IDF_DIR
+    run_dir = output_dir / run.simulation_id
+    freed = directory_size(run_dir) if run_dir.is_dir() else 0
+    shutil.rmtree(run_dir, ignore_errors=True)
+    shutil.rmtree(Path(settings.ENERGYPLUS_PROFILE_DIR) / run.simulation_id, ignore_errors=True)
+    _remove_inputs(run, idf_dir)
+    # Later cache hits would point at the removed directory.
+    SimulationCacheEntry.objects.filter(simulation_id=run.simulation_id).delete()
+    _mark(run, SimulationRun.Artifacts.REMOVED, 0)
+    return freed
+
+
+def _last_used(runs: Iterable[SimulationRun]) -> Dict[str, object]:
+    """When each run's outputs were last used: finished, or served from the cache."""
+    last_used = {run.simulation_id: run.finished_at or run.created_at for run in runs}
+    hits = SimulationCacheEntry.objects.filter(
+        simulation_id__in=list(last_used)
+    ).values_list('simulation_id', 'last_hit_at')
+    for simulation_id, last_hit_at in hits:
+        if last_hit_at and last_hit_at > last_used[simulation_id]:
+            last_used[simulation_id] = last_hit_at
+    return last_used
+
+
+def remove_orphans(output_dir: Path, before: float) -> Tuple[int, int]:
+    """Remove output directories without a run row; returns how many and the bytes freed.
+
+    Only directories last modified before ``before`` (a timestamp) go, and
+    those the result cache refers to are kept, since cache hits read their
+    time series from there.
+    """
+    names = {entry.name for entry in os.scandir(output_dir) if entry.is_dir()}
+    known = set(SimulationRun.objects.filter(
+        simulation_id__in=list(names)
+    ).values_list('simulation_id', flat=True))
+    known.update(SimulationCacheEntry.objects.filter(
+        simulation_id__in=list(names)
+    ).values_list('simulation_id', flat=True))
+    removed = freed = 0
+    for name in names - known:
+        path = output_dir / name
+        if path.stat().st_mtime < before:
+            freed += directory_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed, freed
+
+
+def sweep(max_age_days: Optional[int] = None, max_bytes: Optional[int] = None,
+          archive_after_minutes: Optional[int] = None,
+          orphans: Optional[bool] = None) -> dict:
+    """Archive, expire and evict run directories; returns what was done.
+
+    Arguments default to the ``ENERGYPLUS_RETENTION_*`` settings; a limit of
+    0 disables it.
+    """
+    output_dir = settings.ENERGYPLUS_OUTPUT_DIR
+    idf_dir = settings.ENERGYPLUS_IDF_DIR
+    if max_age_days is None:
+        max_age_days = settings.ENERGYPLUS_RETENTION_MAX_AGE_DAYS
+    if max_bytes is None:
+        max_bytes = settings.ENERGYPLUS_RETENTION_MAX_BYTES
+    if archive_after_minutes is None:
+        archive_after_minutes = settings.ENERGYPLUS_RETENTION_ARCHIVE_AFTER_MINUTES
+    if orphans is None:
+        orphans = settings.ENERGYPLUS_RETENTION_REMOVE_ORPHANS
+    now = timezone.now()
+    grace = now - timedelta(minutes=archive_after_minutes)
+    stats = {"archived": 0, "expired": 0, "evicted": 0, "orphans": 0, "freed_bytes": 0}
+
+    # Opt-in: a fresh database doesn't know the directories already on
+    # disk (such as the sample outputs shipped with the repository).
+    if orphans and output_dir.is_dir():
+        stats["orphans"], freed = remove_orphans(output_dir, grace.timestamp())
+        stats["freed_bytes"] += freed
+
+    finished = SimulationRun.objects.filter(status__in=FINISHED)
+
+    to_archive = finished.filter(artifacts=SimulationRun.Artifacts.PRESENT, finished_at__lt=grace)
+    for run in to_archive.iterator():
+        stats["freed_bytes"] += archive_run(run, output_dir, idf_dir)
+        stats["archived"] += 1
+
+    # A completed batch's uploaded base IDF is no longer needed: every
+    # variant has its own copy.
+    for batch in SimulationBatch.objects.filter(
+        status=SimulationBatch.Status.COMPLETED, finished_at__lt=grace
+    ).only('batch_id'):
+        (idf_dir / f"custom_{batch.batch_id}.idf").unlink(missing_ok=True)
+
+    # Inputs stored for remote workers (see inputs.py) are only needed until
+    # their runs finish; worker rows outlive crashed workers.
+    SimulationInput.objects.filter(created_at__lt=grace).exclude(
+        sha256__in=SimulationRun.objects.exclude(status__in=FINISHED).values('input_hash')
+    ).delete()
+    SimulationWorker.objects.filter(last_seen_at__lt=now - timedelta(days=1)).delete()
+
+    if max_age_days:
+        expired = finished.filter(
+            finished_at__lt=now - timedelta(days=max_age_days)
+        ).exclude(artifacts=SimulationRun.Artifacts.REMOVED)
+        for run in expired.iterator():
+            stats["freed_bytes"] += remove_run(run, output_dir, idf_dir)
+            stats["expired"] += 1
+
+    if max_bytes and output_dir.is_dir():
+        total = directory_size(output_dir)
+        if total > max_bytes:
+            candidates = list(finished.exclude(artifacts=SimulationRun.Artifacts.REMOVED).only(
+                'pk', 'simulation_id', 'idf_file', 'created_at', 'finished_at'
+            ))
+            last_used = _last_used(candidates)
+            candidates.sort(key=lambda run: last_used[run.simulation_id])
+            for run in candidates:
+                if total <= max_bytes:
+                    break
+                freed = remove_run(run, output_dir, idf_dir)
+                total -= freed
+                stats["freed_bytes"] += freed
+                stats["evicted"] += 1
+
+    return stats
+
+
+_periodic_thread: Optional[threading.Thread] = None
+_periodic_lock = threading.Lock()
+
+
+def _periodic_loop(interval: int) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            stats = sweep()
+            if any(stats.values()):
+                logger.info("Retention sweep: %s", stats, extra=stats)
+        except Exception:
+            logger.exception("Retention sweep failed")
+        finally:
+            close_old_connections()
+
+
+def start_periodic_sweep() -> None:
+    """Sweep every ``ENERGYPLUS_RETENTION_INTERVAL_SECONDS`` (0 disables)."""
+    global _periodic_thread
+    interval = settings.ENERGYPLUS_RETENTION_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+    with _periodic_lock:
+        if _periodic_thread is None:
+            _periodic_thread = threading.Thread(
+                target=_periodic_loop, args=(interval,), name="retention-sweep", daemon=True
+            )
+            _periodic_thread.start()
@@ -0,0 +1,185 @@
+"""
+Cost estimates, admission control and job priorities.
+
+Before a job is queued its cost is estimated from the IDF: how many
+timesteps EnergyPlus has to simulate (run periods and design days times
+``Timestep``) multiplied by how much work each timestep is (zones,
+surfaces, HVAC components). The estimate is turned into seconds with the
+runtimes measured for earlier real runs of the same model, or of all
+models when this one hasn't run before.
+
+The estimate drives three things:
+
+- jobs estimated above ``ENERGYPLUS_MAX_JOB_SECONDS`` are rejected when
+  they are submitted instead of tying up a worker;
+- the queue runs short jobs first (see ``priority``);
+- each job gets a timeout proportional to its estimate instead of one
+  fixed value.
+"""
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+
+from .idf import IDFModel, load_model
+from .models import SimulationRun
+
+# Seconds per cost unit until real runs have been measured.
+DEFAULT_SECONDS_PER_UNIT = 2e-5
+# Runs used to calibrate seconds per cost unit.
+CALIBRATION_RUNS = 50
+
+# Object classes whose instances add to the work done every timestep.
+HVAC_PREFIXES = (
+    'airloophvac', 'plantloop', 'condenserloop', 'zonehvac:', 'coil:', 'fan:',
+    'chiller:', 'boiler:', 'coolingtower:', 'pump:', 'airterminal:', 'hvactemplate:',
+    'heatexchanger:', 'humidifier:', 'evaporativecooler:', 'waterheater:',
+)
+
+# Typical number of warmup days EnergyPlus simulates per environment.
+WARMUP_DAYS = 6
+
+# Classes whose fields change how many timesteps are simulated; a batch
+# variant overriding one of them is estimated separately from its base.
+TIMING_CLASSES = {'timestep', 'runperiod', 'simulationcontrol', 'sizingperiod:designday',
+                  'sizingperiod:weatherfiledays'}
+
+DAYS_BEFORE_MONTH = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+
+@dataclass(frozen=True)
+class JobEstimate:
+    """Estimated cost of one simulation run."""
+
+    cost_units: float
+    seconds: float
+    timeout: int
+
+    def as_dict(self) -> dict:
+        return {
+            "cost_units": round(self.cost_units),
+            "estimated_seconds": round(self.seconds, 1),
+            "timeout_seconds": self.timeout,
+        }
+
+
+def simulated_days(model: IDFModel) -> int:
+    """Days EnergyPlus simulates: the run periods plus the design days."""
+    control = model.first('SimulationControl')
+    # Fields 4 and 5: run sizing periods / weather file run periods (default Yes).
+    fields = [value.lower() for value in (control.fields if control else [])]
+    run_sizing = len(fields) < 4 or fields[3] != 'no'
+    run_weather = len(fields) < 5 or fields[4] != 'no'
+
+    days = environments = 0
+    if run_weather:
+        for period in model.run_periods:
+            begin = DAYS_BEFORE_MONTH[min(max(period["begin_month"], 1), 12) - 1] + period["begin_day"]
+            end = DAYS_BEFORE_MONTH[min(max(period["end_month"], 1), 12) - 1] + period["end_day"]
+            days += end - begin + 1 if end >= begin else 365 - begin + end + 1
+            environments += 1
+    if run_sizing:
+        design_days = len(model.get('SizingPeriod:DesignDay'))
+        weather_file_days = len(model.get('SizingPeriod:WeatherFileDays'))
+        days += design_days + 7 * weather_file_days
+        environments += design_days + weather_file_days
+    # Every environment is repeated for some warmup days before it starts.
+    return max(days + WARMUP_DAYS * environments, 1)
+
+
+def cost_units(model: IDFModel) -> float:
+    """Model complexity times simulated timesteps, in arbitrary units."""
+    zones = len(model.get('Zone'))
+    surfaces = sum(
+        len(objects) for class_name, objects in model.classes.items()
+        if class_name.startswith(('buildingsurface:', 'fenestrationsurface:', 'wall:', 'roofceiling:',
+                                  'floor:', 'window', 'door'))
+    )
+    hvac = sum(
+        len(objects) for class_name, objects in model.classes.items()
+        if class_name.startswith(HVAC_PREFIXES)
+    )
+    timesteps = simulated_days(model) * 24 * model.timesteps_per_hour
+    return timesteps * (1 + zones + 0.1 * surfaces + 0.5 * hvac)
+
+
+def seconds_per_unit(idf_file: Optional[str] = None) -> float:
+    """Measured seconds per cost unit, from runs of this model if there are any."""
+    measured = SimulationRun.objects.filter(
+        runtime_seconds__isnull=False, cost_units__gt=0
+    ).order_by('-finished_at')
+    rates = []
+    if idf_file:
+        rates = [r / c for r, c in measured.filter(idf_file=idf_file).values_list(
+            'runtime_seconds', 'cost_units')[:CALIBRATION_RUNS]]
+    if not rates:
+        rates = [r / c for r, c in measured.values_list('runtime_seconds', 'cost_units')[:CALIBRATION_RUNS]]
+    return statistics.median(rates) if rates else DEFAULT_SECONDS_PER_UNIT
+
+
+def estimate(model: IDFModel, idf_file: Optional[str] = None,
+             rate: Optional[float] = None) -> JobEstimate:
+    """Estimate the cost, runtime and timeout of running a model.
+
+    ``rate`` (seconds per cost unit) skips the calibration query when many
+    models are estimated at once.
+    """
+    units = cost_units(model)
+    seconds = units * (rate if rate is not None else seconds_per_unit(idf_file))
+    timeout = max(seconds * settings.ENERGYPLUS_TIMEOUT_FACTOR, settings.ENERGYPLUS_SIMULATION_TIMEOUT)
+    if settings.ENERGYPLUS_MAX_JOB_SECONDS > 0:
+        # 0 disables the budget, and with it the upper bound
+        timeout = min(timeout, settings.ENERGYPLUS_MAX_JOB_SECONDS * settings.ENERGYPLUS_TIMEOUT_FACTOR)
+    return JobEstimate(cost_units=units, seconds=seconds, timeout=int(timeout))
+
+
+def estimate_file(idf_file: Path) -> JobEstimate:
+    """Estimate an IDF on disk (parsed through the model cache)."""
+    return estimate(load_model(idf_file), idf_file.name)
+
+
+def touches_timing(overrides: List[dict]) -> bool:
+    """Whether batch overrides can change the number of simulated timesteps."""
+    return any(str(override.get("object", "")).lower() in TIMING_CLASSES for override in overrides)
+
+
+def apply_estimate(run: SimulationRun, job: JobEstimate) -> None:
+    """Copy an estimate onto a (not yet saved) run."""
+    run.cost_units = job.cost_units
+    run.estimated_seconds = job.seconds
+    run.timeout_seconds = job.timeout
+
+
+def admit(job: JobEstimate) -> None:
+    """Reject a job whose estimated runtime exceeds the configured budget."""
+    budget = settings.ENERGYPLUS_MAX_JOB_SECONDS
+    if budget and job.seconds > budget:
+        raise ValueError(
+            f"Simulation rejected: estimated runtime {job.seconds:.0f} s exceeds the "
+            f"{budget} s budget; shorten the RunPeriod or use fewer timesteps per hour"
+        )
+
+
+def priority(run: SimulationRun, preview: bool = False) -> float:
+    """Queue priority (lower runs first): enqueue time plus estimated runtime.
+
+    Short jobs overtake long ones submitted shortly before them, but a long
+    job is never starved: every later submission sorts after it once the
+    wall clock has moved past its estimated runtime. A preview counts as at
+    most ``ENERGYPLUS_PREVIEW_TIMEOUT`` seconds.
+    """
+    seconds = run.estimated_seconds or 0.0
+    if preview:
+        seconds = min(seconds, settings.ENERGYPLUS_PREVIEW_TIMEOUT)
+    return time.time() + seconds
+
+
+def record_runtime(run: SimulationRun, results: dict) -> None:
+    """Store the measured runtime of a real EnergyPlus run for calibration."""
+    if results.get("used_mock_data") or "cached_from" in (results.get("additional_info") or {}):
+        return
+    if run.started_at is not None and run.finished_at is not None:
+        run.runtime_seconds = (run.finished_at - run.started_at).total_seconds()
@@ -0,0 +1,95 @@
+"""
+Scratch working directories for EnergyPlus runs.
+
+EnergyPlus writes a dozen intermediate files per run (``.eso``, ``.audit``,
+``.shd``, ...) and rewrites some of them many times. Running every job
+directly in the persistent outputs directory makes parallel runs compete for
+that one volume, so each run gets an isolated directory under
+``ENERGYPLUS_SCRATCH_DIR`` instead (ideally a tmpfs such as ``/dev/shm``).
+
+When the run is over, only the files matching ``ENERGYPLUS_PERSIST_ARTIFACTS``
+are moved to ``<ENERGYPLUS_OUTPUT_DIR>/<simulation_id>/``; those that also
+match ``ENERGYPLUS_COMPRESS_ARTIFACTS`` are gzip-compressed on the way.
+The scratch directory is removed whatever the outcome of the run.
+"""
+import fnmatch
+import gzip
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+
+COPY_CHUNK = 1024 * 1024
+
+
+def scratch_root() -> Path:
+    """Directory under which run directories are created."""
+    root = settings.ENERGYPLUS_SCRATCH_DIR
+    return Path(root) if root else Path(tempfile.gettempdir()) / 'energyplus'
+
+
+def create(simulation_id: str) -> Path:
+    """Create an empty, private working directory for one run."""
+    root = scratch_root()
+    root.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f"{simulation_id}-", dir=root))
+
+
+def cleanup(work_path: Path) -> None:
+    shutil.rmtree(work_path, ignore_errors=True)
+
+
+@contextmanager
+def workspace(simulation_id: str) -> Iterator[Path]:
+    """A scratch directory that is removed on success, failure and timeout."""
+    work_path = create(simulation_id)
+    try:
+        yield work_path
+    finally:
+        cleanup(work_path)
+
+
+def _matches(name: str, patterns: List[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def is_persisted(name: str) -> bool:
+    """Whether an artifact of this name is kept after a run."""
+    return _matches(name, settings.ENERGYPLUS_PERSIST_ARTIFACTS)
+
+
+def _compress(source: Path, target: Path) -> None:
+    tmp = target.with_name(target.name + '.tmp')
+    with open(source, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+    os.replace(tmp, target)
+    source.unlink()
+
+
+def persist(work_path: Path, output_path: Path,
+            keep: Optional[List[str]] = None, compress: Optional[List[str]] = None) -> List[str]:
+    """Move the allowlisted artifacts of a run to persistent storage.
+
+    Returns the names written to ``output_path``. Everything else stays in
+    the scratch directory and disappears with it.
+    """
+    keep = settings.ENERGYPLUS_PERSIST_ARTIFACTS if keep is None else keep
+    compress = settings.ENERGYPLUS_COMPRESS_ARTIFACTS if compress is None else compress
+    output_path.mkdir(parents=True, exist_ok=True)
+    written = []
+    for path in sorted(work_path.iterdir()):
+        if not path.is_file() or not _matches(path.name, keep):
+            continue
+        if _matches(path.name, compress):
+            target = output_path / (path.name + '.gz')
+            _compress(path, target)
+        else:
+            target = output_path / path.name
+            # A plain rename within one filesystem, a copy from tmpfs.
+            shutil.move(str(path), str(target))
+        written.append(target.name)
+    return written
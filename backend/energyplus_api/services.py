@@ -1,75 +1,214 @@
 """
 Service module for EnergyPlus simulation management.
 """
-import os
 import subprocess
 import json
-import csv
+import logging
 import uuid
-import sys
 from pathlib import Path
 from django.conf import settings
 from typing import Optional, Tuple
 
+from . import csv_output, html_output, idf, metrics, scratch, sql_output, timeseries
+from .cache import compute_cache_key, result_cache
+from .catalog import get_catalog
+from .discovery import EnergyPlusInstallation, get_registry
+from .weather import epw_path, get_weather_file
+
+logger = logging.getLogger(__name__)
+
 
 class EnergyPlusService:
     """Handles EnergyPlus simulation runs."""
     
-    def __init__(self):
+    def __init__(self, energyplus_version: Optional[str] = None, weather: Optional[str] = None):
+        """``weather`` is the ID or SHA-256 of a registry weather file (see
+        ``weather``); without one EnergyPlus runs only the design days.
+        """
         self.idf_dir = settings.ENERGYPLUS_IDF_DIR
         self.output_dir = settings.ENERGYPLUS_OUTPUT_DIR
-        self.energyplus_executable = self._find_energyplus_executable()
+        installation = self._find_energyplus_installation(energyplus_version)
+        self.energyplus_executable = installation.executable if installation else None
+        self.energyplus_version = installation.version if installation else None
+        # Raises ValueError for an unknown weather file, like a missing version
+        self.weather_file = get_weather_file(weather) if weather else None
     
-    def run_simulation(self, message: str, idf_content: Optional[str] = None) -> dict:
-        """Run simulation and return results."""
-        # Generate unique simulation ID
-        simulation_id = f"sim_{uuid.uuid4().hex[:8]}"
-        output_path = self.output_dir / simulation_id
-        
-        # Create output directory
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Use custom IDF content if provided
+    def _find_energyplus_installation(self, version: Optional[str] = None) -> Optional[EnergyPlusInstallation]:
+        """Look up EnergyPlus in the process-wide registry.
+
+        Without a version the newest installation is used. Pinning a version
+        that isn't installed is an error rather than a silent mock fallback.
+        """
+        installation = get_registry().get(version)
+        if version and installation is None:
+            raise ValueError(f"EnergyPlus version {version} is not installed")
+        return installation
+    
+    def new_simulation_id(self) -> str:
+        """Generate a unique simulation ID."""
+        return f"sim_{uuid.uuid4().hex[:8]}"
+    
+    def resolve_idf(self, message: str, idf_content: Optional[str] = None,
+                    simulation_id: Optional[str] = None) -> Path:
+        """Return the IDF file a request should run, saving custom content first."""
+        with metrics.phase('idf_selection'):
+            return self._resolve_idf(message, idf_content, simulation_id)
+    
+    def _resolve_idf(self, message: str, idf_content: Optional[str],
+                     simulation_id: Optional[str]) -> Path:
         if idf_content:
+            # Reject content that isn't an IDF before it is queued
+            idf.validate(idf_content)
             # Save custom IDF to inputs directory
+            simulation_id = simulation_id or self.new_simulation_id()
+            self.idf_dir.mkdir(parents=True, exist_ok=True)
             idf_file = self.idf_dir / f"custom_{simulation_id}.idf"
             with open(idf_file, 'w') as f:
                 f.write(idf_content)
-        else:
-            # Try to find IDF file based on user message
-            idf_file = self._select_idf_by_message(message)
+            return idf_file
+        
+        # Try to find IDF file based on user message
+        return self._select_idf_by_message(message)
+    
+    def run_simulation(self, message: str, idf_content: Optional[str] = None,
+                       simulation_id: Optional[str] = None,
+                       idf_file: Optional[Path] = None,
+                       use_cache: bool = True,
+                       timeout: Optional[int] = None) -> dict:
+        """Run simulation and return results.
+
+        ``simulation_id`` and ``idf_file`` are passed by the job queue, which
+        allocates the ID and resolves the IDF when the job is submitted.
+        Identical inputs are served from the result cache unless
+        ``use_cache`` is False. ``timeout`` is the job's own limit in seconds
+        (see ``scheduling``); it defaults to ``ENERGYPLUS_SIMULATION_TIMEOUT``.
+        """
+        # Generate unique simulation ID
+        simulation_id = simulation_id or self.new_simulation_id()
+        
+        if idf_file is None:
+            idf_file = self.resolve_idf(message, idf_content, simulation_id)
         
         if not idf_file.exists():
             raise FileNotFoundError(f"IDF file not found: {idf_file}")
         
+        if not (use_cache and self.cache_enabled):
+            return self._execute_simulation(simulation_id, idf_file, timeout)
+        
+        return result_cache.get_or_run(
+            self.cache_key(idf_file),
+            simulation_id,
+            idf_file.name,
+            lambda: self._execute_simulation(simulation_id, idf_file, timeout),
+        )
+    
+    def run_preview(self, idf_text: str, simulation_id: str) -> Tuple[dict, bool]:
+        """Run a shortened model (see ``preview``) in scratch space only.
+
+        Nothing is written to the run's output directory: the full run that
+        follows owns it.
+        """
+        if not self.energyplus_executable:
+            results = self._generate_mock_results()
+            results['note'] = 'Mock data - EnergyPlus not installed'
+            return results, True
+        with scratch.workspace(simulation_id) as work_path:
+            idf_file = work_path / 'preview.idf'
+            with open(idf_file, 'w') as f:
+                f.write(idf_text)
+            return self._run_real_simulation(idf_file, work_path, settings.ENERGYPLUS_PREVIEW_TIMEOUT)
+    
+    @property
+    def cache_enabled(self) -> bool:
+        # Mock runs are cheap and random, so only real runs go through the cache
+        return bool(settings.ENERGYPLUS_RESULT_CACHE_ENABLED and self.energyplus_executable)
+    
+    def cache_key(self, idf_file: Path) -> str:
+        """Result cache key for running an IDF with this weather and EnergyPlus version."""
+        with open(idf_file, 'r', errors='replace') as f:
+            return compute_cache_key(
+                f.read(),
+                weather_hash=self.weather_file.sha256 if self.weather_file else None,
+                energyplus_version=self.energyplus_version,
+            )
+    
+    def _execute_simulation(self, simulation_id: str, idf_file: Path,
+                            timeout: Optional[int] = None) -> dict:
+        """Run EnergyPlus (or the mock fallback) and store results.json.
+
+        EnergyPlus runs in a scratch directory (see ``scratch``); only the
+        allowlisted artifacts are kept in the run's output directory.
+        """
+        output_path = self.output_dir / simulation_id
+        
+        # Create output directory
+        output_path.mkdir(parents=True, exist_ok=True)
+        
         try:
             # Try to run real EnergyPlus simulation
             if self.energyplus_executable:
-                results, used_mock_data = self._run_real_simulation(idf_file, output_path)
+                with scratch.workspace(simulation_id) as work_path:
+                    results, used_mock_data = self._run_real_simulation(idf_file, work_path, timeout)
+                    self.store_results(results, used_mock_data, simulation_id, idf_file, work_path)
             else:
                 # Fallback to mock results if EnergyPlus not installed
-                results = self._generate_mock_results()
+                results = self._mock_fallback('not_installed')
                 results['note'] = 'Mock data - EnergyPlus not installed'
                 used_mock_data = True
-            
-            results.update(
-                {
-                    "simulation_id": simulation_id,
-                    "idf_file": idf_file.name,
-                    "used_mock_data": used_mock_data,
-                }
-            )
-
-            # Store results
-            results_path = output_path / "results.json"
-            with open(results_path, 'w') as f:
-                json.dump(results, f, indent=2)
+                self.store_results(results, used_mock_data, simulation_id, idf_file)
             
             return results
             
         except Exception as e:
             raise Exception(f"Simulation failed: {str(e)}")
     
+    def store_results(self, results: dict, used_mock_data: bool, simulation_id: str, idf_file: Path,
+                      work_path: Optional[Path] = None) -> dict:
+        """Label a results payload with its run and write it to results.json.
+
+        ``work_path`` is the scratch directory EnergyPlus ran in; the time
+        series are extracted there and the allowlisted artifacts moved over.
+        """
+        results.update(
+            {
+                "simulation_id": simulation_id,
+                "idf_file": idf_file.name,
+                "used_mock_data": used_mock_data,
+            }
+        )
+
+        # Store results
+        output_path = self.output_dir / simulation_id
+        output_path.mkdir(parents=True, exist_ok=True)
+        if not used_mock_data:
+            self.store_timeseries(work_path or output_path)
+        written = 0
+        if work_path is not None:
+            with metrics.phase('artifacts'):
+                for name in scratch.persist(work_path, output_path):
+                    written += (output_path / name).stat().st_size
+        results_path = output_path / "results.json"
+        with metrics.phase('results_write'):
+            with open(results_path, 'w') as f:
+                json.dump(results, f, indent=2)
+            written += results_path.stat().st_size
+        metrics.OUTPUT_BYTES.inc(written)
+        
+        return results
+    
+    def store_timeseries(self, output_path: Path) -> None:
+        """Keep the run's interval series in the compact per-run store."""
+        try:
+            with metrics.phase('timeseries'):
+                timeseries.write_store(output_path)
+        except Exception as e:
+            logger.warning("Error storing time series: %s", e)
+    
+    def _mock_fallback(self, reason: str) -> dict:
+        """Mock results standing in for a run EnergyPlus couldn't answer."""
+        metrics.MOCK_FALLBACKS.inc(reason=reason)
+        return self._generate_mock_results()
+    
     def _generate_mock_results(self) -> dict:
         """Generate mock results when EnergyPlus isn't available."""
         import random
@@ -122,7 +261,7 @@ class EnergyPlusService:
                 results.update(self._parse_csv(csv_file))
         
         # Check for HTML output
-        html_files = list(output_path.glob("*.html"))
+        html_files = self._find_html_reports(output_path)
         if html_files:
             # Parse HTML files
             for html_file in html_files:
@@ -135,15 +274,11 @@ class EnergyPlusService:
         data = {}
         
         try:
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Parse specific columns
-                    # TODO: Need to figure out the exact column names from EnergyPlus output
-                    # The output format seems to vary by version
-                    pass
+            energy_by_type = csv_output.summarize_end_uses([csv_file])
+            if energy_by_type:
+                data["energy_by_type"] = energy_by_type
         except Exception as e:
-            print(f"Error parsing CSV: {e}")
+            logger.warning("Error parsing CSV: %s", e)
         
         return data
     
@@ -152,66 +287,70 @@ class EnergyPlusService:
         data = {}
         
         try:
-            with open(html_file, 'r') as f:
-                content = f.read()
-                # Parse HTML content
-                # This would need to be customized based on actual output format
-                pass
+            summary = html_output.read_summary(html_file)
+            if summary:
+                data.update(summary)
         except Exception as e:
-            print(f"Error parsing HTML: {e}")
+            logger.warning("Error parsing HTML: %s", e)
         
         return data
     
-    def _find_energyplus_executable(self) -> Optional[str]:
-        """Find EnergyPlus executable path."""
-        # Check common installation locations
-        possible_paths = [
-            'energyplus',  # If in PATH
-            'EnergyPlus',  # Windows
-            'energyplus.exe',  # Windows with extension
-        ]
-        
-        # Check if in PATH
-        for exe in possible_paths:
-            try:
-                result = subprocess.run(
-                    ['which', exe] if sys.platform != 'win32' else ['where', exe],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    path = result.stdout.strip().split('\n')[0]
-                    if os.path.exists(path):
-                        return path
-            except:
-                pass
-        
-        # Check environment variable
-        energyplus_home = os.environ.get('ENERGYPLUS_HOME')
-        if energyplus_home:
-            exe_path = Path(energyplus_home) / 'energyplus.exe'
-            if exe_path.exists():
-                return str(exe_path)
-        
-        # Check common installation directories
-        common_dirs = [
-            Path('C:/EnergyPlusV24-1-0'),
-            Path('C:/EnergyPlusV24-0-0'),
-            Path('/usr/local/EnergyPlusV24-1-0'),
+    def _find_html_reports(self, output_path: Path) -> list:
+        """EnergyPlus writes the tabular report as eplustbl.htm."""
+        return sorted(output_path.glob("*.htm")) + sorted(output_path.glob("*.html"))
+    
+    def prepare_idf(self, idf_file: Path, output_path: Path) -> Path:
+        """Return the IDF to run, adding Output:SQLite when the model lacks it.
+
+        The patched copy is written to the run's output directory so the
+        original input is left untouched.
+        """
+        with open(idf_file, 'r', errors='replace') as f:
+            patched = sql_output.ensure_sqlite_output(f.read())
+        if patched is None:
+            return idf_file
+        run_idf = output_path / idf_file.name
+        with open(run_idf, 'w') as f:
+            f.write(patched)
+        return run_idf
+    
+    def build_command(self, idf_file: Path, output_path: Path) -> list:
+        """Command line for running EnergyPlus on an IDF.
+
+        Without a weather file EnergyPlus only simulates the design days.
+        """
+        command = [
+            self.energyplus_executable,
+            '-d', str(output_path),
+            '--output-directory', str(output_path),
+            '--readvars',  # convert eplusout.eso to eplusout.csv/eplusmtr.csv
         ]
+        if self.weather_file is not None:
+            # The registry's cached copy; nothing is copied into the run directory
+            command += ['-w', str(epw_path(self.weather_file))]
+        return command + [str(idf_file)]
+    
+    def collect_results(self, returncode: int, output_path: Path, stderr: str = "") -> Tuple[dict, bool]:
+        """Parse the outputs of a finished EnergyPlus process.
+
+        Returns:
+            Tuple containing the results dictionary and a boolean indicating
+            whether the data comes from mock values.
+        """
+        # Check if simulation completed
+        if returncode == 0 or (returncode != 0 and output_path.exists()):
+            # Parse output files
+            with metrics.phase('output_parsing'):
+                results = self._parse_energyplus_output(output_path)
+            is_mock = results.get("metadata", {}).get("source") != "EnergyPlus"
+            return results, is_mock
         
-        for install_dir in common_dirs:
-            if sys.platform == 'win32':
-                exe = install_dir / 'energyplus.exe'
-            else:
-                exe = install_dir / 'energyplus'
-            
-            if exe.exists():
-                return str(exe)
-        
-        return None
+        # If failed, fall back to mock
+        logger.warning("EnergyPlus simulation failed, using mock data: %s", stderr)
+        return self._mock_fallback('failed'), True
     
-    def _run_real_simulation(self, idf_file: Path, output_path: Path) -> Tuple[dict, bool]:
+    def _run_real_simulation(self, idf_file: Path, output_path: Path,
+                             timeout: Optional[int] = None) -> Tuple[dict, bool]:
         """Run actual EnergyPlus simulation.
 
         Returns:
@@ -221,49 +360,37 @@ class EnergyPlusService:
         if not self.energyplus_executable:
             raise Exception("EnergyPlus executable not found")
         
-        # Create weather file (we'll use a simple one for default runs)
-        # For now, we'll skip weather file requirement for basic simulations
-        
         try:
-            # Run EnergyPlus without weather file for basic simulation
-            # Note: This will produce a warning but still run
-            cmd = [
-                self.energyplus_executable,
-                '-d', str(output_path),
-                '--output-directory', str(output_path),
-                str(idf_file)
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minute timeout
-                cwd=str(self.idf_dir)
-            )
-            
-            # Check if simulation completed
-            if result.returncode == 0 or (result.returncode != 0 and output_path.exists()):
-                # Parse output files
-                results = self._parse_energyplus_output(output_path)
-                is_mock = results.get("metadata", {}).get("source") != "EnergyPlus"
-                return results, is_mock
-            else:
-                # If failed, fall back to mock
-                print(f"EnergyPlus simulation failed, using mock data: {result.stderr}")
-                return self._generate_mock_results(), True
+            command = self.build_command(self.prepare_idf(idf_file, output_path), output_path)
+            with metrics.phase('energyplus'):
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout or settings.ENERGYPLUS_SIMULATION_TIMEOUT,
+                    cwd=str(output_path)
+                )
+            return self.collect_results(result.returncode, output_path, result.stderr)
                 
         except subprocess.TimeoutExpired:
-            print("EnergyPlus simulation timed out, using mock data")
-            return self._generate_mock_results(), True
+            metrics.TIMEOUTS.inc()
+            logger.warning("EnergyPlus simulation timed out, using mock data")
+            return self._mock_fallback('timeout'), True
         except Exception as e:
-            print(f"EnergyPlus simulation error: {e}, using mock data")
-            return self._generate_mock_results(), True
+            logger.warning("EnergyPlus simulation error: %s, using mock data", e)
+            return self._mock_fallback('error'), True
     
     def _parse_energyplus_output(self, output_path: Path) -> dict:
         """Parse EnergyPlus output files and extract energy data."""
         import random
         
+        # Prefer the SQLite output: one indexed query instead of a text scan
+        sql_file = output_path / "eplusout.sql"
+        if sql_file.exists():
+            energy_data = self._extract_energy_from_sql(sql_file)
+            if energy_data:
+                return energy_data
+        
         # Try to find and parse CSV output files
         csv_files = list(output_path.glob("*.csv"))
         
@@ -274,40 +401,46 @@ class EnergyPlusService:
                 return energy_data
         
         # If we have HTML output, parse it
-        html_files = list(output_path.glob("*.html"))
+        html_files = self._find_html_reports(output_path)
         if html_files:
             energy_data = self._extract_energy_from_html(html_files[0])
             if energy_data:
                 return energy_data
         
         # Fallback to mock data
-        return self._generate_mock_results()
+        return self._mock_fallback('no_output')
+    
+    def _extract_energy_from_sql(self, sql_file: Path) -> Optional[dict]:
+        """Extract energy data from the EnergyPlus SQLite output."""
+        try:
+            energy_by_type = sql_output.summarize_end_uses(sql_file)
+        except Exception as e:
+            logger.warning("Error reading SQLite output: %s", e)
+            return None
+        
+        if not energy_by_type:
+            return None
+        
+        return self._build_results(energy_by_type, "sql", [sql_file])
     
     def _extract_energy_from_csv(self, csv_files: list) -> Optional[dict]:
         """Extract energy data from CSV output files."""
-        # TODO: This needs proper implementation based on actual EnergyPlus CSV format
-        # The column names vary - need to handle different EnergyPlus versions
-        energy_by_type = {
-            "cooling": 0,
-            "heating": 0,
-            "lighting": 0,
-            "equipment": 0,
-            "ventilation": 0
-        }
+        try:
+            energy_by_type = csv_output.summarize_end_uses(csv_files)
+        except Exception as e:
+            logger.warning("Error reading CSV: %s", e)
+            return None
         
-        for csv_file in csv_files:
-            try:
-                with open(csv_file, 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # Need to map EnergyPlus column names to our structure
-                        # This is placeholder - actual implementation needed
-                        pass
-            except Exception as e:
-                print(f"Error reading CSV: {e}")
+        if not energy_by_type:
+            return None
         
+        return self._build_results(energy_by_type, "csv", csv_files)
+    
+    def _build_results(self, energy_by_type: dict, output_format: str, output_files: list,
+                       extra_info: Optional[dict] = None) -> Optional[dict]:
+        """Build the results payload from annual end-use totals in kWh."""
         # Calculate total
-        total = sum(energy_by_type.values())
+        total = round(sum(energy_by_type.values()), 2)
         
         if total == 0:
             return None
@@ -325,31 +458,39 @@ class EnergyPlusService:
             ],
             "additional_info": {
                 "source": "EnergyPlus",
-                "output_files": [str(f) for f in csv_files]
+                "total_consumption": f"{total:,.0f} kWh",
+                "output_files": [Path(f).name for f in output_files],
+                **(extra_info or {})
             },
             "metadata": {
                 "source": "EnergyPlus",
-                "format": "csv"
+                "format": output_format
             }
         }
     
     def _extract_energy_from_html(self, html_file: Path) -> Optional[dict]:
         """Extract energy data from HTML output file."""
-        # Simplified HTML parsing
         try:
-            with open(html_file, 'r') as f:
-                content = f.read()
-                # Parse HTML content - this would need actual parsing logic
-                # For now, return None to use mock
-                return None
+            summary = html_output.read_summary(html_file)
         except Exception as e:
-            print(f"Error reading HTML: {e}")
+            logger.warning("Error reading HTML: %s", e)
             return None
+        
+        if not summary:
+            return None
+        
+        extra_info = {}
+        if "eui" in summary:
+            extra_info["eui"] = summary["eui"]
+        if "total_site_energy" in summary:
+            extra_info["total_site_energy"] = summary["total_site_energy"]
+        return self._build_results(summary["energy_by_type"], "html", [html_file], extra_info)
     
     def _select_idf_by_message(self, message: str) -> Path:
         """
         Select appropriate IDF file based on user message.
-        Checks if user message mentions building type and matches available IDF files.
+        Ranks the models in the inputs directory by the building type and
+        other words the message mentions (see catalog.py).
         
         Args:
             message: User's chat message
@@ -357,49 +498,9 @@ class EnergyPlusService:
         Returns:
             Path to selected IDF file
         """
-        message_lower = message.lower()
-        
-        # Define building type keywords and their corresponding IDF file names
-        building_types = {
-            'office': ['office', 'commercial office', 'office building'],
-            'residential': ['residential', 'house', 'home', 'apartment'],
-            'retail': ['retail', 'store', 'shop', 'mall'],
-            'school': ['school', 'education', 'university', 'college'],
-            'hospital': ['hospital', 'healthcare', 'medical'],
-            'hotel': ['hotel', 'hospitality', 'motel'],
-        }
-        
-        # Check if message contains building type keywords
-        selected_type = None
-        for building_type, keywords in building_types.items():
-            if any(keyword in message_lower for keyword in keywords):
-                selected_type = building_type
-                break
-        
-        # If building type found, check if corresponding IDF file exists
-        if selected_type:
-            potential_idf = self.idf_dir / f"{selected_type}.idf"
-            if potential_idf.exists():
-                return potential_idf
-        
-        # Check all available IDF files in inputs directory
-        available_idf_files = list(self.idf_dir.glob("*.idf"))
-        
-        # If building type mentioned, try to match file names
-        if selected_type:
-            for idf_file in available_idf_files:
-                if selected_type.lower() in idf_file.stem.lower():
-                    return idf_file
-        
-        # If no match found or no building type specified, use default
-        default_idf = self.idf_dir / "default.idf"
-        if default_idf.exists():
-            return default_idf
-        
-        # If no default, use first available IDF file
-        if available_idf_files:
-            return available_idf_files[0]
+        selected = get_catalog(self.idf_dir).select(message)
+        if selected:
+            return self.idf_dir / selected
         
         # Last resort: raise error
         raise FileNotFoundError(f"No IDF files found in {self.idf_dir}")
-
@@ -0,0 +1,263 @@
+"""
+Result extraction from EnergyPlus SQLite output (eplusout.sql).
+
+With ``Output:SQLite`` EnergyPlus writes the tabular reports
+(``TabularDataWithStrings``) and every reported series (``ReportData`` /
+``ReportDataDictionary``) to one database. Annual end uses come from a
+single targeted query on the "End Uses" table instead of scanning text
+files. A single series is read through an index on ``ReportData``; many
+series are read together in one scan of it.
+"""
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .csv_output import MONTH_START_DAY
+from .end_uses import END_USE_CATEGORIES, FREQUENCY_RANK, TABULAR_END_USES, meter_category, to_kwh
+from .idf import parse_text
+
+SQLITE_OUTPUT_OBJECT = "\nOutput:SQLite,\n    SimpleAndTabular;        !- Option Type\n"
+
+END_USES_QUERY = """
+    SELECT RowName, ColumnName, Units, Value
+    FROM TabularDataWithStrings
+    WHERE ReportName = 'AnnualBuildingUtilityPerformanceSummary'
+      AND ReportForString = 'Entire Facility'
+      AND TableName = 'End Uses'
+"""
+
+# Sizing periods are reported before the run period, so meter totals only
+# count weather-file run periods (EnvironmentType 3), or the last environment
+# when the model has none, matching csv_output.last_environment_totals.
+METER_TOTALS_QUERY = """
+    SELECT d.Name, d.Units, d.ReportingFrequency, SUM(r.Value)
+    FROM ReportDataDictionary d
+    JOIN ReportData r ON r.ReportDataDictionaryIndex = d.ReportDataDictionaryIndex
+    JOIN Time t ON t.TimeIndex = r.TimeIndex
+    WHERE d.IsMeter = 1
+      AND t.EnvironmentPeriodIndex IN (
+          SELECT EnvironmentPeriodIndex FROM EnvironmentPeriods WHERE EnvironmentType = 3
+          UNION
+          SELECT MAX(EnvironmentPeriodIndex) FROM EnvironmentPeriods
+          WHERE NOT EXISTS (SELECT 1 FROM EnvironmentPeriods WHERE EnvironmentType = 3)
+      )
+    GROUP BY d.ReportDataDictionaryIndex
+"""
+
+# Every wanted series in one sequential scan, which beats an index lookup
+# per row once many series are wanted. Rows are grouped by series and
+# ordered by time afterwards in numpy.
+SERIES_SCAN_QUERY = """
+    SELECT ReportDataDictionaryIndex, TimeIndex, Value
+    FROM ReportData NOT INDEXED
+    {where}
+"""
+# Above this many series the scan filters in numpy, keeping the query under
+# SQLite's default limit of 999 bound parameters.
+MAX_FILTERED_SERIES = 500
+
+_MONTH_START = np.array(MONTH_START_DAY)
+
+
+def ensure_sqlite_output(idf_text: str) -> Optional[str]:
+    """Return the IDF with ``Output:SQLite`` appended, or None if it has one."""
+    if parse_text(idf_text).has('Output:SQLite'):
+        return None
+    return idf_text.rstrip('\n') + '\n' + SQLITE_OUTPUT_OBJECT
+
+
+def _connect(sql_file: Path) -> sqlite3.Connection:
+    return sqlite3.connect(str(sql_file))
+
+
+def _frequency_rank(frequency: str) -> int:
+    frequency = (frequency or '').lower().replace(' ', '')
+    if 'timestep' in frequency:
+        frequency = 'timestep'
+    return FREQUENCY_RANK.get(frequency, 9)
+
+
+def summarize_end_uses(sql_file: Path) -> Optional[Dict[str, float]]:
+    """Return annual kWh per end-use category from eplusout.sql.
+
+    Uses the "End Uses" table of the Annual Building Utility Performance
+    Summary, falling back to end-use meters in ``ReportData`` when the
+    tabular report wasn't written.
+    """
+    energy_by_type = {category: 0.0 for category in END_USE_CATEGORIES}
+    found = False
+
+    with closing(_connect(sql_file)) as conn:
+        try:
+            rows = conn.execute(END_USES_QUERY).fetchall()
+        except sqlite3.DatabaseError:
+            rows = []
+        for row_name, _column, units, value in rows:
+            category = TABULAR_END_USES.get((row_name or '').strip().lower())
+            if category is None:
+                continue
+            try:
+                kwh = to_kwh(float(value), units)
+            except (TypeError, ValueError):
+                continue
+            if kwh is not None:
+                energy_by_type[category] += kwh
+                found = True
+
+        if not found:
+            try:
+                meters = conn.execute(METER_TOTALS_QUERY).fetchall()
+            except sqlite3.DatabaseError:
+                meters = []
+            # One reporting frequency per meter, or its total would be counted twice.
+            chosen: Dict[str, tuple] = {}
+            for name, units, frequency, total in meters:
+                category = meter_category(name or '')
+                if category is None or to_kwh(0.0, units) is None:
+                    continue
+                current = chosen.get(name.lower())
+                if current is None or _frequency_rank(frequency) < _frequency_rank(current[2]):
+                    chosen[name.lower()] = (category, units, frequency, total or 0.0)
+            for category, units, _frequency, total in chosen.values():
+                energy_by_type[category] += to_kwh(total, units)
+                found = True
+
+    if not found:
+        return None
+    return {category: round(value, 2) for category, value in energy_by_type.items()}
+
+
+def list_series(sql_file: Path) -> List[dict]:
+    """Describe every series stored in ``ReportData``."""
+    with closing(_connect(sql_file)) as conn:
+        rows = conn.execute("""
+            SELECT ReportDataDictionaryIndex, IsMeter, KeyValue, Name, ReportingFrequency, Units
+            FROM ReportDataDictionary
+            ORDER BY ReportDataDictionaryIndex
+        """).fetchall()
+    return [
+        {
+            "index": index,
+            "is_meter": bool(is_meter),
+            "key": key or '',
+            "name": name,
+            "frequency": frequency,
+            "units": units,
+        }
+        for index, is_meter, key, name, frequency, units in rows
+    ]
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> None:
+    """Index ReportData by series so reading one series doesn't scan the table."""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS report_data_series_idx "
+        "ON ReportData (ReportDataDictionaryIndex, TimeIndex)"
+    )
+    conn.commit()
+
+
+def _minutes(data: np.ndarray) -> np.ndarray:
+    """Minutes since Jan 1 of (Month, Day, Hour, Minute) rows."""
+    month, day, hour, minute = (np.nan_to_num(data[:, i]).astype(np.int64) for i in range(4))
+    month = np.clip(month, 1, 12)
+    # EnergyPlus reports the end of each interval (hour 1..24).
+    minutes = (_MONTH_START[month - 1] + np.maximum(day, 1) - 1) * 1440 + hour * 60 + minute
+    return minutes.astype(np.float64)
+
+
+def _time_minutes(conn: sqlite3.Connection) -> Tuple[np.ndarray, np.ndarray]:
+    """Minutes since Jan 1 and presence, indexed by TimeIndex."""
+    rows = conn.execute("SELECT TimeIndex, Month, Day, Hour, Minute FROM Time").fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=bool)
+    data = np.array(rows, dtype=np.float64)
+    time_index = data[:, 0].astype(np.int64)
+    minutes = np.zeros(time_index.max() + 1, dtype=np.float64)
+    known = np.zeros(len(minutes), dtype=bool)
+    minutes[time_index] = _minutes(data[:, 1:])
+    known[time_index] = True
+    return minutes, known
+
+
+def read_many(sql_file: Path, series_indexes: Sequence[int]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """Read series by ``ReportDataDictionaryIndex`` (see ``list_series``).
+
+    Returns (minutes since Jan 1, values) per requested index, empty for
+    series without data. One connection and one scan of ``ReportData``
+    serve every series.
+    """
+    empty = np.empty(0, dtype=np.float64)
+    read = {index: (empty, empty) for index in series_indexes}
+    wanted = sorted(read)
+    if not wanted:
+        return read
+    filtered = len(wanted) <= MAX_FILTERED_SERIES
+    where = f"WHERE ReportDataDictionaryIndex IN ({', '.join('?' * len(wanted))})" if filtered else ''
+    with closing(_connect(sql_file)) as conn:
+        time_minutes, known = _time_minutes(conn)
+        rows = conn.execute(SERIES_SCAN_QUERY.format(where=where), wanted if filtered else []).fetchall()
+    if not rows:
+        return read
+
+    data = np.array(rows, dtype=np.float64)
+    del rows
+    series = data[:, 0].astype(np.int64)
+    time_index = data[:, 1].astype(np.int64)
+    keep = (time_index >= 0) & (time_index < len(known))
+    keep[keep] = known[time_index[keep]]
+    if not filtered:
+        keep &= np.isin(series, wanted)
+    series, time_index, values = series[keep], time_index[keep], data[keep, 2]
+    order = np.lexsort((time_index, series))
+    series, time_index, values = series[order], time_index[order], values[order]
+
+    found, first = np.unique(series, return_index=True)
+    bounds = list(first) + [len(series)]
+    for i, index in enumerate(found):
+        rows_of = slice(bounds[i], bounds[i + 1])
+        read[int(index)] = (time_minutes[time_index[rows_of]], values[rows_of])
+    return read
+
+
+def read_series(sql_file: Path, name: str, key: Optional[str] = None,
+                frequency: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, str]:
+    """Read one series as (minutes since Jan 1, values, units).
+
+    Matches ``name`` (and ``key`` / ``frequency`` when given)
+    case-insensitively; raises KeyError if no series matches.
+    """
+    with closing(_connect(sql_file)) as conn:
+        ensure_indexes(conn)
+        clauses = ["Name = ? COLLATE NOCASE"]
+        params: list = [name]
+        if key is not None:
+            clauses.append("KeyValue = ? COLLATE NOCASE")
+            params.append(key)
+        if frequency is not None:
+            clauses.append("ReportingFrequency = ? COLLATE NOCASE")
+            params.append(frequency)
+        found = conn.execute(
+            "SELECT ReportDataDictionaryIndex, Units FROM ReportDataDictionary WHERE "
+            + " AND ".join(clauses) + " ORDER BY ReportDataDictionaryIndex LIMIT 1",
+            params,
+        ).fetchone()
+        if found is None:
+            raise KeyError(f"Series not found in {sql_file.name}: {name}")
+        series_index, units = found
+
+        rows = conn.execute("""
+            SELECT t.Month, t.Day, t.Hour, t.Minute, r.Value
+            FROM ReportData r
+            JOIN Time t ON t.TimeIndex = r.TimeIndex
+            WHERE r.ReportDataDictionaryIndex = ?
+            ORDER BY r.TimeIndex
+        """, (series_index,)).fetchall()
+
+    if not rows:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64), units
+    data = np.array(rows, dtype=np.float64)
+    return _minutes(data), data[:, 4], units
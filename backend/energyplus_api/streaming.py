@@ -0,0 +1,252 @@
+"""
+Async execution of EnergyPlus with live progress events.
+
+The ASGI streaming endpoint launches EnergyPlus with
+``asyncio.create_subprocess_exec`` and parses its console output line by
+line, so one event loop can follow many concurrent runs without a thread
+each. Only the last few lines are kept (for error reports); the rest of the
+output is never buffered.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from datetime import date
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import analytics, logs, metrics, scheduling, scratch
+from .catalog import building_type_of
+from .cache import result_cache
+from .models import SimulationRun
+from .services import EnergyPlusService
+
+logger = logging.getLogger(__name__)
+
+# Seconds of silence after which a comment line is sent to keep proxies from
+# closing the connection.
+KEEPALIVE_SECONDS = 15
+STDOUT_TAIL_LINES = 50
+
+DATE_RE = r'(?P<month>\d{1,2})/(?P<day>\d{1,2})(?:/(?P<year>\d{4}))?'
+
+PROGRESS_PATTERNS = [
+    ('initializing', re.compile(r'^Initializing Simulation|^Initializing Response Factors')),
+    ('sizing', re.compile(r'^Performing (?P<what>Zone|System|Plant) Sizing')),
+    ('warmup', re.compile(r'^Warming up(?: \{(?P<warmup_day>\d+)\})?')),
+    ('environment', re.compile(rf'^Starting Simulation at {DATE_RE} for (?P<environment>.+)$')),
+    ('day', re.compile(rf'^Continuing Simulation at {DATE_RE} for (?P<environment>.+)$')),
+    ('reporting', re.compile(r'^Writing (tabular output|final SQL)')),
+    ('finished', re.compile(r'^EnergyPlus (?P<outcome>Completed Successfully|Terminated)')),
+]
+
+
+def parse_progress_line(line: str) -> Optional[dict]:
+    """Turn one line of EnergyPlus console output into a progress event."""
+    line = line.strip()
+    for stage, pattern in PROGRESS_PATTERNS:
+        match = pattern.match(line)
+        if not match:
+            continue
+        event = {"stage": stage, "line": line}
+        groups = {k: v for k, v in match.groupdict().items() if v is not None}
+        if 'month' in groups:
+            month, day = int(groups.pop('month')), int(groups.pop('day'))
+            year = int(groups.pop('year', 2021))
+            try:
+                event["day_of_year"] = date(year, month, day).timetuple().tm_yday
+            except ValueError:
+                pass
+        event.update(groups)
+        return event
+    return None
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@sync_to_async
+def _prepare_run(message: str, idf_content: Optional[str], options: dict):
+    service = EnergyPlusService(
+        energyplus_version=options.get("energyplus_version"), weather=options.get("weather")
+    )
+    simulation_id = service.new_simulation_id()
+    idf_file = service.resolve_idf(message, idf_content, simulation_id)
+    if not idf_file.exists():
+        raise FileNotFoundError(f"IDF file not found: {idf_file}")
+    job = scheduling.estimate_file(idf_file)
+    try:
+        scheduling.admit(job)
+    except ValueError:
+        if idf_content is not None:
+            idf_file.unlink(missing_ok=True)
+        raise
+    run = SimulationRun(
+        simulation_id=simulation_id,
+        message=message,
+        idf_file=idf_file.name,
+        building_type=building_type_of(idf_file, message),
+        status=SimulationRun.Status.RUNNING,
+        started_at=timezone.now(),
+        options=options,
+    )
+    scheduling.apply_estimate(run, job)
+    with metrics.phase('run_insert'):
+        run.save()
+    return service, run, idf_file
+
+
+@sync_to_async
+def _cached_results(service: EnergyPlusService, run: SimulationRun, idf_file: Path) -> Optional[dict]:
+    if run.options.get("bypass_cache") or not service.cache_enabled:
+        return None
+    return result_cache.get(service.cache_key(idf_file), run.simulation_id, idf_file.name)
+
+
+@sync_to_async
+def _finish_run(service: EnergyPlusService, run: SimulationRun, idf_file: Path,
+                returncode: Optional[int], tail: str, work_path: Optional[Path] = None) -> dict:
+    """Parse outputs, write results.json and record the outcome on the run."""
+    with logs.bind(run.simulation_id):
+        if returncode is None:
+            if service.energyplus_executable:
+                results, used_mock_data = service._mock_fallback('timeout'), True
+            else:
+                results, used_mock_data = service._mock_fallback('not_installed'), True
+                results['note'] = 'Mock data - EnergyPlus not installed'
+        else:
+            results, used_mock_data = service.collect_results(returncode, work_path, tail)
+        service.store_results(results, used_mock_data, run.simulation_id, idf_file, work_path)
+        if not used_mock_data and service.cache_enabled:
+            result_cache.store(service.cache_key(idf_file), run.simulation_id, results)
+        _complete(run, results)
+    return results
+
+
+def _complete(run: SimulationRun, results: dict) -> None:
+    run.apply_results(results)
+    run.status = SimulationRun.Status.COMPLETED
+    run.finished_at = timezone.now()
+    scheduling.record_runtime(run, results)
+    with metrics.phase('run_update'):
+        run.save()
+    metrics.SIMULATIONS.inc(status=run.status)
+    analytics.record(run)
+
+
+@sync_to_async
+def _fail_run(run: SimulationRun, error: str) -> None:
+    logger.warning("Simulation failed: %s", error, extra={"simulation_id": run.simulation_id})
+    run.status = SimulationRun.Status.FAILED
+    run.error = error
+    run.finished_at = timezone.now()
+    run.save()
+    metrics.SIMULATIONS.inc(status=run.status)
+
+
+async def stream_simulation(message: str, idf_content: Optional[str] = None,
+                            options: Optional[dict] = None) -> AsyncIterator[str]:
+    """Run a simulation and yield its progress as Server-Sent Events.
+
+    The first event (``started``) carries the simulation ID; the last one is
+    either ``result`` with the same payload as the result endpoint or
+    ``error``. If the client disconnects, EnergyPlus is killed.
+    """
+    options = options or {}
+    try:
+        service, run, idf_file = await _prepare_run(message, idf_content, options)
+    except (FileNotFoundError, ValueError) as e:
+        yield format_sse("error", {"status": "error", "message": str(e)})
+        return
+
+    yield format_sse("started", {"simulation_id": run.simulation_id, "idf_file": run.idf_file})
+
+    cached = await _cached_results(service, run, idf_file)
+    if cached is not None:
+        await sync_to_async(_complete)(run, cached)
+        yield format_sse("result", {"status": "success", "simulation_id": run.simulation_id, "results": cached})
+        return
+
+    if not service.energyplus_executable:
+        results = await _finish_run(service, run, idf_file, None, "")
+        yield format_sse("result", {"status": "success", "simulation_id": run.simulation_id, "results": results})
+        return
+
+    # EnergyPlus runs in a scratch directory that is removed however the
+    # stream ends (result, timeout, error or client disconnect).
+    work_path = scratch.create(run.simulation_id)
+    metrics.ACTIVE_RUNS.inc()
+    try:
+        tail = deque(maxlen=STDOUT_TAIL_LINES)
+        started = time.perf_counter()
+        deadline = time.monotonic() + (run.timeout_seconds or settings.ENERGYPLUS_SIMULATION_TIMEOUT)
+        returncode = None
+        process = None
+        try:
+            run_idf = await sync_to_async(service.prepare_idf)(idf_file, work_path)
+            process = await asyncio.create_subprocess_exec(
+                *service.build_command(run_idf, work_path),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=str(work_path),
+            )
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                try:
+                    raw = await asyncio.wait_for(process.stdout.readline(), min(remaining, KEEPALIVE_SECONDS))
+                except asyncio.TimeoutError:
+                    if time.monotonic() >= deadline:
+                        raise
+                    yield ": keepalive\n\n"
+                    continue
+                if not raw:
+                    break
+                line = raw.decode(errors='replace').rstrip()
+                tail.append(line)
+                event = parse_progress_line(line)
+                if event:
+                    yield format_sse("progress", event)
+            returncode = await process.wait()
+        except asyncio.TimeoutError:
+            metrics.TIMEOUTS.inc()
+            logger.warning("EnergyPlus simulation timed out, using mock data",
+                           extra={"simulation_id": run.simulation_id})
+            yield format_sse("progress", {"stage": "timeout"})
+        except (GeneratorExit, asyncio.CancelledError):
+            await _fail_run(run, "Client disconnected before the simulation finished")
+            raise
+        except Exception as e:
+            # EnergyPlus couldn't be started (OSError), or printed a line longer
+            # than the stream reader's limit (ValueError)
+            await _fail_run(run, str(e))
+            yield format_sse("error", {"status": "error", "simulation_id": run.simulation_id,
+                                       "message": f"Simulation failed: {str(e)}"})
+            return
+        finally:
+            if process is not None:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                metrics.PHASE_SECONDS.observe(time.perf_counter() - started, phase='energyplus')
+
+        try:
+            results = await _finish_run(service, run, idf_file, returncode, '\n'.join(tail), work_path)
+        except Exception as e:
+            await _fail_run(run, str(e))
+            yield format_sse("error", {"status": "error", "simulation_id": run.simulation_id,
+                                       "message": f"Simulation failed: {str(e)}"})
+            return
+        yield format_sse("result", {"status": "success", "simulation_id": run.simulation_id, "results": results})
+    finally:
+        metrics.ACTIVE_RUNS.dec()
+        scratch.cleanup(work_path)
@@ -0,0 +1,199 @@
+"""
+Synthetic EnergyPlus inputs and outputs for benchmarks and load tests.
+
+The generated files have the shape of real EnergyPlus output (an
+``eplusout.csv`` with a Date/Time column and bracketed units, an
+``eplusout.sql`` with the ReportData / TabularDataWithStrings tables, an
+``eplustbl.htm`` with the End Uses table) at any size, so the result
+readers can be measured without running EnergyPlus. Values are random but
+seeded, so two runs generate identical files.
+"""
+import random
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+from django.utils import timezone
+
+from .catalog import BUILDING_TYPES
+from .csv_output import MONTH_START_DAY
+from .end_uses import END_USE_CATEGORIES
+from .models import SimulationRun
+
+# End-use meters every synthetic output reports, with their tabular row names.
+METERS = [
+    ('Cooling:Electricity', 'Cooling'),
+    ('Heating:NaturalGas', 'Heating'),
+    ('InteriorLights:Electricity', 'Interior Lighting'),
+    ('InteriorEquipment:Electricity', 'Interior Equipment'),
+    ('Fans:Electricity', 'Fans'),
+    ('Electricity:Facility', None),
+]
+
+
+def _timestamps(rows: int) -> Iterator[tuple]:
+    """(month, day, hour) of consecutive hourly rows, hour 1..24 as EnergyPlus reports."""
+    for i in range(rows):
+        day_of_year, hour = divmod(i % 8760, 24)
+        month = max(m for m, start in enumerate(MONTH_START_DAY) if start <= day_of_year)
+        yield month + 1, day_of_year - MONTH_START_DAY[month] + 1, hour + 1
+
+
+def _series_names(columns: int) -> List[tuple]:
+    """(name, key, units) of the meters plus enough zone variables to fill ``columns``."""
+    names = [(meter, '', 'J') for meter, _ in METERS]
+    zone = 0
+    while len(names) < columns:
+        names.append(('Zone Air Temperature', f'ZONE {zone}', 'C'))
+        zone += 1
+    return names[:columns]
+
+
+def _values(rows: int, columns: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(1e5, 5e6, size=(rows, columns)).round(2)
+
+
+def write_csv(path: Path, rows: int = 8760, columns: int = 500, seed: int = 0) -> Path:
+    """An hourly ``eplusout.csv`` with ``columns`` data columns."""
+    header = ['Date/Time'] + [
+        f"{key + ':' if key else ''}{name} [{units}](Hourly)" for name, key, units in _series_names(columns)
+    ]
+    values = _values(rows, columns, seed)
+    with open(path, 'w') as f:
+        f.write(','.join(header) + '\n')
+        for (month, day, hour), row in zip(_timestamps(rows), values):
+            f.write(f" {month:02d}/{day:02d}  {hour:02d}:00:00," + ','.join(map(str, row)) + '\n')
+    return path
+
+
+def write_sql(path: Path, rows: int = 8760, columns: int = 500, seed: int = 0) -> Path:
+    """An ``eplusout.sql`` with the tables the result readers query."""
+    path.unlink(missing_ok=True)
+    series = _series_names(columns)
+    values = _values(rows, columns, seed)
+    with closing(sqlite3.connect(str(path))) as conn:
+        conn.executescript("""
+            CREATE TABLE Time (TimeIndex INTEGER PRIMARY KEY, Month INTEGER, Day INTEGER,
+                               Hour INTEGER, Minute INTEGER, EnvironmentPeriodIndex INTEGER);
+            CREATE TABLE EnvironmentPeriods (EnvironmentPeriodIndex INTEGER PRIMARY KEY,
+                               SimulationIndex INTEGER, EnvironmentName TEXT, EnvironmentType INTEGER);
+            CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex INTEGER PRIMARY KEY,
+                               IsMeter INTEGER, Type TEXT, IndexGroup TEXT, TimestepType TEXT,
+                               KeyValue TEXT, Name TEXT, ReportingFrequency TEXT,
+                               ScheduleName TEXT, Units TEXT);
+            CREATE TABLE ReportData (ReportDataIndex INTEGER PRIMARY KEY, TimeIndex INTEGER,
+                               ReportDataDictionaryIndex INTEGER, Value REAL);
+            CREATE TABLE TabularDataWithStrings (ReportName TEXT, ReportForString TEXT,
+                               TableName TEXT, RowName TEXT, ColumnName TEXT, Units TEXT,
+                               Value TEXT);
+        """)
+        conn.execute("INSERT INTO EnvironmentPeriods VALUES (1, 1, 'RUN PERIOD 1', 3)")
+        conn.executemany(
+            "INSERT INTO Time VALUES (?, ?, ?, ?, 0, 1)",
+            ((i + 1, month, day, hour) for i, (month, day, hour) in enumerate(_timestamps(rows))),
+        )
+        conn.executemany(
+            "INSERT INTO ReportDataDictionary VALUES (?, ?, 'Sum', 'Facility', 'HVAC System', ?, ?, 'Hourly', '', ?)",
+            ((j + 1, int(not key), key, name, units) for j, (name, key, units) in enumerate(series)),
+        )
+        conn.executemany(
+            "INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value) VALUES (?, ?, ?)",
+            ((i + 1, j + 1, float(values[i, j])) for i in range(rows) for j in range(columns)),
+        )
+        totals = values.sum(axis=0)
+        conn.executemany(
+            "INSERT INTO TabularDataWithStrings VALUES ('AnnualBuildingUtilityPerformanceSummary', "
+            "'Entire Facility', 'End Uses', ?, 'Electricity', 'GJ', ?)",
+            ((row_name, f"{totals[j] / 1e9:.2f}") for j, (_, row_name) in enumerate(METERS[:columns]) if row_name),
+        )
+        conn.commit()
+    return path
+
+
+def write_html(path: Path, filler_tables: int = 200, seed: int = 0) -> Path:
+    """An ``eplustbl.htm`` whose End Uses table follows ``filler_tables`` other tables."""
+    rng = random.Random(seed)
+    parts = ['<html><body><p>Program Version:EnergyPlus</p>']
+    for i in range(filler_tables):
+        parts.append(f'<b>Report Table {i}</b><table border="1">')
+        parts.extend(
+            f'<tr><td>Row {r}</td>' + ''.join(f'<td>{rng.uniform(0, 1e4):.2f}</td>' for _ in range(8)) + '</tr>'
+            for r in range(10)
+        )
+        parts.append('</table>')
+    parts.append('<b>Site and Source Energy</b><table border="1">'
+                 '<tr><td></td><td>Total Energy [kWh]</td><td>Energy Per Total Building Area [kWh/m2]</td></tr>'
+                 f'<tr><td>Total Site Energy</td><td>{rng.uniform(5e4, 2e5):.2f}</td>'
+                 f'<td>{rng.uniform(50, 300):.2f}</td></tr></table>')
+    parts.append('<b>End Uses</b><table border="1"><tr><td></td><td>Electricity [kWh]</td>'
+                 '<td>Natural Gas [kWh]</td></tr>')
+    for _, row_name in METERS:
+        if row_name:
+            parts.append(f'<tr><td>{row_name}</td><td>{rng.uniform(1e3, 5e4):.2f}</td>'
+                         f'<td>{rng.uniform(0, 1e4):.2f}</td></tr>')
+    parts.append('</table></body></html>')
+    path.write_text('\n'.join(parts))
+    return path
+
+
+def write_idf_library(directory: Path, count: int, seed: int = 0) -> List[Path]:
+    """``count`` small IDFs named and described after varied building types."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    types = sorted(BUILDING_TYPES)
+    paths = []
+    for i in range(count):
+        building_type = types[i % len(types)]
+        path = directory / f"{building_type}_{i:05d}.idf"
+        zones = '\n'.join(
+            f"Zone, Zone {z}, 0, 0, 0, 0, 1, 1, 3, , {rng.uniform(50, 500):.1f};" for z in range(rng.randint(1, 20))
+        )
+        path.write_text(
+            f"! Synthetic {rng.choice(BUILDING_TYPES[building_type])} model {i}\n"
+            f"Version, 23.2;\nBuilding, {building_type.title()} Building {i}, 0, Suburbs, 0.04, 0.4, "
+            f"FullExterior, 25, 6;\nTimestep, 6;\nRunPeriod, Annual, 1, 1, , 12, 31;\n{zones}\n"
+        )
+        paths.append(path)
+    return paths
+
+
+def results_payload(seed: int = 0, rng: Optional[random.Random] = None) -> dict:
+    """A results payload shaped like the one stored for a real run."""
+    rng = rng or random.Random(seed)
+    energy_by_type = {c: round(rng.uniform(1e3, 5e4), 2) for c in END_USE_CATEGORIES}
+    total = round(sum(energy_by_type.values()), 2)
+    return {
+        "status": "success",
+        "total_energy": total,
+        "energy_by_type": energy_by_type,
+        "energy_breakdown": [{"name": c.title(), "value": v, "color": "#000000"} for c, v in energy_by_type.items()],
+        "additional_info": {"source": "EnergyPlus", "total_consumption": f"{total:,.0f} kWh",
+                            "output_files": ["eplusout.sql"], "eui": round(total / 4500, 2)},
+        "metadata": {"source": "EnergyPlus", "format": "sql"},
+    }
+
+
+def make_runs(count: int, seed: int = 0) -> List[SimulationRun]:
+    """Unsaved SimulationRun rows, mostly completed (``created_at`` is set on insert)."""
+    rng = random.Random(seed)
+    statuses = [SimulationRun.Status.COMPLETED] * 8 + [SimulationRun.Status.FAILED, SimulationRun.Status.QUEUED]
+    finished_at = timezone.now()
+    runs = []
+    for i in range(count):
+        results = results_payload(rng=rng)
+        runs.append(SimulationRun(
+            simulation_id=f"sim_{seed + i:012x}",
+            message="Run simulation",
+            idf_file=f"model_{i % 50:02d}.idf",
+            status=rng.choice(statuses),
+            used_mock_data=rng.random() < 0.3,
+            total_energy=results["total_energy"],
+            energy_by_type=results["energy_by_type"],
+            energy_breakdown=results["energy_breakdown"],
+            additional_info=results["additional_info"],
+            finished_at=finished_at,
+        ))
+    return runs
@@ -0,0 +1,64 @@
+"""
+Test case for code that queues and runs simulations.
+"""
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from energyplus_api import discovery, jobs
+
+from .samples import OFFICE_IDF
+
+
+class SimulationTestCase(TestCase):
+    """Runs simulations in temporary directories without EnergyPlus.
+
+    Every run gets the service's mock results. The local queue's workers are
+    never started: ``run_queued`` executes queued jobs in the test thread.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        self.idf_dir = root / 'inputs'
+        self.output_dir = root / 'outputs'
+        self.idf_dir.mkdir()
+        (self.idf_dir / 'office.idf').write_text(OFFICE_IDF)
+        overrides = override_settings(
+            ENERGYPLUS_EXECUTION='local',
+            ENERGYPLUS_IDF_DIR=self.idf_dir,
+            ENERGYPLUS_OUTPUT_DIR=self.output_dir,
+            ENERGYPLUS_PROFILE_DIR=root / 'profiles',
+            ENERGYPLUS_WEATHER_DIR=root / 'weather',
+            ENERGYPLUS_SCRATCH_DIR=str(root / 'scratch'),
+            ENERGYPLUS_RETENTION_INTERVAL_SECONDS=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        registry_file = root / 'energyplus_registry.json'
+        registry_file.write_text(json.dumps({"installations": []}))
+        self.addCleanup(setattr, discovery, '_registry', discovery._registry)
+        discovery._registry = discovery.EnergyPlusRegistry(registry_file)
+
+        self.addCleanup(setattr, jobs, '_queue', jobs._queue)
+        self.queue = jobs._queue = jobs.SimulationQueue(1)
+
+    def queued(self) -> list:
+        """Run pks in the order the queue hands them out (emptying it)."""
+        order = []
+        while not self.queue._queue.empty():
+            order.append(self.queue._queue.get_nowait()[2])
+        return order
+
+    def run_queued(self) -> int:
+        """Execute queued jobs, including ones they queue, until none are left."""
+        ran = 0
+        while not self.queue._queue.empty():
+            for run_pk in self.queued():
+                jobs.execute_job(run_pk)
+                ran += 1
+        return ran
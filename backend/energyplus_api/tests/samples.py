@@ -0,0 +1,87 @@
+"""
+Small models and output files shared by the tests.
+"""
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+OFFICE_IDF = """! Two-zone office used by the tests
+Version, 23.2;
+SimulationControl, No, No, No, Yes, Yes;
+Building, Small Office Building, 0, Suburbs, 0.04, 0.4, FullExterior, 25, 6;
+Timestep, 4;
+RunPeriod, Annual, 1, 1, , 12, 31, , Sunday, Yes, Yes, No, Yes, Yes;
+SizingPeriod:DesignDay, Winter Design Day, 1, 21, WinterDesignDay;
+Zone, Core Zone, 0, 0, 0, 0, 1, 1, 3, , 100;
+Zone, Perimeter Zone, 0, 0, 0, 0, 1, 1, 3, , 50;
+Output:Meter, Electricity:Facility, Hourly;
+"""
+
+
+def write_csv(path: Path, header: List[str], rows: Iterable[List[str]]) -> Path:
+    """An EnergyPlus-style CSV: a Date/Time column followed by ``header``."""
+    with open(path, 'w') as f:
+        f.write(','.join(['Date/Time'] + header) + '\n')
+        for row in rows:
+            f.write(','.join(row) + '\n')
+    return path
+
+
+def hourly_rows(days: Iterable[int], value: str, month: int = 1) -> List[List[str]]:
+    """One row per hour of the given days of ``month``, every column set to ``value``."""
+    return [
+        [f" {month:02d}/{day:02d}  {hour:02d}:00:00", value]
+        for day in days for hour in range(1, 25)
+    ]
+
+
+def epw_bytes(days: Iterable[Tuple[int, int, float]], city: str = 'Testville') -> bytes:
+    """A minimal EPW with 24 hours at a constant dry-bulb for each ``(month, day, °C)``."""
+    lines = [
+        f"LOCATION,{city},IL,USA,TMY3,725300,41.98,-87.92,-6.0,201.0",
+        "DESIGN CONDITIONS,0",
+        "TYPICAL/EXTREME PERIODS,0",
+        "GROUND TEMPERATURES,0",
+        "HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0",
+        "COMMENTS 1,Test weather",
+        "COMMENTS 2,",
+        "DATA PERIODS,1,1,Data,Sunday,1/1,12/31",
+    ]
+    for month, day, dry_bulb in days:
+        for hour in range(1, 25):
+            fields = [1999, month, day, hour, 0, '?', dry_bulb, dry_bulb - 5, 70, 99000] + [0] * 25
+            fields[13] = 100 * hour  # global horizontal radiation
+            fields[21] = 3.5  # wind speed
+            lines.append(','.join(str(field) for field in fields))
+    return ('\r\n'.join(lines) + '\r\n').encode('latin-1')
+
+
+def write_meter_sql(path: Path, name: str, units: str,
+                    environments: List[Tuple[int, List[float]]]) -> Path:
+    """An ``eplusout.sql`` holding one hourly meter over ``(EnvironmentType, values)`` environments."""
+    with closing(sqlite3.connect(str(path))) as conn:
+        conn.executescript("""
+            CREATE TABLE EnvironmentPeriods (EnvironmentPeriodIndex INTEGER PRIMARY KEY,
+                                             SimulationIndex INTEGER, EnvironmentName TEXT,
+                                             EnvironmentType INTEGER);
+            CREATE TABLE Time (TimeIndex INTEGER PRIMARY KEY, Month INTEGER, Day INTEGER,
+                               Hour INTEGER, Minute INTEGER, EnvironmentPeriodIndex INTEGER);
+            CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex INTEGER PRIMARY KEY,
+                                               IsMeter INTEGER, KeyValue TEXT, Name TEXT,
+                                               ReportingFrequency TEXT, Units TEXT);
+            CREATE TABLE ReportData (ReportDataIndex INTEGER PRIMARY KEY, TimeIndex INTEGER,
+                                     ReportDataDictionaryIndex INTEGER, Value REAL);
+        """)
+        conn.execute("INSERT INTO ReportDataDictionary VALUES (1, 1, '', ?, 'Hourly', ?)", (name, units))
+        time_index = 0
+        for environment, (environment_type, values) in enumerate(environments, start=1):
+            conn.execute("INSERT INTO EnvironmentPeriods VALUES (?, 1, ?, ?)",
+                         (environment, f"ENVIRONMENT {environment}", environment_type))
+            for hour, value in enumerate(values, start=1):
+                time_index += 1
+                conn.execute("INSERT INTO Time VALUES (?, 1, 1, ?, 0, ?)", (time_index, hour, environment))
+                conn.execute("INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value) "
+                             "VALUES (?, 1, ?)", (time_index, value))
+        conn.commit()
+    return path
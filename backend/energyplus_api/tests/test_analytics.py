@@ -0,0 +1,71 @@
+import math
+
+from django.test import TestCase
+
+from energyplus_api import analytics
+from energyplus_api.models import SimulationRun, SimulationSummary
+
+
+def completed_run(i: int, total_energy: float, **fields) -> SimulationRun:
+    return SimulationRun.objects.create(
+        simulation_id=f'sim-{i}', message='office', idf_file=fields.pop('idf_file', 'office.idf'),
+        status=SimulationRun.Status.COMPLETED, total_energy=total_energy,
+        heating_energy=total_energy / 4, lighting_energy=total_energy / 2, **fields,
+    )
+
+
+class RecordTests(TestCase):
+    def test_run_is_counted_once(self):
+        run = completed_run(1, 1000.0, building_type='office')
+        self.assertTrue(analytics.record(run))
+        self.assertFalse(analytics.record(run))
+        self.assertFalse(analytics.record(SimulationRun.objects.get(pk=run.pk)))
+        self.assertEqual(SimulationSummary.objects.count(), 3)
+        self.assertEqual(set(SimulationSummary.objects.values_list('runs', flat=True)), {1})
+
+    def test_unfinished_runs_are_not_counted(self):
+        run = SimulationRun.objects.create(simulation_id='sim-1', message='office')
+        self.assertFalse(analytics.record(run))
+        self.assertFalse(SimulationSummary.objects.exists())
+
+    def test_rebuild_matches_incremental_totals(self):
+        for i in range(30):
+            run = completed_run(
+                i, float(100 + i * 37 % 900), idf_file=f'model{i % 3}.idf',
+                building_type=('office', 'school', '')[i % 3], used_mock_data=i % 4 == 0,
+            )
+            analytics.record(run)
+        # A zero total lands in the non-positive bucket
+        analytics.record(completed_run(30, 0.0))
+
+        pages = {group_by: analytics.analytics_page({"group_by": group_by}) for group_by in analytics.GROUP_BY}
+        self.assertEqual(analytics.rebuild(), 31)
+        for group_by, page in pages.items():
+            self.assertEqual(analytics.analytics_page({"group_by": group_by}), page, group_by)
+        self.assertFalse(SimulationRun.objects.filter(in_summary=False).exists())
+
+        page = pages['building_type']
+        self.assertEqual(page["overall"]["runs"], 31)
+        self.assertEqual(page["overall"]["total_energy"]["min"], 0.0)
+        self.assertEqual({g["key"]: g["runs"] for g in page["groups"]}, {'office': 10, 'school': 10, 'unknown': 11})
+        self.assertEqual(page["overall"]["end_uses"]["lighting"]["share"], round(2 / 3, 4))
+
+
+class PercentileTests(TestCase):
+    def test_percentiles_are_within_bucket_error(self):
+        values = [round(50 * 1.031 ** i, 1) for i in range(200)]
+        for i, value in enumerate(values):
+            analytics.record(completed_run(i, value))
+        page = analytics.analytics_page({"percentiles": '1,25,50,90,99,100'})
+        total_energy = page["overall"]["total_energy"]
+
+        for q in (1, 25, 50, 90, 99, 100):
+            exact = sorted(values)[math.ceil(q / 100 * len(values)) - 1]
+            self.assertLessEqual(abs(total_energy[f"p{q}"] - exact) / exact, 0.025, q)
+        self.assertEqual((total_energy["min"], total_energy["max"]), (min(values), max(values)))
+
+    def test_invalid_parameters(self):
+        for params in ({"group_by": 'zone'}, {"percentiles": '50,101'}, {"used_mock_data": 'maybe'},
+                       {"group_by": 'day', "created_after": 'yesterday'}):
+            with self.assertRaises(ValueError):
+                analytics.analytics_page(params)
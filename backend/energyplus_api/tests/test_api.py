@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from energyplus_api import views
+from energyplus_api.models import SimulationRun
+
+
+class FlagTests(TestCase):
+    def test_flag_values(self):
+        self.assertTrue(views._flag({"bypass_cache": "yes"}, 'bypass_cache', False))
+        self.assertFalse(views._flag({"bypass_cache": "0"}, 'bypass_cache', True))
+        self.assertTrue(views._flag({}, 'bypass_cache', True))
+        with self.assertRaises(ValueError):
+            views._flag({"bypass_cache": "maybe"}, 'bypass_cache', False)
+
+    def test_stream_rejects_invalid_flag(self):
+        response = self.client.get('/api/simulation/stream', {"message": "office", "bypass_cache": "maybe"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalTests(TestCase):
+    def setUp(self):
+        self.run = SimulationRun.objects.create(
+            simulation_id='sim-1', message='office', status=SimulationRun.Status.COMPLETED
+        )
+
+    def test_status_revalidates_with_etag(self):
+        url = '/api/simulation/sim-1/status'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.run.error = 'changed'
+        self.run.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_history_revalidates_with_etag(self):
+        url = '/api/simulation/history'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        SimulationRun.objects.create(simulation_id='sim-2', message='office', status=SimulationRun.Status.COMPLETED)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_history_etag_changes_on_delete(self):
+        SimulationRun.objects.create(simulation_id='sim-2', message='office', status=SimulationRun.Status.COMPLETED)
+        url = '/api/simulation/history'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        SimulationRun.objects.filter(simulation_id='sim-2').delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unknown_run(self):
+        self.assertEqual(self.client.get('/api/simulation/missing/status').status_code, 404)
@@ -0,0 +1,61 @@
+from django.test import override_settings
+
+from energyplus_api.models import SimulationBatch, SimulationRun
+
+from .base import SimulationTestCase
+from .samples import OFFICE_IDF
+
+
+def variants(count: int) -> list:
+    return [
+        {"name": f"area {area}", "overrides": [{"object": "Zone", "name": "Core Zone", "field": 10, "value": area}]}
+        for area in range(100, 100 + 10 * count, 10)
+    ]
+
+
+@override_settings(ENERGYPLUS_MAX_WORKERS=4)
+class BatchTests(SimulationTestCase):
+    def submit(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/simulation/batch', dict({"idf_content": OFFICE_IDF}, **data),
+                                    content_type='application/json')
+
+    def uploaded_files(self) -> list:
+        return sorted(str(p.relative_to(self.idf_dir)) for p in self.idf_dir.rglob('*') if p.is_file())
+
+    def test_max_concurrency_caps_queued_variants(self):
+        response = self.submit(variants=variants(5), max_concurrency=2)
+        self.assertEqual(response.status_code, 202)
+        statuses = list(SimulationRun.objects.order_by('pk').values_list('status', flat=True))
+        self.assertEqual(statuses, ['queued'] * 2 + ['pending'] * 3)
+        self.assertEqual(len(self.queued()), 2)
+
+    def test_concurrency_is_capped_by_local_workers(self):
+        self.submit(variants=variants(6), max_concurrency=10)
+        self.assertEqual(SimulationBatch.objects.get().max_concurrency, 4)
+        self.assertEqual(SimulationRun.objects.filter(status=SimulationRun.Status.QUEUED).count(), 4)
+
+    def test_batch_completes_with_its_last_variant(self):
+        batch_id = self.submit(variants=variants(3), max_concurrency=1).json()["batch_id"]
+        self.assertEqual(self.run_queued(), 3)
+        summary = self.client.get(f'/api/simulation/batch/{batch_id}').json()
+        self.assertEqual(summary["status"], SimulationBatch.Status.COMPLETED)
+        self.assertEqual(summary["progress"]["completed"], 3)
+        self.assertEqual([v["variant_name"] for v in summary["variants"]], ['area 100', 'area 110', 'area 120'])
+        self.assertIsNotNone(summary["finished_at"])
+
+    def test_rejected_batch_leaves_no_files(self):
+        bad = variants(2) + [{"name": "bad", "overrides": [{"object": "Nope", "field": 1, "value": 1}]}]
+        response = self.submit(variants=bad)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.uploaded_files(), ['office.idf'])
+        self.assertFalse(SimulationBatch.objects.exists())
+
+    def test_unexpected_error_returns_json_and_cleans_up(self):
+        # The variant directory can't be created
+        (self.idf_dir / 'batches').write_text('')
+        response = self.submit(variants=variants(2))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["status"], 'error')
+        self.assertEqual(self.uploaded_files(), ['batches', 'office.idf'])
+        self.assertFalse(SimulationRun.objects.exists())
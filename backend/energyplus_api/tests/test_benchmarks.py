@@ -0,0 +1,25 @@
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from energyplus_api import benchmarks
+from energyplus_api.benchmarks import Measurement
+
+
+class BaselineTests(SimpleTestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'baseline.json'
+            self.assertEqual(benchmarks.load_baseline(path), {})
+            benchmarks.save_baseline(path, [Measurement('a', 0.5, 0.6, 3)])
+            benchmarks.save_baseline(path, [Measurement('b', 0.25, 0.3, 3)])
+            self.assertEqual(benchmarks.load_baseline(path), {"a": 0.5, "b": 0.25})
+
+    def test_regressed(self):
+        baseline = {"slow": 1.0, "tiny": 0.0001}
+        self.assertTrue(benchmarks.regressed(Measurement('slow', 1.5, 1.6, 3), baseline, 0.2))
+        self.assertFalse(benchmarks.regressed(Measurement('slow', 1.1, 1.2, 3), baseline, 0.2))
+        # Below the noise floor a relative slowdown doesn't count.
+        self.assertFalse(benchmarks.regressed(Measurement('tiny', 0.0003, 0.0003, 3), baseline, 0.2))
+        self.assertFalse(benchmarks.regressed(Measurement('new', 9.0, 9.0, 3), baseline, 0.2))
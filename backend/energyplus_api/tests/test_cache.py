@@ -0,0 +1,104 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from energyplus_api.cache import ResultCache, compute_cache_key, normalize_idf
+from energyplus_api.models import SimulationCacheEntry
+
+from .samples import OFFICE_IDF
+
+RESULTS = {"simulation_id": 'sim-1', "idf_file": 'office.idf', "total_energy": 100.0,
+           "additional_info": {"eui": 1.0}}
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_formatting_does_not_change_the_key(self):
+        reformatted = "\n".join(f"  {line}   ! note" for line in OFFICE_IDF.splitlines())
+        self.assertEqual(normalize_idf(reformatted), normalize_idf(OFFICE_IDF))
+        self.assertEqual(compute_cache_key(reformatted), compute_cache_key(OFFICE_IDF))
+
+    def test_weather_and_version_change_the_key(self):
+        keys = {
+            compute_cache_key(OFFICE_IDF),
+            compute_cache_key(OFFICE_IDF, weather_hash='a' * 64),
+            compute_cache_key(OFFICE_IDF, energyplus_version='23.2.0'),
+        }
+        self.assertEqual(len(keys), 3)
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ResultCache()
+
+    def test_hit_is_relabelled(self):
+        self.cache.store('k', 'sim-1', RESULTS)
+        results = self.cache.get_or_run('k', 'sim-2', 'copy.idf', self.fail)
+        self.assertEqual((results["simulation_id"], results["idf_file"]), ('sim-2', 'copy.idf'))
+        self.assertEqual(results["additional_info"], {"eui": 1.0, "cached_from": 'sim-1'})
+        self.assertEqual(SimulationCacheEntry.objects.get().hits, 1)
+        # The stored results are untouched.
+        self.assertNotIn("cached_from", SimulationCacheEntry.objects.get().results["additional_info"])
+
+    def test_mock_results_are_not_stored(self):
+        self.cache.get_or_run('k', 'sim-1', 'office.idf', lambda: dict(RESULTS, used_mock_data=True))
+        self.assertFalse(SimulationCacheEntry.objects.exists())
+
+    def test_failures_are_not_stored(self):
+        def fail():
+            raise RuntimeError("EnergyPlus crashed")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_run('k', 'sim-1', 'office.idf', fail)
+        self.assertFalse(SimulationCacheEntry.objects.exists())
+
+    @override_settings(ENERGYPLUS_RESULT_CACHE_MAX_ENTRIES=2, ENERGYPLUS_RESULT_CACHE_MAX_AGE_DAYS=30)
+    def test_evict(self):
+        for key in ('a', 'b'):
+            self.cache.store(key, f'sim-{key}', RESULTS)
+        SimulationCacheEntry.objects.filter(cache_key='a').update(last_hit_at=timezone.now() + timedelta(minutes=1))
+        self.cache.store('c', 'sim-c', RESULTS)
+        self.assertCountEqual(SimulationCacheEntry.objects.values_list('cache_key', flat=True), ['a', 'c'])
+
+        SimulationCacheEntry.objects.filter(cache_key='a').update(created_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get('a', 'sim-d', 'office.idf'))
+
+
+class CoalescingTests(TransactionTestCase):
+    def test_identical_requests_run_once(self):
+        cache = ResultCache()
+        calls = []
+        release = threading.Event()
+        results = {}
+
+        def run():
+            calls.append(1)
+            release.wait(5)
+            return dict(RESULTS)
+
+        def request(simulation_id):
+            try:
+                results[simulation_id] = cache.get_or_run('k', simulation_id, 'office.idf', run)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=request, args=(f'sim-{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        # Let every request find the run in flight before it finishes.
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        leader = next(s for s, r in results.items() if "cached_from" not in r["additional_info"])
+        for simulation_id, result in results.items():
+            self.assertEqual(result["simulation_id"], simulation_id if simulation_id != leader else 'sim-1')
+            if simulation_id != leader:
+                self.assertEqual(result["additional_info"]["cached_from"], leader)
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from energyplus_api.catalog import IDFCatalog
+
+from .samples import OFFICE_IDF
+
+
+def model_idf(building_name: str) -> str:
+    """OFFICE_IDF with nothing but the Building name telling what it is."""
+    return OFFICE_IDF.replace('Two-zone office', 'Two-zone model').replace('Small Office Building', building_name)
+
+
+class CatalogTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.idf_dir = Path(tmp.name)
+        (self.idf_dir / 'office.idf').write_text(OFFICE_IDF)
+        (self.idf_dir / 'model.idf').write_text(model_idf('Main Street'))
+        (self.idf_dir / 'custom_upload.idf').write_text(OFFICE_IDF)
+        self.catalog = IDFCatalog(self.idf_dir, refresh_seconds=0)
+
+    def test_entries(self):
+        entries = self.catalog.entries
+        self.assertEqual(sorted(entries), ['model.idf', 'office.idf'])
+        self.assertEqual(entries['office.idf'].building_type, 'office')
+        self.assertEqual((entries['office.idf'].zones, entries['office.idf'].floor_area), (2, 150.0))
+        self.assertIsNone(entries['model.idf'].building_type)
+
+    def test_select(self):
+        self.assertEqual(self.catalog.select('simulate an office building'), 'office.idf')
+        self.assertEqual(self.catalog.select('main street'), 'model.idf')
+        self.assertEqual(self.catalog.select('a hospital'), 'model.idf')
+
+    def test_file_edited_in_place_is_rescanned(self):
+        self.assertEqual(self.catalog.select('a school'), 'model.idf')
+        path = self.idf_dir / 'model.idf'
+        dir_mtime = os.stat(self.idf_dir).st_mtime_ns
+        path.write_text(model_idf('Elementary School'))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        # Rewriting a file in place leaves the directory mtime alone
+        self.assertEqual(os.stat(self.idf_dir).st_mtime_ns, dir_mtime)
+
+        self.assertEqual(self.catalog.entries['model.idf'].building_type, 'school')
+        self.assertEqual(self.catalog.select('a school'), 'model.idf')
+        self.assertEqual(self.catalog.search('a school')[0][1], 5.0)
+
+    def test_refresh_interval(self):
+        catalog = IDFCatalog(self.idf_dir, refresh_seconds=3600)
+        self.assertEqual(len(catalog.entries), 2)
+        (self.idf_dir / 'school.idf').write_text(OFFICE_IDF)
+        self.assertEqual(len(catalog.entries), 2)
+        catalog.refresh(force=True)
+        self.assertEqual(catalog.entries['school.idf'].building_type, 'school')
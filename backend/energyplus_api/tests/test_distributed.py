@@ -0,0 +1,179 @@
+import threading
+from datetime import timedelta
+
+from django.db import OperationalError, close_old_connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from energyplus_api import distributed, jobs, retention
+from energyplus_api.models import SimulationRun
+
+from .base import SimulationTestCase
+from .samples import OFFICE_IDF
+
+
+def make_run(simulation_id: str, **fields) -> SimulationRun:
+    fields = dict({"status": SimulationRun.Status.QUEUED, "message": 'office', "idf_file": 'office.idf'}, **fields)
+    return SimulationRun.objects.create(simulation_id=simulation_id, **fields)
+
+
+class ClaimTests(TestCase):
+    def test_claims_lowest_priority_first(self):
+        make_run('late', priority=20)
+        make_run('early', priority=10)
+        run = distributed.claim('w1', lease_seconds=30)
+        self.assertEqual(run.simulation_id, 'early')
+        self.assertEqual((run.status, run.worker_id, run.attempts),
+                         (SimulationRun.Status.RUNNING, 'w1', 1))
+        self.assertGreater(run.lease_expires_at, timezone.now())
+        self.assertEqual(distributed.claim('w2').simulation_id, 'late')
+        self.assertIsNone(distributed.claim('w3'))
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    def test_no_run_is_claimed_twice(self):
+        for i in range(20):
+            make_run(f'sim-{i}')
+        claimed = {}
+        lock = threading.Lock()
+
+        def work(worker_id):
+            try:
+                while True:
+                    try:
+                        run = distributed.claim(worker_id)
+                    except OperationalError:
+                        # SQLite's shared in-memory test database locks whole tables.
+                        continue
+                    if run is None:
+                        return
+                    with lock:
+                        claimed.setdefault(run.pk, []).append(worker_id)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=work, args=(f'w{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(claimed), 20)
+        self.assertTrue(all(len(workers) == 1 for workers in claimed.values()))
+        for run in SimulationRun.objects.all():
+            self.assertEqual([run.worker_id], claimed[run.pk])
+
+
+@override_settings(ENERGYPLUS_WORKER_MAX_ATTEMPTS=2)
+class LeaseTests(TestCase):
+    def setUp(self):
+        past = timezone.now() - timedelta(seconds=5)
+        self.lost = make_run('lost', status=SimulationRun.Status.RUNNING, worker_id='dead',
+                               lease_expires_at=past, attempts=1, started_at=past)
+        self.doomed = make_run('doomed', status=SimulationRun.Status.RUNNING, worker_id='dead',
+                                 lease_expires_at=past, attempts=2, started_at=past)
+        self.alive = make_run('alive', status=SimulationRun.Status.RUNNING, worker_id='w1',
+                                lease_expires_at=timezone.now() + timedelta(seconds=60), attempts=1)
+
+    def test_requeue_expired(self):
+        with self.assertLogs('energyplus_api.distributed', 'WARNING'):
+            self.assertEqual(distributed.requeue_expired(), 1)
+        self.lost.refresh_from_db()
+        self.assertEqual((self.lost.status, self.lost.worker_id, self.lost.lease_expires_at, self.lost.started_at),
+                         (SimulationRun.Status.QUEUED, '', None, None))
+        self.doomed.refresh_from_db()
+        self.assertEqual(self.doomed.status, SimulationRun.Status.FAILED)
+        self.assertIn('Worker lost 2 times', self.doomed.error)
+        self.alive.refresh_from_db()
+        self.assertEqual(self.alive.status, SimulationRun.Status.RUNNING)
+
+    def test_heartbeat_extends_own_leases_and_requeues_lost_ones(self):
+        worker = distributed.Worker(1, lease_seconds=30)
+        worker.worker_id = 'w1'
+        worker._running.add(self.alive.pk)
+        SimulationRun.objects.filter(pk=self.alive.pk).update(lease_expires_at=timezone.now())
+        with self.assertLogs('energyplus_api.distributed', 'WARNING'):
+            worker.heartbeat()
+        self.alive.refresh_from_db()
+        self.assertGreater(self.alive.lease_expires_at, timezone.now() + timedelta(seconds=20))
+        self.lost.refresh_from_db()
+        self.assertEqual(self.lost.status, SimulationRun.Status.QUEUED)
+
+
+class LostLeaseTests(SimulationTestCase):
+    @override_settings(ENERGYPLUS_EXECUTION='distributed')
+    def test_outcome_of_a_lost_lease_is_dropped(self):
+        make_run('sim-1')
+        worker = distributed.Worker(1, lease_seconds=30)
+        run = distributed.claim(worker.worker_id)
+        # The lease ran out and another worker claimed the run since.
+        SimulationRun.objects.filter(pk=run.pk).update(worker_id='w2')
+        with self.assertLogs('energyplus_api.jobs', 'WARNING') as logs:
+            worker._execute(run)
+        self.assertIn('Lease lost', logs.output[-1])
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.worker_id, run.total_energy),
+                         (SimulationRun.Status.RUNNING, 'w2', None))
+
+    @override_settings(ENERGYPLUS_EXECUTION='distributed')
+    def test_outcome_is_recorded_while_the_lease_is_held(self):
+        make_run('sim-1')
+        worker = distributed.Worker(1, lease_seconds=30)
+        worker._execute(distributed.claim(worker.worker_id))
+        run = SimulationRun.objects.get(simulation_id='sim-1')
+        self.assertEqual(run.status, SimulationRun.Status.COMPLETED)
+        self.assertIsNone(run.lease_expires_at)
+
+    @override_settings(ENERGYPLUS_EXECUTION='distributed')
+    def test_priority_is_saved_with_the_queued_row(self):
+        # Workers may claim the row before the on_commit callback runs.
+        run = jobs.submit_simulation('office', idf_content=OFFICE_IDF)
+        self.assertNotEqual(SimulationRun.objects.get(pk=run.pk).priority, 0)
+        self.assertTrue(run.input_hash)
+
+
+@override_settings(ENERGYPLUS_WORKER_TOKEN='secret')
+class ArtifactUploadTests(SimulationTestCase):
+    url = '/api/worker/runs/sim-1/artifacts/results.json'
+
+    def setUp(self):
+        super().setUp()
+        make_run('sim-1', status=SimulationRun.Status.RUNNING, worker_id='w1')
+
+    def put(self, url=None, **headers):
+        return self.client.put(url or self.url, data=b'{}', content_type='application/octet-stream', **headers)
+
+    def test_missing_or_wrong_token(self):
+        self.assertEqual(self.put(HTTP_X_WORKER_ID='w1').status_code, 403)
+        self.assertEqual(self.put(HTTP_AUTHORIZATION='Bearer guess', HTTP_X_WORKER_ID='w1').status_code, 403)
+        with override_settings(ENERGYPLUS_WORKER_TOKEN=''):
+            self.assertEqual(self.put(HTTP_AUTHORIZATION='Bearer ', HTTP_X_WORKER_ID='w1').status_code, 403)
+        self.assertFalse((self.output_dir / 'sim-1').exists())
+
+    def test_only_the_lease_holder_uploads(self):
+        response = self.put(HTTP_AUTHORIZATION='Bearer secret', HTTP_X_WORKER_ID='w2')
+        self.assertEqual(response.status_code, 409)
+
+    def test_rejects_other_file_names(self):
+        response = self.put('/api/worker/runs/sim-1/artifacts/.bashrc',
+                            HTTP_AUTHORIZATION='Bearer secret', HTTP_X_WORKER_ID='w1')
+        self.assertEqual(response.status_code, 400)
+
+    def test_upload(self):
+        response = self.put(HTTP_AUTHORIZATION='Bearer secret', HTTP_X_WORKER_ID='w1')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((self.output_dir / 'sim-1' / 'results.json').read_bytes(), b'{}')
+
+
+class RetentionOwnerTests(TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, jobs, '_queue', jobs._queue)
+        self.addCleanup(setattr, retention, '_periodic_thread', retention._periodic_thread)
+        jobs._queue = None
+        retention._periodic_thread = None
+
+    @override_settings(ENERGYPLUS_EXECUTION='distributed', ENERGYPLUS_RETENTION_INTERVAL_SECONDS=3600)
+    def test_worker_queue_does_not_sweep(self):
+        # Workers reach get_queue() to queue full runs and batch variants.
+        self.assertIsInstance(jobs.get_queue(), jobs.DatabaseQueue)
+        self.assertIsNone(retention._periodic_thread)
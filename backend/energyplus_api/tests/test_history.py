@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from energyplus_api.history import encode_cursor
+from energyplus_api.models import SimulationRun
+
+URL = '/api/simulation/history'
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(7):
+            run = SimulationRun.objects.create(
+                simulation_id=f'sim-{i}', message='office', idf_file='office.idf',
+                status=SimulationRun.Status.COMPLETED, total_energy=100.0 + i,
+            )
+            # Five runs share a timestamp, so the id alone must break the tie
+            created_at = now if i < 5 else now + timedelta(seconds=i)
+            SimulationRun.objects.filter(pk=run.pk).update(created_at=created_at)
+
+    def walk(self, **params) -> list:
+        seen, cursor = [], None
+        for _ in range(10):
+            response = self.client.get(URL, dict(params, **({"cursor": cursor} if cursor else {})))
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(page["count"], int(params.get('limit', 20)))
+            seen += [item["simulation_id"] for item in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return seen
+        self.fail("next_cursor never ran out")
+
+    def test_pages_cover_every_run_once(self):
+        expected = ['sim-6', 'sim-5', 'sim-4', 'sim-3', 'sim-2', 'sim-1', 'sim-0']
+        for limit in (1, 2, 3, 7):
+            self.assertEqual(self.walk(limit=limit, fields='simulation_id'), expected, limit)
+        self.assertEqual(self.walk(limit=2, fields='simulation_id', idf_file='office.idf'), expected)
+
+    def test_fields_projection(self):
+        page = self.client.get(URL, {"fields": 'simulation_id,total_energy', "limit": 1}).json()
+        self.assertEqual(page["results"], [{"simulation_id": 'sim-6', "total_energy": 106.0}])
+
+        response = self.client.get(URL, {"fields": 'simulation_id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()["message"])
+
+    def test_malformed_cursor(self):
+        for cursor in ('not-a-cursor', 'bm9waXBl', encode_cursor(timezone.now(), 1)[:-3] + '!!!'):
+            response = self.client.get(URL, {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json()["message"], 'Invalid cursor')
@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase
+
+from energyplus_api.idf import apply_overrides, parse_text, serialize, validate
+
+from .samples import OFFICE_IDF
+
+
+class IDFModelTests(SimpleTestCase):
+    def test_summary(self):
+        summary = parse_text(OFFICE_IDF).summary()
+        self.assertEqual(summary["version"], '23.2')
+        self.assertEqual(summary["building"], 'Small Office Building')
+        self.assertEqual(summary["zone_names"], ['Core Zone', 'Perimeter Zone'])
+        self.assertEqual(summary["floor_area"], 150.0)
+        self.assertEqual(summary["timesteps_per_hour"], 4)
+        self.assertEqual(summary["run_periods"], [
+            {"name": 'Annual', "begin_month": 1, "begin_day": 1, "end_month": 12, "end_day": 31},
+        ])
+        self.assertEqual(summary["outputs"]["meters"][0]["name"], 'Electricity:Facility')
+
+    def test_run_periods_before_version_9(self):
+        model = parse_text("Version, 8.9;\nRunPeriod, Summer, 6, 1, 8, 31;")
+        self.assertEqual(model.run_periods[0]["end_month"], 8)
+        self.assertEqual(model.run_periods[0]["end_day"], 31)
+
+    def test_serialize_round_trip(self):
+        model = parse_text(OFFICE_IDF)
+        self.assertEqual(parse_text(serialize(model.objects)).summary(), model.summary())
+
+    def test_validate_rejects_unterminated_object(self):
+        with self.assertRaises(ValueError):
+            validate("Version, 23.2;\nZone, Core")
+        with self.assertRaises(ValueError):
+            validate("! only a comment\n")
+
+
+class OverrideTests(SimpleTestCase):
+    def test_override_by_name(self):
+        text = apply_overrides(OFFICE_IDF, [{"object": "Zone", "name": "core zone", "field": 10, "value": 80}])
+        areas = {obj.name: obj.fields[9] for obj in parse_text(text).get('Zone')}
+        self.assertEqual(areas, {'Core Zone': '80', 'Perimeter Zone': '50'})
+
+    def test_override_extends_short_objects(self):
+        text = apply_overrides(OFFICE_IDF, [{"object": "Timestep", "field": 3, "value": "x"}])
+        self.assertEqual(parse_text(text).first('Timestep').fields, ['4', '', 'x'])
+
+    def test_base_model_is_not_modified(self):
+        apply_overrides(OFFICE_IDF, [{"object": "Timestep", "field": 1, "value": 60}])
+        self.assertEqual(parse_text(OFFICE_IDF).timesteps_per_hour, 4)
+
+    def test_invalid_overrides(self):
+        for override in ({"object": "Zone"}, {"object": "Zone", "field": 0, "value": 1},
+                         {"object": "Nope", "field": 1, "value": 1}, "zone"):
+            with self.subTest(override=override), self.assertRaises(ValueError):
+                apply_overrides(OFFICE_IDF, [override])
+
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from energyplus_api import jobs
+from energyplus_api.models import SimulationRun
+
+from .base import SimulationTestCase
+from .samples import OFFICE_IDF
+
+
+class QueueTests(SimulationTestCase):
+    def test_lowest_priority_first_then_fifo(self):
+        for run_pk, priority in ((1, 5.0), (2, 1.0), (3, 5.0), (4, 1.0)):
+            self.queue.enqueue(run_pk, priority)
+        self.assertEqual(self.queued(), [2, 4, 1, 3])
+
+    def test_run_endpoint_queues_and_the_worker_completes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/simulation/run', {"message": "office", "idf_content": OFFICE_IDF},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual(data["status"], SimulationRun.Status.QUEUED)
+
+        self.assertEqual(self.run_queued(), 1)
+        status = self.client.get(data["status_url"]).json()
+        self.assertEqual(status["status"], SimulationRun.Status.COMPLETED)
+        result = self.client.get(data["result_url"]).json()
+        self.assertEqual(result["simulation_id"], data["simulation_id"])
+
+    def test_job_enqueued_twice_runs_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            run = jobs.submit_simulation('office', idf_content=OFFICE_IDF)
+        self.queue.enqueue(run.pk, run.priority)
+        jobs.execute_job(self.queued()[0])
+        run.refresh_from_db()
+        self.assertEqual(run.status, SimulationRun.Status.COMPLETED)
+        finished_at = run.finished_at
+
+        jobs.execute_job(run.pk)
+        run.refresh_from_db()
+        self.assertEqual(run.finished_at, finished_at)
+
+    def test_running_job_is_not_started_again(self):
+        started_at = timezone.now() - timedelta(seconds=5)
+        run = SimulationRun.objects.create(simulation_id='sim-1', message='office', idf_file='office.idf',
+                                           status=SimulationRun.Status.RUNNING, started_at=started_at)
+        jobs.execute_job(run.pk)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.started_at), (SimulationRun.Status.RUNNING, started_at))
+
+    def test_recover_jobs(self):
+        now = timezone.now()
+        runs = {
+            name: SimulationRun.objects.create(
+                simulation_id=name, message='office', idf_file='office.idf', status=status,
+                started_at=started_at, timeout_seconds=60,
+            )
+            for name, status, started_at in (
+                ('queued', SimulationRun.Status.QUEUED, None),
+                ('stale', SimulationRun.Status.RUNNING, now - timedelta(minutes=5)),
+                ('running', SimulationRun.Status.RUNNING, now - timedelta(seconds=30)),
+                ('done', SimulationRun.Status.COMPLETED, now - timedelta(minutes=5)),
+            )
+        }
+        jobs._recover_jobs(self.queue)
+        self.assertCountEqual(self.queued(), [runs['queued'].pk, runs['stale'].pk])
+        statuses = dict(SimulationRun.objects.values_list('simulation_id', 'status'))
+        self.assertEqual(statuses, {
+            'queued': SimulationRun.Status.QUEUED,
+            'stale': SimulationRun.Status.QUEUED,
+            'running': SimulationRun.Status.RUNNING,
+            'done': SimulationRun.Status.COMPLETED,
+        })
@@ -0,0 +1,193 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from energyplus_api import csv_output, html_output, sql_output, synthetic, timeseries
+from energyplus_api.downsampling import aggregate, lttb
+
+from .samples import hourly_rows, write_csv, write_meter_sql
+
+KWH = str(3.6e6)  # one kWh in joules
+
+
+class OutputTestCase(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+
+class CSVOutputTests(OutputTestCase):
+    def test_parse_header(self):
+        columns = csv_output.parse_header(['Date/Time', 'CORE ZONE:Zone Lights Electricity Energy [J](Hourly)',
+                                           'InteriorLights:Electricity [J](Hourly)', 'Not a series'])
+        self.assertEqual([(c.key, c.variable, c.units, c.frequency) for c in columns], [
+            ('CORE ZONE', 'Zone Lights Electricity Energy', 'J', 'Hourly'),
+            ('', 'InteriorLights:Electricity', 'J', 'Hourly'),
+        ])
+        self.assertTrue(columns[1].is_meter)
+
+    def test_parse_timestamps(self):
+        minutes = csv_output.parse_timestamps([' 01/01  01:00:00', ' 02/01  00:15:00', '01/02', 'January'])
+        self.assertEqual(minutes[:3].tolist(), [60.0, 31 * 1440 + 15, 2 * 1440])
+        self.assertTrue(np.isnan(minutes[3]))
+
+    def test_summarize_end_uses_prefers_meters(self):
+        csv_file = write_csv(
+            self.tmp / 'eplusout.csv',
+            ['InteriorLights:Electricity [J](Hourly)', 'CORE:Zone Lights Electricity Energy [J](Hourly)'],
+            [row + [KWH] for row in hourly_rows([1], KWH)],
+        )
+        self.assertEqual(csv_output.summarize_end_uses([csv_file])["lighting"], 24.0)
+
+    def test_chunk_size_does_not_change_totals(self):
+        csv_file = write_csv(self.tmp / 'eplusout.csv', ['InteriorLights:Electricity [J](Hourly)'],
+                             hourly_rows([1, 2], KWH))
+        for chunk_rows in (5, 24, 1000):
+            with self.subTest(chunk_rows=chunk_rows):
+                totals = csv_output.summarize_end_uses([csv_file], chunk_rows=chunk_rows)
+                self.assertEqual(totals["lighting"], 48.0)
+
+    def test_summarize_end_uses_skips_sizing_periods(self):
+        # A July design day is reported first, then the January run period.
+        rows = hourly_rows([21], str(3.6e7), month=7) + hourly_rows([1, 2], KWH)
+        csv_file = write_csv(self.tmp / 'eplusout.csv', ['InteriorLights:Electricity [J](Hourly)'], rows)
+        for chunk_rows in (5, 24, 1000):
+            with self.subTest(chunk_rows=chunk_rows):
+                totals = csv_output.summarize_end_uses([csv_file], chunk_rows=chunk_rows)
+                self.assertEqual(totals["lighting"], 48.0)
+
+    def test_no_energy_columns(self):
+        csv_file = write_csv(self.tmp / 'eplusout.csv', ['CORE:Zone Air Temperature [C](Hourly)'],
+                             hourly_rows([1], '21.5'))
+        self.assertIsNone(csv_output.summarize_end_uses([csv_file]))
+
+
+class SQLOutputTests(OutputTestCase):
+    def test_summarize_end_uses_skips_sizing_periods(self):
+        # EnvironmentType 1 is a design day, 3 a weather-file run period.
+        sql_file = write_meter_sql(self.tmp / 'eplusout.sql', 'InteriorLights:Electricity', 'J',
+                                   [(1, [3.6e9]), (3, [3.6e9])])
+        self.assertEqual(sql_output.summarize_end_uses(sql_file)["lighting"], 1000.0)
+
+    def test_summarize_end_uses_without_run_period(self):
+        sql_file = write_meter_sql(self.tmp / 'eplusout.sql', 'InteriorLights:Electricity', 'J',
+                                   [(1, [3.6e9]), (1, [7.2e9])])
+        self.assertEqual(sql_output.summarize_end_uses(sql_file)["lighting"], 2000.0)
+
+    def test_read_many_matches_read_series(self):
+        sql_file = synthetic.write_sql(self.tmp / 'eplusout.sql', rows=48, columns=8)
+        described = sql_output.list_series(sql_file)
+        read = sql_output.read_many(sql_file, [s["index"] for s in described] + [999])
+        self.assertEqual(len(read[999][0]), 0)
+        for s in described:
+            minutes, values, _ = sql_output.read_series(sql_file, s["name"], key=s["key"] or None,
+                                                        frequency=s["frequency"])
+            self.assertEqual(len(minutes), 48)
+            self.assertEqual(read[s["index"]][0].tolist(), minutes.tolist())
+            self.assertEqual(read[s["index"]][1].tolist(), values.tolist())
+        self.assertEqual(minutes[:2].tolist(), [60.0, 120.0])
+
+        # Too many series for an IN list: the scan filters in numpy instead
+        self.addCleanup(setattr, sql_output, 'MAX_FILTERED_SERIES', sql_output.MAX_FILTERED_SERIES)
+        sql_output.MAX_FILTERED_SERIES = 2
+        indexes = [s["index"] for s in described[:3]]
+        unfiltered = sql_output.read_many(sql_file, indexes)
+        self.assertEqual(sorted(unfiltered), sorted(indexes))
+        for index in indexes:
+            self.assertEqual(unfiltered[index][1].tolist(), read[index][1].tolist())
+
+
+class HTMLOutputTests(OutputTestCase):
+    def test_read_summary(self):
+        html_file = self.tmp / 'eplustbl.htm'
+        html_file.write_text(
+            '<html><body><b>Site and Source Energy</b><table>'
+            '<tr><td></td><td>Total Energy [kWh]</td><td>Energy Per Total Building Area [kWh/m2]</td></tr>'
+            '<tr><td>Total Site Energy</td><td>1500.00</td><td>10.00</td></tr></table>'
+            '<b>End Uses</b><table><tr><td></td><td>Electricity [kWh]</td><td>Natural Gas [kWh]</td></tr>'
+            '<tr><td>Heating</td><td>100.00</td><td>400.00</td></tr>'
+            '<tr><td>Interior Lighting</td><td>250.50</td><td>0.00</td></tr>'
+            '<tr><td>Total End Uses</td><td>350.50</td><td>400.00</td></tr></table></body></html>'
+        )
+        summary = html_output.read_summary(html_file, chunk_size=64)
+        self.assertEqual(summary["energy_by_type"]["heating"], 500.0)
+        self.assertEqual(summary["energy_by_type"]["lighting"], 250.5)
+        self.assertEqual(summary["total_site_energy"], 1500.0)
+        self.assertEqual(summary["eui"], 10.0)
+
+    def test_no_end_uses_table(self):
+        html_file = self.tmp / 'eplustbl.htm'
+        html_file.write_text('<html><body><b>Other</b><table><tr><td>1</td></tr></table></body></html>')
+        self.assertIsNone(html_output.read_summary(html_file))
+
+
+class TimeSeriesStoreTests(OutputTestCase):
+    def test_csv_and_sql_stores_agree(self):
+        (self.tmp / 'csv').mkdir()
+        (self.tmp / 'sql').mkdir()
+        synthetic.write_csv(self.tmp / 'csv' / 'eplusout.csv', rows=48, columns=8)
+        synthetic.write_sql(self.tmp / 'sql' / 'eplusout.sql', rows=48, columns=8)
+        self.assertEqual(len(timeseries.write_store(self.tmp / 'csv')["series"]), 8)
+        timeseries.write_store(self.tmp / 'sql')
+
+        csv_minutes, csv_values, _ = timeseries.open_store(self.tmp / 'csv').read('InteriorLights:Electricity')
+        sql_minutes, sql_values, _ = timeseries.open_store(self.tmp / 'sql').read('InteriorLights:Electricity')
+        self.assertEqual(csv_minutes.tolist(), sql_minutes.tolist())
+        np.testing.assert_allclose(csv_values, sql_values)
+
+    def test_read_slices(self):
+        write_csv(self.tmp / 'eplusout.csv', ['InteriorLights:Electricity [J](Hourly)'], hourly_rows([1], KWH))
+        self.assertEqual(len(timeseries.write_store(self.tmp)["series"]), 1)
+        store = timeseries.open_store(self.tmp)
+        minutes, _, _ = store.read('interiorlights:electricity', start=60, end=180)
+        self.assertEqual(minutes.tolist(), [120.0, 180.0])
+        with self.assertRaises(KeyError):
+            store.read('Missing:Series')
+
+    def test_store_keeps_the_last_environment(self):
+        rows = hourly_rows([21], str(3.6e7), month=7) + hourly_rows([1], KWH)
+        write_csv(self.tmp / 'eplusout.csv', ['InteriorLights:Electricity [J](Hourly)'], rows)
+        timeseries.write_store(self.tmp)
+        minutes, values, _ = timeseries.open_store(self.tmp).read('InteriorLights:Electricity')
+        self.assertEqual(len(minutes), 24)
+        self.assertEqual(float(values.sum()), 24 * 3.6e6)
+
+    def test_series_payload(self):
+        write_csv(self.tmp / 'eplusout.csv', ['InteriorLights:Electricity [J](Hourly)'], hourly_rows([1, 2], KWH))
+        timeseries.write_store(self.tmp)
+        payload = timeseries.series_payload(timeseries.open_store(self.tmp), 'InteriorLights:Electricity',
+                                            resolution='daily')
+        self.assertEqual(payload["time"], [1440, 2880])
+        self.assertEqual(payload["values"], [24 * 3.6e6, 24 * 3.6e6])
+        self.assertEqual(payload["aggregation"], 'sum')
+
+    def test_parse_moment(self):
+        self.assertEqual(timeseries.parse_moment('120'), 120.0)
+        self.assertEqual(timeseries.parse_moment('02-01'), 31 * 1440.0)
+        self.assertEqual(timeseries.parse_moment('01-01T06:30'), 390.0)
+        with self.assertRaises(ValueError):
+            timeseries.parse_moment('13-01')
+
+
+class DownsamplingTests(SimpleTestCase):
+    def test_aggregate(self):
+        minutes = np.arange(1, 49) * 60.0
+        values = np.ones(48)
+        self.assertEqual(aggregate(minutes, values, 'daily')[1].tolist(), [24.0, 24.0])
+        self.assertEqual(aggregate(minutes, values, 'daily', 'mean')[1].tolist(), [1.0, 1.0])
+        ends, totals = aggregate(minutes, values, 'monthly')
+        self.assertEqual((ends.tolist(), totals.tolist()), ([31 * 1440.0], [48.0]))
+        with self.assertRaises(ValueError):
+            aggregate(minutes, values, 'weekly')
+
+    def test_lttb_keeps_ends_and_peaks(self):
+        minutes = np.arange(1000, dtype=float)
+        values = np.zeros(1000)
+        values[500] = 10.0
+        kept_minutes, kept_values = lttb(minutes, values, 20)
+        self.assertEqual(len(kept_minutes), 20)
+        self.assertEqual((kept_minutes[0], kept_minutes[-1]), (0.0, 999.0))
+        self.assertIn(10.0, kept_values.tolist())
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from energyplus_api import retention
+from energyplus_api.models import SimulationCacheEntry, SimulationRun
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        self.output_dir = root / 'simulations'
+        self.idf_dir = root / 'idf'
+        self.output_dir.mkdir()
+        self.idf_dir.mkdir()
+        overrides = override_settings(
+            ENERGYPLUS_OUTPUT_DIR=self.output_dir,
+            ENERGYPLUS_IDF_DIR=self.idf_dir,
+            ENERGYPLUS_PROFILE_DIR=root / 'profiles',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def make_dir(self, name: str, age_days: float = 2) -> Path:
+        path = self.output_dir / name
+        path.mkdir()
+        (path / 'eplusout.csv').write_bytes(b'x' * 1000)
+        stamp = time.time() - age_days * 86400
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def make_run(self, simulation_id: str, age_days: float = 2) -> SimulationRun:
+        self.make_dir(simulation_id, age_days)
+        return SimulationRun.objects.create(
+            simulation_id=simulation_id, message='office', status=SimulationRun.Status.COMPLETED,
+            finished_at=timezone.now() - timezone.timedelta(days=age_days),
+        )
+
+    def test_orphans_are_opt_in(self):
+        self.make_dir('orphan')
+        stats = retention.sweep(max_age_days=0, max_bytes=0, orphans=False)
+        self.assertEqual(stats["orphans"], 0)
+        self.assertTrue((self.output_dir / 'orphan').is_dir())
+
+    def test_orphans_keep_cached_and_recent_directories(self):
+        self.make_dir('orphan')
+        self.make_dir('cached')
+        self.make_dir('fresh', age_days=0)
+        SimulationCacheEntry.objects.create(cache_key='k' * 64, simulation_id='cached', results={})
+        stats = retention.sweep(max_age_days=0, max_bytes=0, orphans=True)
+        self.assertEqual(stats["orphans"], 1)
+        self.assertEqual(sorted(p.name for p in self.output_dir.iterdir()), ['cached', 'fresh'])
+
+    def test_archive(self):
+        run = self.make_run('sim-1')
+        (self.output_dir / 'sim-1' / 'eplusout.audit').write_text('audit')
+        (self.output_dir / 'sim-1' / 'results.json').write_text('{}')
+        stats = retention.sweep(max_age_days=0, max_bytes=0)
+        self.assertEqual(stats["archived"], 1)
+        self.assertEqual(sorted(p.name for p in (self.output_dir / 'sim-1').iterdir()),
+                         [retention.ARCHIVE_NAME, 'results.json'])
+        run.refresh_from_db()
+        self.assertEqual(run.artifacts, SimulationRun.Artifacts.ARCHIVED)
+
+    def test_expire_removes_directory_and_cache_entry(self):
+        run = self.make_run('old', age_days=40)
+        self.make_run('new', age_days=1)
+        SimulationCacheEntry.objects.create(cache_key='k' * 64, simulation_id='old', results={})
+        stats = retention.sweep(max_age_days=30, max_bytes=0)
+        self.assertEqual(stats["expired"], 1)
+        self.assertFalse((self.output_dir / 'old').exists())
+        self.assertTrue((self.output_dir / 'new').exists())
+        self.assertFalse(SimulationCacheEntry.objects.filter(simulation_id='old').exists())
+        run.refresh_from_db()
+        self.assertEqual(run.artifacts, SimulationRun.Artifacts.REMOVED)
+
+    def test_evicts_least_recently_used(self):
+        self.make_run('a', age_days=3)
+        self.make_run('b', age_days=2)
+        SimulationCacheEntry.objects.create(cache_key='k' * 64, simulation_id='a', results={})
+        stats = retention.sweep(max_age_days=0, max_bytes=1500, archive_after_minutes=10 ** 6)
+        self.assertEqual(stats["evicted"], 1)
+        # 'a' finished first but was served from the cache since.
+        self.assertTrue((self.output_dir / 'a').exists())
+        self.assertFalse((self.output_dir / 'b').exists())
@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase, override_settings
+
+from energyplus_api import preview, scheduling
+from energyplus_api.idf import parse_text
+from energyplus_api.models import SimulationRun
+
+from .samples import OFFICE_IDF
+
+
+@override_settings(ENERGYPLUS_SIMULATION_TIMEOUT=300, ENERGYPLUS_TIMEOUT_FACTOR=3,
+                   ENERGYPLUS_MAX_JOB_SECONDS=3600, ENERGYPLUS_PREVIEW_TIMEOUT=60)
+class EstimateTests(SimpleTestCase):
+    def setUp(self):
+        self.model = parse_text(OFFICE_IDF)
+
+    def test_simulated_days(self):
+        # 365 run period days, one design day and 6 warmup days for each
+        self.assertEqual(scheduling.simulated_days(self.model), 365 + 1 + 2 * 6)
+        no_sizing = parse_text(OFFICE_IDF.replace("No, No, No, Yes, Yes", "No, No, No, No, Yes"))
+        self.assertEqual(scheduling.simulated_days(no_sizing), 365 + 6)
+
+    def test_timeout_is_scaled_and_clamped(self):
+        units = scheduling.cost_units(self.model)
+        self.assertEqual(scheduling.estimate(self.model, rate=1e-9).timeout, 300)
+        self.assertEqual(scheduling.estimate(self.model, rate=500 / units).timeout, 1500)
+        self.assertEqual(scheduling.estimate(self.model, rate=10000 / units).timeout, 3600 * 3)
+
+    def test_disabled_budget_keeps_the_job_timeout(self):
+        units = scheduling.cost_units(self.model)
+        with override_settings(ENERGYPLUS_MAX_JOB_SECONDS=0):
+            job = scheduling.estimate(self.model, rate=10000 / units)
+            self.assertEqual(job.timeout, 30000)
+            scheduling.admit(job)
+
+    def test_admit_rejects_jobs_over_budget(self):
+        units = scheduling.cost_units(self.model)
+        with self.assertRaises(ValueError):
+            scheduling.admit(scheduling.estimate(self.model, rate=4000 / units))
+
+    def test_touches_timing(self):
+        self.assertTrue(scheduling.touches_timing([{"object": "RunPeriod"}]))
+        self.assertFalse(scheduling.touches_timing([{"object": "Zone"}]))
+
+    def test_short_jobs_sort_first(self):
+        short, long = SimulationRun(estimated_seconds=10), SimulationRun(estimated_seconds=1000)
+        self.assertLess(scheduling.priority(short), scheduling.priority(long))
+
+    def test_preview_priority_is_capped(self):
+        run = SimulationRun(estimated_seconds=1000)
+        self.assertLess(scheduling.priority(run, preview=True) + 900, scheduling.priority(run))
+
+
+@override_settings(ENERGYPLUS_PREVIEW_WINDOWS=4, ENERGYPLUS_PREVIEW_DAYS=7)
+class PreviewTests(SimpleTestCase):
+    def test_make_preview(self):
+        shortened = preview.make_preview(OFFICE_IDF, has_weather_file=True)
+        self.assertEqual((shortened.simulated_days, shortened.full_days), (28, 365))
+        model = parse_text(shortened.idf_text)
+        periods = model.run_periods
+        self.assertEqual(len(periods), 4)
+        for period in periods:
+            self.assertEqual(period["begin_month"], period["end_month"])
+            self.assertEqual(period["end_day"] - period["begin_day"], 6)
+        # Design days are skipped, weather-file run periods still run
+        self.assertEqual([f.lower() for f in model.first('SimulationControl').fields[3:5]], ['no', 'yes'])
+
+    def test_no_preview_without_weather_file(self):
+        self.assertIsNone(preview.make_preview(OFFICE_IDF, has_weather_file=False))
+
+    def test_no_preview_when_there_is_nothing_to_shorten(self):
+        weather_off = OFFICE_IDF.replace("No, No, No, Yes, Yes", "No, No, No, Yes, No")
+        self.assertIsNone(preview.make_preview(weather_off, has_weather_file=True))
+        short = OFFICE_IDF.replace("Annual, 1, 1, , 12, 31", "January, 1, 1, , 1, 20")
+        self.assertIsNone(preview.make_preview(short, has_weather_file=True))
+
+    def test_extrapolate(self):
+        shortened = preview.PreviewModel('', simulated_days=28, full_days=364)
+        results = preview.extrapolate({
+            "total_energy": 10.0,
+            "energy_by_type": {"heating": 4.0, "cooling": 6.0},
+            "energy_breakdown": [{"name": "Heating", "value": 4.0}],
+            "additional_info": {"eui": 1.5},
+        }, shortened)
+        self.assertEqual(results["total_energy"], 130.0)
+        self.assertEqual(results["energy_by_type"], {"heating": 52.0, "cooling": 78.0})
+        self.assertEqual(results["energy_breakdown"][0]["value"], 52.0)
+        self.assertEqual(results["additional_info"]["eui"], 19.5)
+        self.assertTrue(results["preview"]["extrapolated"])
+
+    def test_relative_error(self):
+        self.assertAlmostEqual(preview.relative_error(110.0, 100.0), 0.1)
+        self.assertIsNone(preview.relative_error(None, 100.0))
+        self.assertIsNone(preview.relative_error(1.0, 0))
@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from energyplus_api import weather
+from energyplus_api.models import WeatherFile
+
+from .samples import epw_bytes
+
+# Three January days at 10 °C and two July days at 25 °C
+DAYS = [(1, 1, 10.0), (1, 2, 10.0), (1, 3, 10.0), (7, 1, 25.0), (7, 2, 25.0)]
+
+
+class WeatherTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(ENERGYPLUS_WEATHER_DIR=Path(tmp.name))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.epw = epw_bytes(DAYS)
+
+    def upload(self, data: bytes, name: str = 'chicago.epw'):
+        return self.client.post('/api/weather', {"file": SimpleUploadedFile(name, data)})
+
+    def test_non_epw_upload_is_rejected(self):
+        for data in (b'Version, 23.2;\nZone, Core Zone;\n', self.epw.replace(b'LOCATION', b'PLACE', 1)):
+            response = self.upload(data, 'model.epw')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(WeatherFile.objects.exists())
+
+    @override_settings(ENERGYPLUS_WEATHER_MAX_BYTES=1000)
+    def test_oversized_upload_is_rejected(self):
+        self.assertEqual(self.upload(self.epw).status_code, 400)
+
+    def test_same_file_is_registered_once(self):
+        first = self.upload(self.epw)
+        self.assertEqual(first.status_code, 201)
+        second = self.upload(self.epw, 'renamed.epw')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["id"], first.json()["id"])
+        self.assertEqual(second.json()["name"], 'chicago.epw')
+        self.assertEqual(WeatherFile.objects.count(), 1)
+
+        _, created = weather.register(epw_bytes(DAYS, city='Elsewhere'), 'other.epw')
+        self.assertTrue(created)
+
+    def test_degree_days(self):
+        data = weather.parse_epw(self.epw)
+        self.assertEqual(data.hours, 5 * 24)
+        result = weather.degree_days(data, 18.0)
+        self.assertEqual((result["hdd"], result["cdd"]), (24.0, 14.0))
+        self.assertEqual(result["monthly"], [{"month": 1, "hdd": 24.0, "cdd": 0.0},
+                                             {"month": 7, "hdd": 0.0, "cdd": 14.0}])
+
+        summary = weather.summarize(data)
+        self.assertEqual((summary["hdd18"], summary["cdd18"], summary["cdd10"]), (24.0, 14.0, 30.0))
+        self.assertEqual(summary["dry_bulb"]["monthly_mean"][0], 10.0)
+
+    def test_load_maps_the_cached_values(self):
+        weather_file, _ = weather.register(self.epw, 'chicago.epw')
+        # Another machine starts without the cache and rebuilds it from the row
+        shutil.rmtree(weather.cache_dir(weather_file))
+        weather_file = weather.get_weather_file(weather_file.sha256)
+
+        self.assertEqual(weather.epw_path(weather_file).read_bytes(), self.epw)
+        data = weather.load(weather_file)
+        self.assertIsInstance(data.values, np.memmap)
+        np.testing.assert_array_equal(data.values, weather.parse_epw(self.epw).values)
+        self.assertEqual(data.header["location"]["city"], 'Testville')
+        self.assertEqual(weather.degree_days(data, 18.0)["hdd"], 24.0)
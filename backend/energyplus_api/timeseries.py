@@ -0,0 +1,308 @@
+"""
+Per-run store of EnergyPlus time series.
+
+After a real run the reported meters and variables are written next to
+``results.json`` as two files:
+
+- ``timeseries.f32``: little-endian float32 arrays laid out column after
+  column. Series reported on the same rows share one time column (minutes
+  since Jan 1 00:00, at the end of each interval); values are kept in their
+  native units.
+- ``timeseries.json``: the index of those columns (name, key, units,
+  frequency, offset and length).
+
+Reads memory-map the data file and binary-search the time column, so a
+slice of one series touches only the pages it covers, however many series
+the file holds.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from . import csv_output, sql_output
+from .csv_output import MONTH_START_DAY
+from .downsampling import aggregate, lttb
+from .end_uses import ENERGY_UNITS_TO_KWH
+
+DATA_FILE = 'timeseries.f32'
+INDEX_FILE = 'timeseries.json'
+FORMAT_VERSION = 1
+DTYPE = np.dtype('<f4')
+
+# Interval data worth keeping; monthly and run-period values are already
+# covered by the annual totals.
+STORED_FREQUENCIES = {'timestep', 'hourly', 'daily', 'detailed', 'each call'}
+
+
+def _frequency_key(frequency: str) -> str:
+    frequency = (frequency or '').strip().lower()
+    return 'timestep' if 'timestep' in frequency else frequency
+
+
+def series_id(name: str, key: str = '') -> str:
+    """Identifier of a series as it appears in EnergyPlus CSV headers."""
+    return f"{key}:{name}" if key else name
+
+
+def _last_environment(minutes: np.ndarray, *columns: np.ndarray) -> tuple:
+    """Keep only the rows of the last environment (the run period).
+
+    Sizing periods are reported before the run period and restart the
+    clock; the store keeps one monotonic time axis per frequency.
+    """
+    restarts = np.flatnonzero(np.diff(minutes) < 0)
+    if len(restarts):
+        start = restarts[-1] + 1
+        return (minutes[start:],) + tuple(column[start:] for column in columns)
+    return (minutes,) + columns
+
+
+def _collect_from_sql(sql_file: Path, max_series: int) -> List[dict]:
+    described = [
+        s for s in sql_output.list_series(sql_file)
+        if _frequency_key(s["frequency"]) in STORED_FREQUENCIES
+    ]
+    # Meters first: they are what the charts show.
+    described.sort(key=lambda s: (not s["is_meter"], s["index"]))
+    described = described[:max_series]
+    read = sql_output.read_many(sql_file, [s["index"] for s in described])
+    series = []
+    for s in described:
+        minutes, values = read[s["index"]]
+        if len(minutes):
+            series.append({"name": s["name"], "key": s["key"], "units": s["units"],
+                           "frequency": s["frequency"], "minutes": minutes, "values": values})
+    return series
+
+
+def _collect_from_csv(csv_files: List[Path], max_series: int) -> List[dict]:
+    series = []
+    for csv_file in csv_files:
+        if len(series) >= max_series:
+            break
+        columns = [
+            c for c in csv_output.read_header(csv_file)
+            if _frequency_key(c.frequency) in STORED_FREQUENCIES
+        ]
+        columns.sort(key=lambda c: (not c.is_meter, c.index))
+        columns = columns[:max_series - len(series)]
+        if not columns:
+            continue
+
+        minutes_parts, value_parts = [], []
+        for minutes, block in csv_output.iter_timestamped_chunks(csv_file, [c.index for c in columns]):
+            minutes_parts.append(minutes)
+            value_parts.append(block)
+        minutes = np.concatenate(minutes_parts)
+        values = np.concatenate(value_parts)
+        for i, column in enumerate(columns):
+            # Rows reported at other frequencies are blank for this column.
+            rows = ~np.isnan(values[:, i]) & ~np.isnan(minutes)
+            series.append({"name": column.variable, "key": column.key, "units": column.units,
+                           "frequency": column.frequency, "minutes": minutes[rows],
+                           "values": values[rows, i]})
+    return series
+
+
+def write_store(output_path: Path, max_series: Optional[int] = None) -> Optional[dict]:
+    """Extract the run's interval series into ``timeseries.f32``/``.json``.
+
+    Reads ``eplusout.sql`` when present, otherwise the ``--readvars`` CSV
+    files. Returns the index, or None when the run reported no series.
+    """
+    if max_series is None:
+        max_series = settings.ENERGYPLUS_TIMESERIES_MAX_SERIES
+    sql_file = output_path / 'eplusout.sql'
+    collected = _collect_from_sql(sql_file, max_series) if sql_file.exists() else []
+    if not collected:
+        csv_files = sorted(
+            f for f in output_path.glob('*.csv') if csv_output.TIME_SERIES_FILE_RE.search(f.name)
+        )
+        collected = _collect_from_csv(csv_files, max_series)
+    if not collected:
+        return None
+
+    axes: List[Tuple[dict, np.ndarray]] = []
+    index = {"version": FORMAT_VERSION, "dtype": DTYPE.str, "axes": [], "series": []}
+    offset = 0
+    tmp = output_path / (DATA_FILE + '.tmp')
+    with open(tmp, 'wb') as f:
+        for s in collected:
+            minutes, values = _last_environment(s["minutes"], s["values"])
+            # Series reported on the same rows share one time column.
+            axis = next((a for a, m in axes if len(m) == len(minutes) and np.array_equal(m, minutes)), None)
+            if axis is None:
+                axis = {"frequency": s["frequency"], "offset": offset, "length": len(minutes)}
+                axes.append((axis, minutes))
+                index["axes"].append(axis)
+                f.write(minutes.astype(DTYPE).tobytes())
+                offset += len(minutes)
+            f.write(values.astype(DTYPE).tobytes())
+            index["series"].append({
+                "id": series_id(s["name"], s["key"]),
+                "name": s["name"],
+                "key": s["key"],
+                "units": s["units"],
+                "frequency": s["frequency"],
+                "axis": index["axes"].index(axis),
+                "offset": offset,
+                "length": len(values),
+            })
+            offset += len(values)
+    os.replace(tmp, output_path / DATA_FILE)
+    with open(output_path / INDEX_FILE, 'w') as f:
+        json.dump(index, f)
+    with _stores_lock:
+        _stores.pop(str(output_path), None)
+    return index
+
+
+def parse_moment(value: str) -> float:
+    """Parse a slice bound: minutes since Jan 1, ``MM-DD`` or ``MM-DDTHH:MM``."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    date_part, _, time_part = value.replace(' ', 'T').partition('T')
+    try:
+        month, day = (int(part) for part in date_part.split('-')[-2:])
+        hour, minute = (int(part) for part in (time_part or '0:0').split(':')[:2])
+        if not 1 <= month <= 12:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Invalid time {value!r}: use minutes, MM-DD or MM-DDTHH:MM")
+    return float((MONTH_START_DAY[month - 1] + day - 1) * 1440 + hour * 60 + minute)
+
+
+def to_list(values: np.ndarray, digits: int = 7) -> list:
+    """Values as JSON-friendly floats rounded to float32 precision.
+
+    Without rounding, float32 data widens to noise like 20.04199981689453.
+    NaN becomes None.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (digits - 1 - np.nan_to_num(magnitude, nan=0.0, posinf=0.0, neginf=0.0))
+    rounded = np.round(values * scale) / scale
+    return [None if value != value else value for value in rounded.tolist()]
+
+
+class TimeSeriesStore:
+    """Memory-mapped read access to one run's stored series."""
+
+    def __init__(self, output_path: Path, version: int = 0):
+        self.path = output_path
+        # Changes whenever the store is rewritten; part of derived cache keys.
+        self.version = version
+        with open(output_path / INDEX_FILE) as f:
+            self.index = json.load(f)
+        self._data = np.memmap(output_path / DATA_FILE, dtype=np.dtype(self.index["dtype"]), mode='r')
+        self._by_id = {}
+        for s in self.index["series"]:
+            self._by_id.setdefault(s["id"].lower(), []).append(s)
+
+    @property
+    def series(self) -> List[dict]:
+        return self.index["series"]
+
+    def find(self, series: str, frequency: Optional[str] = None) -> dict:
+        """Look up a series by id (case-insensitive), preferring the finest frequency."""
+        matches = self._by_id.get(series.lower(), [])
+        if frequency:
+            matches = [s for s in matches if s["frequency"].lower() == frequency.lower()]
+        if not matches:
+            raise KeyError(series)
+        return max(matches, key=lambda s: s["length"])
+
+    def read(self, series: str, start: Optional[float] = None, end: Optional[float] = None,
+             frequency: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, dict]:
+        """Return ``(minutes, values, meta)`` for ``start < minute <= end``.
+
+        The arrays are views into the memory map; nothing outside the slice
+        is read from disk.
+        """
+        meta = self.find(series, frequency)
+        axis = self.index["axes"][meta["axis"]]
+        minutes = self._data[axis["offset"]:axis["offset"] + axis["length"]]
+        values = self._data[meta["offset"]:meta["offset"] + meta["length"]]
+        lo = 0 if start is None else int(np.searchsorted(minutes, start, side='right'))
+        hi = len(minutes) if end is None else int(np.searchsorted(minutes, end, side='right'))
+        return minutes[lo:hi], values[lo:hi], meta
+
+
+_stores: "OrderedDict[str, Tuple[int, TimeSeriesStore]]" = OrderedDict()
+_stores_lock = threading.Lock()
+MAX_OPEN_STORES = 64
+
+
+def open_store(output_path: Path) -> Optional[TimeSeriesStore]:
+    """Return the (cached) store of a run directory, or None if it has none."""
+    try:
+        mtime = os.stat(output_path / DATA_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    key = str(output_path)
+    with _stores_lock:
+        cached = _stores.get(key)
+        if cached is not None and cached[0] == mtime:
+            _stores.move_to_end(key)
+            return cached[1]
+    store = TimeSeriesStore(output_path, mtime)
+    with _stores_lock:
+        _stores[key] = (mtime, store)
+        _stores.move_to_end(key)
+        while len(_stores) > MAX_OPEN_STORES:
+            _stores.popitem(last=False)
+    return store
+
+
+def series_payload(store: TimeSeriesStore, series: str, start: Optional[float] = None,
+                   end: Optional[float] = None, frequency: Optional[str] = None,
+                   resolution: Optional[str] = None, how: Optional[str] = None,
+                   points: Optional[int] = None) -> dict:
+    """One series ready for a chart: sliced, aggregated and/or downsampled.
+
+    ``resolution`` (hourly/daily/monthly) buckets the series by ``how``
+    (sum/mean/peak; energy defaults to sum, everything else to mean);
+    ``points`` then caps its length with LTTB. Payloads are cached per
+    store version, so repeated chart loads skip the computation.
+    """
+    key = 'timeseries:' + hashlib.sha1(repr((
+        str(store.path), store.version, series.lower(), start, end,
+        (frequency or '').lower(), resolution, how, points,
+    )).encode()).hexdigest()
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    minutes, values, meta = store.read(series, start, end, frequency)
+    if resolution:
+        how = how or ('sum' if meta["units"] in ENERGY_UNITS_TO_KWH else 'mean')
+        minutes, values = aggregate(minutes, values, resolution, how)
+    downsampled = bool(points) and len(minutes) > points
+    if downsampled:
+        minutes, values = lttb(minutes, values, points)
+
+    payload = {
+        "id": meta["id"],
+        "units": meta["units"],
+        "frequency": meta["frequency"],
+        "resolution": resolution,
+        "aggregation": how if resolution else None,
+        "downsampled": "lttb" if downsampled else None,
+        "source_points": meta["length"],
+        "time": np.asarray(minutes).astype(np.int64).tolist(),
+        "values": to_list(values),
+    }
+    cache.set(key, payload, settings.ENERGYPLUS_TIMESERIES_CACHE_SECONDS)
+    return payload
@@ -8,7 +8,19 @@ app_name = 'energyplus_api'
 
 urlpatterns = [
     path('simulation/run', views.run_simulation, name='run_simulation'),
+    path('simulation/<str:simulation_id>/status', views.simulation_status, name='simulation_status'),
+    path('simulation/<str:simulation_id>/result', views.simulation_result, name='simulation_result'),
+    path('simulation/<str:simulation_id>/timeseries', views.simulation_timeseries, name='simulation_timeseries'),
+    path('simulation/stream', views.stream_simulation_events, name='stream_simulation'),
+    path('simulation/batch', views.run_batch, name='run_batch'),
+    path('simulation/batch/<str:batch_id>', views.batch_status, name='batch_status'),
     path('simulation/history', views.simulation_history, name='simulation_history'),
+    path('simulation/analytics', views.simulation_analytics, name='simulation_analytics'),
+    path('energyplus/versions', views.energyplus_versions, name='energyplus_versions'),
+    path('weather', views.weather_files, name='weather_files'),
+    path('weather/<str:reference>', views.weather_file_detail, name='weather_file_detail'),
     path('health', views.health_check, name='health_check'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('worker/runs/<str:simulation_id>/artifacts/<str:name>', views.upload_artifact, name='upload_artifact'),
 ]
 
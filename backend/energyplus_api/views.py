@@ -1,47 +1,91 @@
 """
 API views for EnergyPlus simulation endpoints.
 """
+import hmac
 import json
-from django.http import JsonResponse
+import os
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from .services import EnergyPlusService
-from .models import SimulationRun
+from . import metrics, profiling
+from .conditional import history_condition, run_condition
+from .discovery import get_registry
+from .analytics import analytics_page
+from .distributed import is_artifact_name
+from .history import history_page
+from .jobs import batch_summary, queue_stats, submit_batch, submit_simulation
+from .models import SimulationBatch, SimulationRun, WeatherFile
+from .streaming import stream_simulation
+from .timeseries import open_store, parse_moment, series_payload
+from .weather import degree_days, get_weather_file, load, register, search
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('', '0', 'false', 'no', 'off')
+
+
+def _flag(data, name: str, default: bool) -> bool:
+    """Read a boolean from a JSON body or a query string (where it is text)."""
+    value = data.get(name, default)
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"'{name}' must be true or false")
+
+
+def _run_options(data) -> dict:
+    """Per-run options accepted by the run and batch endpoints.
+
+    Raises ValueError for an invalid flag.
+    """
+    options = {"bypass_cache": _flag(data, 'bypass_cache', False)}
+    if data.get('energyplus_version'):
+        options["energyplus_version"] = str(data['energyplus_version'])
+    if data.get('weather'):
+        options["weather"] = str(data['weather'])
+    return options
 
 
 @api_view(['POST'])
 @csrf_exempt
+@profiling.profiled
 def run_simulation(request):
-    """Run an EnergyPlus simulation."""
+    """Queue an EnergyPlus simulation and return its job ID.
+
+    Staff can send ``X-Profile: 1`` to profile the request and its job
+    (see ``profiling``).
+    """
     try:
         data = request.data if hasattr(request, 'data') else json.loads(request.body)
         user_message = data.get('message', 'Run simulation')
         idf_content = data.get('idf_content', None)
+        options = _run_options(data)
+        mode = data.get('mode', 'full')
+        if mode not in ('full', 'preview'):
+            raise ValueError("'mode' must be 'full' or 'preview'")
+        if mode == 'preview':
+            options.update(mode=mode, full_run=_flag(data, 'full_run', True))
+        if getattr(request, 'profiling', False):
+            options["profile"] = True
         
-        service = EnergyPlusService()
-        results = service.run_simulation(user_message, idf_content=idf_content)
-        
-        # TODO: Maybe add cleanup job for old simulations
-        SimulationRun.objects.create(
-            simulation_id=results.get("simulation_id", "unknown"),
-            message=user_message,
-            idf_file=results.get("idf_file", ""),
-            used_mock_data=results.get("used_mock_data", False),
-            total_energy=results["total_energy"],
-            energy_by_type=results.get("energy_by_type", {}),
-            energy_breakdown=results.get("energy_breakdown", []),
-            additional_info=results.get("additional_info"),
-        )
+        run = submit_simulation(user_message, idf_content=idf_content, options=options)
 
         return Response({
-            "status": "success",
-            "simulation_id": results.get("simulation_id", "unknown"),
-            "message": "Simulation completed successfully",
-            "results": results
-        }, status=status.HTTP_200_OK)
+            "status": run.status,
+            "simulation_id": run.simulation_id,
+            "message": "Simulation queued",
+            "status_url": reverse('energyplus_api:simulation_status', args=[run.simulation_id]),
+            "result_url": reverse('energyplus_api:simulation_result', args=[run.simulation_id]),
+        }, status=status.HTTP_202_ACCEPTED)
         
     except FileNotFoundError as e:
         return Response(
@@ -52,6 +96,15 @@ def run_simulation(request):
             status=status.HTTP_404_NOT_FOUND
         )
         
+    except ValueError as e:
+        return Response(
+            {
+                "status": "error",
+                "message": str(e)
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        
     except Exception as e:
         return Response(
             {
@@ -62,43 +115,450 @@ def run_simulation(request):
         )
 
 
-@api_view(['GET'])
-def health_check(request):
-    """Basic health check."""
-    return Response({"status": "ok"}, status=status.HTTP_200_OK)
+@api_view(['POST'])
+@csrf_exempt
+def run_batch(request):
+    """Queue a parametric study: a base IDF plus a list of field overrides."""
+    try:
+        data = request.data if hasattr(request, 'data') else json.loads(request.body)
+        variants = data.get('variants')
+        if not isinstance(variants, list):
+            raise ValueError("'variants' must be a list")
+
+        batch = submit_batch(
+            data.get('message', 'Run simulation'),
+            variants,
+            idf_content=data.get('idf_content', None),
+            max_concurrency=data.get('max_concurrency'),
+            options=_run_options(data),
+        )
+
+        return Response({
+            "status": batch.status,
+            "batch_id": batch.batch_id,
+            "total_variants": batch.total_variants,
+            "message": "Batch queued",
+            "status_url": reverse('energyplus_api:batch_status', args=[batch.batch_id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    except FileNotFoundError as e:
+        return Response(
+            {
+                "status": "error",
+                "message": f"IDF file not found: {str(e)}"
+            },
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    except ValueError as e:
+        return Response(
+            {
+                "status": "error",
+                "message": str(e)
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    except Exception as e:
+        return Response(
+            {
+                "status": "error",
+                "message": f"Batch failed: {str(e)}"
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
 
 @api_view(['GET'])
-def simulation_history(request):
-    """Return recent simulation runs."""
+def batch_status(request, batch_id):
+    """Return progress and the aggregated per-variant results of a batch."""
+    batch = SimulationBatch.objects.filter(batch_id=batch_id).first()
+    if batch is None:
+        return Response(
+            {"status": "error", "message": f"Batch not found: {batch_id}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return Response(batch_summary(batch), status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def stream_simulation_events(request):
+    """Run a simulation and stream its progress as Server-Sent Events.
+
+    Needs an ASGI server (``config.asgi``). GET takes ``message`` as a query
+    parameter so the endpoint works with ``EventSource``; POST accepts the
+    same JSON body as ``/api/simulation/run``.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"status": "error", "message": "Invalid JSON body"}, status=400)
+    else:
+        data = request.GET
     try:
-        limit = int(request.query_params.get('limit', 20))
-    except ValueError:
-        limit = 20
+        options = _run_options(data)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
-    # Cap at 100 to avoid performance issues
-    limit = max(1, min(limit, 100))
+    response = StreamingHttpResponse(
+        stream_simulation(
+            data.get('message', 'Run simulation'),
+            idf_content=data.get('idf_content', None),
+            options=options,
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
-    runs = SimulationRun.objects.all()[:limit]
-    data = [
-        {
+
+def _job_status(run: SimulationRun) -> dict:
+    return {
+        "simulation_id": run.simulation_id,
+        "status": run.status,
+        "idf_file": run.idf_file,
+        "error": run.error,
+        "artifacts": run.artifacts,
+        "estimated_seconds": round(run.estimated_seconds, 1) if run.estimated_seconds is not None else None,
+        "timeout_seconds": run.timeout_seconds,
+        "runtime_seconds": run.runtime_seconds,
+        "mode": run.options.get("mode", "full"),
+        "weather": run.options.get("weather"),
+        # Extrapolated preview results, until the full run replaces them
+        "preview": run.preview_results if not run.is_finished else None,
+        "preview_error": run.preview_error,
+        "created_at": run.created_at.isoformat(),
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
+
+
+@api_view(['GET'])
+@run_condition
+def simulation_status(request, simulation_id):
+    """Return the state of a queued simulation job."""
+    run = SimulationRun.objects.filter(simulation_id=simulation_id).first()
+    if run is None:
+        return Response(
+            {"status": "error", "message": f"Simulation not found: {simulation_id}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return Response(_job_status(run), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@run_condition
+def simulation_result(request, simulation_id):
+    """Return the results of a simulation job once it has finished."""
+    run = SimulationRun.objects.filter(simulation_id=simulation_id).first()
+    if run is None:
+        return Response(
+            {"status": "error", "message": f"Simulation not found: {simulation_id}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    if run.status == SimulationRun.Status.FAILED:
+        return Response(
+            {
+                "status": "error",
+                "simulation_id": run.simulation_id,
+                "message": f"Simulation failed: {run.error}",
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    if run.status != SimulationRun.Status.COMPLETED:
+        return Response(_job_status(run), status=status.HTTP_202_ACCEPTED)
+
+    return Response({
+        "status": "success",
+        "simulation_id": run.simulation_id,
+        "message": "Simulation completed successfully",
+        "results": {
             "simulation_id": run.simulation_id,
-            "message": run.message,
             "idf_file": run.idf_file,
             "used_mock_data": run.used_mock_data,
             "total_energy": run.total_energy,
             "energy_by_type": run.energy_by_type,
             "energy_breakdown": run.energy_breakdown,
             "additional_info": run.additional_info,
-            "created_at": run.created_at.isoformat(),
-        }
-        for run in runs
-    ]
+            "preview": {
+                "total_energy": run.preview_results.get("total_energy"),
+                "relative_error": run.preview_error,
+            } if run.preview_results else None,
+        },
+    }, status=status.HTTP_200_OK)
+
+
+def _series_source(run: SimulationRun) -> str:
+    """The run whose output directory holds this run's data (itself, or a cache source)."""
+    return (run.additional_info or {}).get("cached_from") or run.simulation_id
+
+
+@api_view(['GET'])
+@run_condition
+def simulation_timeseries(request, simulation_id):
+    """Return stored time series of a completed simulation, chart-ready.
+
+    Without ``vars`` the available series are listed. ``vars`` is a
+    comma-separated list of series ids; ``start``/``end`` slice them (minutes
+    since Jan 1, ``MM-DD`` or ``MM-DDTHH:MM``) and ``frequency`` picks one
+    reporting frequency when a series was reported at several.
+    ``resolution=hourly|daily|monthly`` with ``agg=sum|mean|peak`` buckets
+    the data, and ``points=N`` downsamples it with LTTB. No series is ever
+    returned with more than ``ENERGYPLUS_TIMESERIES_MAX_POINTS`` points.
+    """
+    run = SimulationRun.objects.filter(simulation_id=simulation_id).first()
+    if run is None:
+        return Response(
+            {"status": "error", "message": f"Simulation not found: {simulation_id}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    if run.status != SimulationRun.Status.COMPLETED:
+        return Response(_job_status(run), status=status.HTTP_202_ACCEPTED)
+
+    store = open_store(settings.ENERGYPLUS_OUTPUT_DIR / _series_source(run))
+    if store is None:
+        return Response(
+            {"status": "error", "message": f"No time series stored for simulation {simulation_id}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    params = request.query_params
+    names = [name.strip() for name in params.get('vars', '').split(',') if name.strip()]
+    if not names:
+        return Response({
+            "simulation_id": run.simulation_id,
+            "series": [
+                {key: s[key] for key in ('id', 'name', 'key', 'units', 'frequency', 'length')}
+                for s in store.series
+            ],
+        }, status=status.HTTP_200_OK)
+
+    try:
+        max_points = settings.ENERGYPLUS_TIMESERIES_MAX_POINTS
+        try:
+            points = int(params.get('points', max_points))
+        except ValueError:
+            raise ValueError("'points' must be an integer")
+        if points < 3:
+            raise ValueError("'points' must be at least 3")
+        start = parse_moment(params['start']) if params.get('start') else None
+        end = parse_moment(params['end']) if params.get('end') else None
+        series = [
+            series_payload(
+                store, name, start, end,
+                frequency=params.get('frequency'),
+                resolution=params.get('resolution'),
+                how=params.get('agg'),
+                points=min(points, max_points),
+            )
+            for name in names
+        ]
+    except ValueError as e:
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except KeyError as e:
+        return Response(
+            {"status": "error", "message": f"Unknown series: {e.args[0]}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    return Response({"simulation_id": run.simulation_id, "series": series}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def health_check(request):
+    """Basic health check, with job queue depth and worker utilisation."""
+    return Response({"status": "ok", "queue": queue_stats()}, status=status.HTTP_200_OK)
+
+
+@require_http_methods(['GET'])
+def metrics_view(request):
+    """Phase timings, counters and gauges of this process in Prometheus text format."""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+def upload_artifact(request, simulation_id, name):
+    """Receive one output file of a run from a remote worker (see ``distributed``).
+
+    Needs ``Authorization: Bearer <ENERGYPLUS_WORKER_TOKEN>`` and the
+    ``X-Worker-Id`` of the worker holding the run.
+    """
+    token = settings.ENERGYPLUS_WORKER_TOKEN
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return JsonResponse({"status": "error", "message": "Invalid worker token"}, status=403)
+    if not is_artifact_name(name):
+        return JsonResponse({"status": "error", "message": f"Not an artifact name: {name}"}, status=400)
+
+    run = SimulationRun.objects.filter(simulation_id=simulation_id).only('status', 'worker_id').first()
+    if run is None:
+        return JsonResponse({"status": "error", "message": f"Simulation not found: {simulation_id}"}, status=404)
+    if run.status != SimulationRun.Status.RUNNING or run.worker_id != request.headers.get('X-Worker-Id'):
+        return JsonResponse({"status": "error", "message": "The run is not held by this worker"}, status=409)
 
+    output_path = settings.ENERGYPLUS_OUTPUT_DIR / simulation_id
+    output_path.mkdir(parents=True, exist_ok=True)
+    tmp = output_path / f".{name}.upload"
+    size = 0
+    with open(tmp, 'wb') as f:
+        for chunk in iter(lambda: request.read(1024 * 1024), b''):
+            f.write(chunk)
+            size += len(chunk)
+    os.replace(tmp, output_path / name)
+    metrics.OUTPUT_BYTES.inc(size)
+    return JsonResponse({"status": "success", "name": name, "size": size}, status=201)
+
+
+@api_view(['GET'])
+def energyplus_versions(request):
+    """List the EnergyPlus versions a simulation can be pinned to."""
+    installations = get_registry().installations()
     return Response(
         {
-            "count": len(data),
-            "results": data,
+            "versions": [
+                {"version": i.version, "tag": i.tag}
+                for i in installations
+            ],
         },
         status=status.HTTP_200_OK,
     )
+
+
+def _weather_entry(weather_file: WeatherFile) -> dict:
+    entry = {
+        "id": weather_file.pk,
+        "sha256": weather_file.sha256,
+        "name": weather_file.name,
+        "location": weather_file.location,
+        "city": weather_file.city,
+        "state": weather_file.state,
+        "country": weather_file.country,
+        "wmo": weather_file.wmo,
+        "latitude": weather_file.latitude,
+        "longitude": weather_file.longitude,
+        "elevation": weather_file.elevation,
+        "time_zone": weather_file.time_zone,
+        "hours": weather_file.hours,
+        "summary": weather_file.summary,
+        "created_at": weather_file.created_at.isoformat(),
+    }
+    if hasattr(weather_file, 'distance_km'):
+        entry["distance_km"] = weather_file.distance_km
+    return entry
+
+
+@api_view(['GET', 'POST'])
+@csrf_exempt
+def weather_files(request):
+    """List the weather registry, or add an EPW file to it.
+
+    GET narrows the list with ``q`` (words matched against the city, state,
+    country, file name or WMO station) and sorts it by distance with
+    ``near=<latitude>,<longitude>``. POST takes the EPW as a multipart
+    ``file`` and answers 201, or 200 if the same file is already registered.
+    """
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"status": "error", "message": "Upload the EPW file as multipart 'file'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            # One byte over the limit is enough to reject it
+            weather_file, created = register(upload.read(settings.ENERGYPLUS_WEATHER_MAX_BYTES + 1), upload.name)
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            _weather_entry(weather_file), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    params = request.query_params
+    try:
+        near = None
+        if params.get('near'):
+            try:
+                latitude, longitude = (float(value) for value in params['near'].split(','))
+            except ValueError:
+                raise ValueError("'near' must be '<latitude>,<longitude>'")
+            near = (latitude, longitude)
+        try:
+            limit = int(params.get('limit', 50))
+        except ValueError:
+            raise ValueError("'limit' must be an integer")
+    except ValueError as e:
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    entries = search(params.get('q', ''), near)[:max(1, min(limit, 500))]
+    return Response({"weather_files": [_weather_entry(e) for e in entries]}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def weather_file_detail(request, reference):
+    """One weather file (by ID or SHA-256) with its climate summary and EPW header.
+
+    ``base=<°C>`` adds heating and cooling degree days at that base
+    temperature, read from the cached hourly data.
+    """
+    try:
+        weather_file = get_weather_file(reference)
+    except ValueError as e:
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    data = load(weather_file)
+    payload = _weather_entry(weather_file)
+    payload["header"] = data.header
+    if request.query_params.get('base'):
+        try:
+            base = float(request.query_params['base'])
+        except ValueError:
+            return Response(
+                {"status": "error", "message": "'base' must be a temperature in °C"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        payload["degree_days"] = degree_days(data, base)
+    return Response(payload, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@history_condition
+def simulation_history(request):
+    """Return recent simulation runs, newest first, one keyset page at a time.
+
+    Pass ``next_cursor`` from a response as ``cursor`` to get the next page.
+    ``fields`` selects the returned fields (e.g. ``fields=simulation_id,total_energy``).
+    """
+    try:
+        page = history_page(request.query_params)
+    except ValueError as e:
+        return Response(
+            {
+                "status": "error",
+                "message": str(e)
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(page, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def simulation_analytics(request):
+    """Aggregates of completed runs by IDF file, building type or period.
+
+    ``group_by`` is ``idf_file`` (default), ``building_type``, ``day``,
+    ``week`` or ``month``. Each group has the run count, mean, min, max and
+    ``percentiles`` of ``total_energy`` and the mean and share of each end
+    use, read from the incrementally maintained summaries (see ``analytics``).
+    """
+    try:
+        payload = analytics_page(request.query_params)
+    except ValueError as e:
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(payload, status=status.HTTP_200_OK)
@@ -0,0 +1,401 @@
+"""
+Registry of EPW weather files.
+
+An uploaded EPW is stored once per SHA-256 as a ``WeatherFile`` row, which
+holds the file itself, its location and a climate summary. Every machine
+that runs simulations keeps a cache of the files it has used in
+``<ENERGYPLUS_WEATHER_DIR>/<sha256>/``, rebuilt from the row on first use:
+
+- ``weather.epw``: the file EnergyPlus reads. Runs point ``-w`` at it; it is
+  never copied into their directories.
+- ``weather.f32``: the hourly data parsed once into a little-endian float32
+  array of one row per hour and one column per field in ``COLUMNS``.
+- ``weather.json``: the parsed header (location, design conditions,
+  typical/extreme periods, ground temperatures, ...) and the array's shape.
+
+``summary`` (degree days, design temperatures, annual statistics) is
+computed on upload, so listing climates never touches the files; degree
+days for another base temperature are read from the memory-mapped array.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from .models import WeatherFile
+
+EPW_FILE = 'weather.epw'
+DATA_FILE = 'weather.f32'
+INDEX_FILE = 'weather.json'
+FORMAT_VERSION = 1
+DTYPE = np.dtype('<f4')
+HEADER_LINES = 8
+
+# Kept fields of an EPW data row: name -> 0-based position
+COLUMNS = (
+    ('year', 0),
+    ('month', 1),
+    ('day', 2),
+    ('hour', 3),
+    ('dry_bulb', 6),
+    ('dew_point', 7),
+    ('relative_humidity', 8),
+    ('pressure', 9),
+    ('horizontal_infrared', 12),
+    ('global_horizontal', 13),
+    ('direct_normal', 14),
+    ('diffuse_horizontal', 15),
+    ('wind_direction', 20),
+    ('wind_speed', 21),
+    ('total_sky_cover', 22),
+    ('opaque_sky_cover', 23),
+    ('precipitable_water', 28),
+    ('snow_depth', 30),
+    ('liquid_precipitation', 33),
+)
+COLUMN_INDEX = {name: i for i, (name, _) in enumerate(COLUMNS)}
+
+# EPW's "missing" value for dry-bulb temperature
+MISSING_DRY_BULB = 99.9
+
+_cache_lock = threading.Lock()
+
+
+class WeatherData:
+    """The parsed header and memory-mapped hourly array of one EPW."""
+
+    def __init__(self, header: dict, values: np.ndarray):
+        self.header = header
+        self.values = values
+
+    @property
+    def hours(self) -> int:
+        return len(self.values)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, COLUMN_INDEX[name]]
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _number_at(fields: List[str], index: int) -> Optional[float]:
+    return _number(fields[index]) if index < len(fields) else None
+
+
+def _parse_design_conditions(fields: List[str]) -> dict:
+    """Heating and cooling design temperatures from the ASHRAE data in the header."""
+    design = {}
+    if 'Heating' in fields:
+        i = fields.index('Heating')
+        design.update(heating_99_6=_number_at(fields, i + 2), heating_99=_number_at(fields, i + 3))
+    if 'Cooling' in fields:
+        i = fields.index('Cooling')
+        design.update(
+            cooling_0_4=_number_at(fields, i + 3),
+            cooling_0_4_mcwb=_number_at(fields, i + 4),
+            cooling_1=_number_at(fields, i + 5),
+        )
+    if design:
+        design["source"] = fields[2] if len(fields) > 2 and fields[2] else 'EPW header'
+    return design
+
+
+def parse_header(lines: List[str]) -> dict:
+    """The eight EPW header records, with the location and design conditions decoded."""
+    records = {}
+    for line in lines:
+        fields = [field.strip() for field in line.rstrip('\r\n').split(',')]
+        records[fields[0].upper()] = fields
+    location = records.get('LOCATION')
+    if location is None or len(location) < 10:
+        raise ValueError("Not an EPW file: the first line must be a LOCATION record")
+    design = records.get('DESIGN CONDITIONS', [])
+    return {
+        "location": {
+            "city": location[1],
+            "state": location[2],
+            "country": location[3],
+            "source": location[4],
+            "wmo": location[5],
+            "latitude": _number(location[6]),
+            "longitude": _number(location[7]),
+            "time_zone": _number(location[8]),
+            "elevation": _number(location[9]),
+        },
+        "design_conditions": _parse_design_conditions(design),
+        "typical_extreme_periods": records.get('TYPICAL/EXTREME PERIODS', [])[1:],
+        "ground_temperatures": records.get('GROUND TEMPERATURES', [])[1:],
+        "holidays_daylight_savings": records.get('HOLIDAYS/DAYLIGHT SAVINGS', [])[1:],
+        "comments": [','.join(records.get(key, [])[1:]) for key in ('COMMENTS 1', 'COMMENTS 2')],
+        "data_periods": records.get('DATA PERIODS', [])[1:],
+    }
+
+
+def parse_epw(data: bytes) -> WeatherData:
+    """Parse an EPW into its header and an in-memory hourly array.
+
+    Raises ValueError if the data isn't an EPW.
+    """
+    lines = data.decode('latin-1').splitlines()
+    if len(lines) <= HEADER_LINES:
+        raise ValueError("Not an EPW file: no hourly data")
+    header = parse_header(lines[:HEADER_LINES])
+    positions = [position for _, position in COLUMNS]
+    rows = []
+    for number, line in enumerate(lines[HEADER_LINES:], start=HEADER_LINES + 1):
+        if not line.strip():
+            continue
+        fields = line.split(',')
+        try:
+            rows.append([float(fields[position]) for position in positions])
+        except (IndexError, ValueError):
+            raise ValueError(f"Invalid EPW data on line {number}")
+    if len(rows) < 24:
+        raise ValueError("Not an EPW file: less than a day of hourly data")
+    return WeatherData(header, np.array(rows, dtype=DTYPE))
+
+
+def _daily_means(data: WeatherData) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean dry-bulb temperature per calendar day, and each day's month."""
+    dry_bulb = data.column('dry_bulb').astype(np.float64)
+    valid = dry_bulb < MISSING_DRY_BULB
+    days = data.column('month').astype(np.int64) * 100 + data.column('day').astype(np.int64)
+    keys, index = np.unique(days, return_inverse=True)
+    totals = np.bincount(index, weights=np.where(valid, dry_bulb, 0.0), minlength=len(keys))
+    counts = np.bincount(index, weights=valid.astype(np.float64), minlength=len(keys))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = totals / counts
+    return means, keys // 100
+
+
+def degree_days(data: WeatherData, base: float) -> dict:
+    """Heating and cooling degree days (°C·day) at ``base`` °C, per year and month."""
+    means, months = _daily_means(data)
+    valid = ~np.isnan(means)
+    heating = np.where(valid, np.maximum(base - means, 0.0), 0.0)
+    cooling = np.where(valid, np.maximum(means - base, 0.0), 0.0)
+    monthly = []
+    for month in range(1, 13):
+        in_month = months == month
+        if in_month.any():
+            monthly.append({
+                "month": month,
+                "hdd": round(float(heating[in_month].sum()), 1),
+                "cdd": round(float(cooling[in_month].sum()), 1),
+            })
+    return {
+        "base": base,
+        "hdd": round(float(heating.sum()), 1),
+        "cdd": round(float(cooling.sum()), 1),
+        "monthly": monthly,
+    }
+
+
+def climate_zone(hdd18: float, cdd10: float) -> str:
+    """ASHRAE 169 thermal climate zone number from HDD18 and CDD10."""
+    if cdd10 > 6000:
+        return '0'
+    if cdd10 > 5000:
+        return '1'
+    if cdd10 > 3500:
+        return '2'
+    for zone, limit in (('3', 2000), ('4', 3000), ('5', 4000), ('6', 5000), ('7', 7000)):
+        if hdd18 <= limit:
+            return zone
+    return '8'
+
+
+def _rounded(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else round(value, 1)
+
+
+def summarize(data: WeatherData) -> dict:
+    """Climate summary stored on the registry entry."""
+    dry_bulb = data.column('dry_bulb').astype(np.float64)
+    dry_bulb = dry_bulb[dry_bulb < MISSING_DRY_BULB]
+    means, months = _daily_means(data)
+    hdd18 = degree_days(data, 18.0)
+    cdd10 = degree_days(data, 10.0)["cdd"]
+
+    design = dict(data.header["design_conditions"])
+    if not design.get("heating_99_6") or not design.get("cooling_0_4"):
+        design = {
+            "heating_99_6": _rounded(np.percentile(dry_bulb, 0.4)),
+            "heating_99": _rounded(np.percentile(dry_bulb, 1.0)),
+            "cooling_0_4": _rounded(np.percentile(dry_bulb, 99.6)),
+            "cooling_1": _rounded(np.percentile(dry_bulb, 99.0)),
+            "source": 'hourly data',
+        }
+    global_horizontal = data.column('global_horizontal').astype(np.float64)
+    wind_speed = data.column('wind_speed').astype(np.float64)
+    return {
+        "dry_bulb": {
+            "mean": _rounded(dry_bulb.mean()),
+            "min": _rounded(dry_bulb.min()),
+            "max": _rounded(dry_bulb.max()),
+            "monthly_mean": [
+                _rounded(np.nanmean(means[months == month])) if (months == month).any() else None
+                for month in range(1, 13)
+            ],
+        },
+        "hdd18": hdd18["hdd"],
+        "cdd18": hdd18["cdd"],
+        "cdd10": cdd10,
+        "climate_zone": climate_zone(hdd18["hdd"], cdd10),
+        "design_conditions": design,
+        # Wh/m² per hour summed over the year
+        "global_horizontal_kwh_m2": _rounded(global_horizontal[global_horizontal < 9999].sum() / 1000),
+        "wind_speed_mean": _rounded(wind_speed[wind_speed < 999].mean()),
+    }
+
+
+def cache_dir(weather_file: WeatherFile) -> Path:
+    return Path(settings.ENERGYPLUS_WEATHER_DIR) / weather_file.sha256
+
+
+def _write_cache(directory: Path, epw: bytes, data: WeatherData) -> None:
+    """Write the cache files, the index last: it marks the cache complete."""
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}-{threading.get_ident()}.tmp"
+    for name, write in (
+        (EPW_FILE, lambda f: f.write(epw)),
+        (DATA_FILE, lambda f: f.write(np.ascontiguousarray(data.values, dtype=DTYPE).tobytes())),
+        (INDEX_FILE, lambda f: f.write(json.dumps({
+            "format_version": FORMAT_VERSION,
+            "columns": [name for name, _ in COLUMNS],
+            "rows": data.hours,
+            "header": data.header,
+        }).encode('utf-8'))),
+    ):
+        tmp = directory / (name + suffix)
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, directory / name)
+
+
+def _cached_index(directory: Path) -> Optional[dict]:
+    try:
+        with open(directory / INDEX_FILE) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("format_version") != FORMAT_VERSION or not (directory / EPW_FILE).exists():
+        return None
+    return index
+
+
+def ensure_cached(weather_file: WeatherFile) -> Path:
+    """Return the local cache directory of a registry entry, building it if needed."""
+    directory = cache_dir(weather_file)
+    if _cached_index(directory) is not None:
+        return directory
+    with _cache_lock:
+        if _cached_index(directory) is None:
+            epw = bytes(WeatherFile.objects.values_list('content', flat=True).get(pk=weather_file.pk))
+            _write_cache(directory, epw, parse_epw(epw))
+    return directory
+
+
+def epw_path(weather_file: WeatherFile) -> Path:
+    """Local path of the EPW, for EnergyPlus's ``-w``."""
+    return ensure_cached(weather_file) / EPW_FILE
+
+
+def load(weather_file: WeatherFile) -> WeatherData:
+    """The parsed weather data, memory-mapped from the local cache."""
+    directory = ensure_cached(weather_file)
+    index = _cached_index(directory)
+    values = np.memmap(directory / DATA_FILE, dtype=DTYPE, mode='r', shape=(index["rows"], len(index["columns"])))
+    return WeatherData(index["header"], values)
+
+
+def register(data: bytes, name: str) -> Tuple[WeatherFile, bool]:
+    """Add an EPW to the registry; returns the entry and whether it is new.
+
+    Raises ValueError if the data isn't an EPW or is too large.
+    """
+    if len(data) > settings.ENERGYPLUS_WEATHER_MAX_BYTES:
+        raise ValueError(f"Weather files are limited to {settings.ENERGYPLUS_WEATHER_MAX_BYTES} bytes")
+    sha256 = hashlib.sha256(data).hexdigest()
+    existing = WeatherFile.objects.defer('content').filter(sha256=sha256).first()
+    if existing is not None:
+        return existing, False
+
+    parsed = parse_epw(data)
+    location = parsed.header["location"]
+    weather_file, created = WeatherFile.objects.get_or_create(
+        sha256=sha256,
+        defaults=dict(
+            name=Path(name).name[:255] or f"{sha256[:12]}.epw",
+            content=data,
+            size=len(data),
+            city=location["city"][:128],
+            state=location["state"][:64],
+            country=location["country"][:64],
+            source=location["source"][:64],
+            wmo=location["wmo"][:16],
+            latitude=location["latitude"],
+            longitude=location["longitude"],
+            time_zone=location["time_zone"],
+            elevation=location["elevation"],
+            hours=parsed.hours,
+            summary=summarize(parsed),
+        ),
+    )
+    _write_cache(cache_dir(weather_file), data, parsed)
+    return weather_file, created
+
+
+def get_weather_file(reference) -> WeatherFile:
+    """Look up a registry entry by ID or SHA-256 (without its content).
+
+    Raises ValueError if there is no such entry.
+    """
+    reference = str(reference).strip()
+    entries = WeatherFile.objects.defer('content')
+    if reference.isdigit():
+        weather_file = entries.filter(pk=int(reference)).first()
+    else:
+        weather_file = entries.filter(sha256=reference.lower()).first()
+    if weather_file is None:
+        raise ValueError(f"Unknown weather file: {reference}")
+    return weather_file
+
+
+def _distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def search(query: str = '', near: Optional[Tuple[float, float]] = None) -> List[WeatherFile]:
+    """Registry entries matching ``query``, nearest to ``near`` (lat, lon) first.
+
+    Each entry found with ``near`` has its ``distance_km`` set.
+    """
+    entries = WeatherFile.objects.defer('content')
+    for word in query.split():
+        entries = entries.filter(
+            Q(city__icontains=word) | Q(state__icontains=word) | Q(country__icontains=word)
+            | Q(name__icontains=word) | Q(wmo=word)
+        )
+    entries = list(entries)
+    if near is not None:
+        located = [e for e in entries if e.latitude is not None and e.longitude is not None]
+        for entry in located:
+            entry.distance_km = round(_distance_km(near[0], near[1], entry.latitude, entry.longitude), 1)
+        entries = sorted(located, key=lambda e: e.distance_km)
+    return entries
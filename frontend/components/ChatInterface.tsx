@@ -1,6 +1,7 @@
 'use client';
 
 import { useState, useRef, useEffect, useCallback } from 'react';
+import axios from 'axios';
 import ChatMessage from './ChatMessage';
 import ChatInput from './ChatInput';
 import ResultsVisualization from './ResultsVisualization';
@@ -10,6 +11,33 @@ import { runSimulation, SimulationResponse, fetchSimulationHistory, SimulationHi
 import { useTheme } from './ThemeProvider';
 import { History, Moon, Sun } from 'lucide-react';
 
+// POST /api/simulation/run queues the job and answers 202 with these URLs;
+// the results come from result_url once the job has finished.
+interface QueuedSimulation {
+  simulation_id: string;
+  status_url: string;
+  result_url: string;
+}
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL ?? 'http://localhost:8000';
+const POLL_INTERVAL_MS = 2000;
+const POLL_TIMEOUT_MS = 60 * 60 * 1000;
+
+async function waitForResult(queued: QueuedSimulation): Promise<SimulationResponse> {
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    // 202 while queued or running; a failed job answers 500, which throws
+    const response = await axios.get<SimulationResponse>(`${API_BASE_URL}${queued.result_url}`, {
+      validateStatus: (status) => status === 200 || status === 202,
+    });
+    if (response.status === 200) {
+      return response.data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+  throw new Error(`Simulation ${queued.simulation_id} did not finish in time`);
+}
+
 export interface Message {
   role: 'user' | 'assistant';
   content: string;
@@ -77,9 +105,11 @@ export default function ChatInterface() {
     setLoading(true);
 
     try {
-      // Run simulation
-      const response = await runSimulation(message, customIDF || undefined);
+      // Queue the simulation, then wait for its results
+      const submitted = (await runSimulation(message, customIDF || undefined)) as
+        SimulationResponse | QueuedSimulation;
       setCustomIDF(null); // Reset after use
+      const response = 'result_url' in submitted ? await waitForResult(submitted) : submitted;
 
       // Add assistant message
       const assistantMessage: Message = {